@@ -0,0 +1,103 @@
+# accounts/integrations/fake_toss.py
+"""
+로컬 가짜 Toss 로그인 API 서버 (테스트 / 벤치마크용, mTLS 없이 http).
+
+    with FakeTossServer(latency=0.2) as server:
+        client = TossMTLS(session=requests.Session(), endpoints=server.endpoints)
+
+- generate-token / refresh-token (POST), login-me (GET) 에 Toss 와 같은 모양({"resultType", "success"})으로 응답
+- latency: 모든 요청에 넣는 지연 (초)
+- requests: 엔드포인트별 받은 요청 수
+"""
+from __future__ import annotations
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+_PATHS = {
+    "generate_token": "/api-partner/v1/apps-in-toss/user/oauth2/generate-token",
+    "refresh_token": "/api-partner/v1/apps-in-toss/user/oauth2/refresh-token",
+    "login_me": "/api-partner/v1/apps-in-toss/user/oauth2/login-me",
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # 기본 listen backlog(5)면 동시 연결이 몰릴 때 SYN 이 버려져 1초씩 늦어진다
+
+
+class FakeTossServer:
+    def __init__(self, *, latency: float = 0.0, user_key: int = 1001, expires_in: int = 3600):
+        self.latency = latency
+        self.user_key = user_key
+        self.expires_in = expires_in
+        self.requests: Dict[str, int] = {name: 0 for name in _PATHS}
+        self._issued = 0
+        self._lock = threading.Lock()
+        self._httpd: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoints(self) -> Dict[str, str]:
+        host, port = self._httpd.server_address[:2]
+        return {name: f"http://{host}:{port}{path}" for name, path in _PATHS.items()}
+
+    def start(self) -> "FakeTossServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                status, body = server._respond(self.path.split("?")[0])
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _reply
+
+        self._httpd = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, path: str):
+        name = next((n for n, p in _PATHS.items() if p == path), None)
+        if name is None:
+            return 404, {"resultType": "FAIL", "error": {"reason": "not found"}}
+        with self._lock:
+            self.requests[name] += 1
+            self._issued += 1
+            issued = self._issued
+
+        time.sleep(self.latency)
+        if name == "login_me":
+            return 200, {"resultType": "SUCCESS", "success": {"userKey": self.user_key}}
+        return 200, {
+            "resultType": "SUCCESS",
+            "success": {
+                "accessToken": f"fake-access-{issued}",
+                "refreshToken": f"fake-refresh-{issued}",
+                "expiresIn": self.expires_in,
+                "refreshTokenExpiresIn": self.expires_in * 24,
+            },
+        }
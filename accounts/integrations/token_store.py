@@ -0,0 +1,465 @@
+# accounts/integrations/token_store.py
+"""
+Toss access token 저장소.
+
+토큰 갱신 요청마다 Toss refresh-token 을 부르지 않도록, 유저당 TossOAuthToken 한 행에
+access token + 만료 시각을 같이 저장하고 프로세스 안에서도 캐시한다.
+
+- get_access_token(key) / aget_access_token(key)
+  - 만료까지 REFRESH_AHEAD 초보다 많이 남았으면 저장된 토큰 그대로 (Toss 호출 없음)
+  - REFRESH_AHEAD 안으로 들어왔으면 저장된 토큰을 돌려주고 백그라운드에서 미리 갱신
+  - 이미 만료됐거나 없으면 그 자리에서 갱신
+- 갱신은 유저당 하나만 (single-flight)
+  - 같은 프로세스: _flights (threading.Event). 기다리던 요청은 리더의 결과(또는 에러)를 그대로 받는다
+  - 다른 워커: refresh_lease_until 이 비었거나 지난 행만 UPDATE 로 선점 (rowcount 로 판단)
+    선점 못 한 워커는 행의 updated_at 이 바뀔 때까지 폴링, 리더가 죽으면 LEASE_TTL 뒤에 넘겨받는다
+  - REFRESH_WAIT 초 안에 결과가 안 나오면 TokenRefreshBusy
+- Toss 가 refresh token 을 새로 내려주면 같이 교체
+- purge_expired_tokens(): refresh token 까지 만료된 행을 batch 삭제
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import TossOAuthToken
+from .toss_clients import get_async_toss_client, get_toss_client
+
+import logging
+logger = logging.getLogger(__name__)
+
+REFRESH_AHEAD = int(os.getenv("TOSS_TOKEN_REFRESH_AHEAD", "300"))  # 만료 몇 초 전부터 미리 갱신할지
+REFRESH_WAIT = float(os.getenv("TOSS_TOKEN_REFRESH_WAIT", "10"))  # 다른 요청의 갱신을 기다리는 최대 시간 (초)
+LEASE_TTL = int(os.getenv("TOSS_TOKEN_LEASE_TTL", "30"))  # 갱신하던 워커가 죽었다고 보는 시간 (초)
+CACHE_SIZE = int(os.getenv("TOSS_TOKEN_CACHE_SIZE", "10000"))
+
+_POLL_MIN = 0.05
+_POLL_MAX = 0.5
+
+_sleep = time.sleep  # 테스트에서 바꿔 끼울 수 있게
+_asleep = asyncio.sleep
+
+
+class NoRefreshToken(Exception):
+    """이 유저의 TossOAuthToken 행이 없음 (로그인부터 다시)"""
+
+
+class TokenRefreshFailed(Exception):
+    """Toss 가 갱신을 거절함 (resultType != SUCCESS / accessToken 없음)"""
+
+
+class TokenRefreshBusy(Exception):
+    """다른 워커가 갱신 중인데 REFRESH_WAIT 안에 끝나지 않음"""
+
+
+class AccessToken(NamedTuple):
+    token: str
+    expires_at: datetime
+
+    def expires_in(self) -> int:
+        return max(0, int((self.expires_at - datetime.now()).total_seconds()))
+
+    def needs_refresh(self) -> bool:
+        return self.expires_at - datetime.now() <= timedelta(seconds=REFRESH_AHEAD)
+
+
+# ----- 프로세스 내 캐시 (DB 조회도 생략) -----
+_cache: "OrderedDict[int, AccessToken]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(key: int) -> Optional[AccessToken]:
+    with _cache_lock:
+        token = _cache.get(key)
+        if token is None:
+            return None
+        if token.expires_at <= datetime.now():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return token
+
+
+def _remember(key: int, token: AccessToken) -> None:
+    if CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = token
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def forget(key: int) -> None:
+    with _cache_lock:
+        _cache.pop(key, None)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# ----- DB -----
+def _load(key: int) -> Optional[Dict[str, Any]]:
+    return (
+        TossOAuthToken.objects.filter(toss_user_key=key)
+        .values("refresh_token", "access_token", "access_token_expires_at", "updated_at")
+        .first()
+    )
+
+
+def _stored_token(row: Optional[Dict[str, Any]]) -> Optional[AccessToken]:
+    """행에 저장된 아직 유효한 access token"""
+    if not row or not row["access_token"] or not row["access_token_expires_at"]:
+        return None
+    if row["access_token_expires_at"] <= datetime.now():
+        return None
+    return AccessToken(row["access_token"], row["access_token_expires_at"])
+
+
+def _refreshed_since(row: Optional[Dict[str, Any]], started: datetime) -> Optional[AccessToken]:
+    """내가 갱신을 시작한 뒤에 다른 워커(또는 로그인)가 새로 저장한 토큰"""
+    token = _stored_token(row)
+    return token if token is not None and row["updated_at"] >= started else None
+
+
+def _try_lease(key: int) -> Optional[datetime]:
+    """선점하면 리스 만료 시각을 돌려준다 (저장 / 해제 때 아직 내 리스인지 확인하는 값)"""
+    now = datetime.now()
+    lease = now + timedelta(seconds=LEASE_TTL)
+    claimed = (
+        TossOAuthToken.objects.filter(
+            Q(refresh_lease_until__isnull=True) | Q(refresh_lease_until__lte=now), toss_user_key=key
+        )
+        .update(refresh_lease_until=lease)
+    )
+    return lease if claimed else None
+
+
+def _release(key: int, lease: datetime) -> None:
+    try:
+        TossOAuthToken.objects.filter(toss_user_key=key, refresh_lease_until=lease).update(refresh_lease_until=None)
+    except Exception:
+        # 해제 실패는 LEASE_TTL 뒤에 자연히 풀린다
+        logger.warning("[toss-token] lease release failed key=%s", key, exc_info=True)
+
+
+def _parse_refresh(res: Dict[str, Any]) -> Dict[str, Any]:
+    # Toss 응답은 {"resultType": "SUCCESS", "success": {...}} (토큰 필드가 바로 오는 응답도 허용)
+    if res.get("resultType", "SUCCESS") != "SUCCESS":
+        raise TokenRefreshFailed(f"toss refresh failed: {res.get('error') or res.get('resultType')}")
+    body = res.get("success") or res
+    if not body.get("accessToken"):
+        raise TokenRefreshFailed("no accessToken in toss refresh response")
+    return body
+
+
+def _store(key: int, lease: datetime, res: Dict[str, Any]) -> AccessToken:
+    """Toss refresh 응답 저장 + 리스 해제 (UPDATE 한 번)"""
+    body = _parse_refresh(res)
+    now = datetime.now()
+    token = AccessToken(body["accessToken"], now + timedelta(seconds=int(body.get("expiresIn") or 0)))
+    fields = {
+        "access_token": token.token,
+        "access_token_expires_at": token.expires_at,
+        "refresh_lease_until": None,
+        "updated_at": now,
+    }
+    if body.get("refreshToken"):
+        fields["refresh_token"] = body["refreshToken"]
+    if body.get("refreshTokenExpiresIn"):
+        fields["refresh_token_expires_at"] = now + timedelta(seconds=int(body["refreshTokenExpiresIn"]))
+    if not TossOAuthToken.objects.filter(toss_user_key=key, refresh_lease_until=lease).update(**fields):
+        # LEASE_TTL 을 넘겨 다른 워커가 넘겨받음 → 그쪽 결과가 저장된다. 받은 토큰은 그대로 써도 됨
+        logger.warning("[toss-token] lease lost before store key=%s", key)
+    _remember(key, token)
+    return token
+
+
+def save_tokens(
+    toss_user_key: int,
+    *,
+    refresh_token: str,
+    refresh_expires_in: Optional[int] = None,
+    access_token: Optional[str] = None,
+    expires_in: Optional[int] = None,
+) -> None:
+    """로그인에서 받은 토큰 저장 (행이 없으면 생성). 트랜잭션 안에서 불러도 캐시는 커밋 후에 채운다"""
+    now = datetime.now()
+    token = AccessToken(access_token, now + timedelta(seconds=int(expires_in))) if access_token and expires_in else None
+    TossOAuthToken.objects.update_or_create(
+        toss_user_key=toss_user_key,
+        defaults={
+            "refresh_token": refresh_token,
+            "refresh_token_expires_at": now + timedelta(seconds=int(refresh_expires_in))
+            if refresh_expires_in
+            else None,
+            "access_token": token.token if token else "",
+            "access_token_expires_at": token.expires_at if token else None,
+        },
+    )
+    if token is not None:
+        transaction.on_commit(lambda: _remember(toss_user_key, token))
+    else:
+        forget(toss_user_key)
+
+
+# ----- single-flight -----
+class _Flight:
+    def __init__(self, key: int):
+        self.key = key
+        self.done = threading.Event()
+        self.token: Optional[AccessToken] = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[int, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _join(key: int):
+    """리턴: (flight, 내가 리더인지)"""
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is None:
+            flight = _flights[key] = _Flight(key)
+            return flight, True
+        return flight, False
+
+
+def _publish(flight: _Flight, token: Optional[AccessToken], error: Optional[BaseException]) -> None:
+    flight.token, flight.error = token, error
+    with _flights_lock:
+        if _flights.get(flight.key) is flight:
+            del _flights[flight.key]
+    flight.done.set()
+
+
+def _followed(flight: _Flight) -> AccessToken:
+    if flight.error is not None:
+        raise flight.error
+    return flight.token
+
+
+def refresh_access_token(key: int, *, wait: Optional[float] = None) -> AccessToken:
+    """Toss 에서 새 access token 을 받아 저장. 유저당 하나만 실제로 Toss 를 부르고 나머지는 그 결과를 받는다"""
+    started = datetime.now()
+    deadline = time.monotonic() + (REFRESH_WAIT if wait is None else wait)
+    flight, leader = _join(key)
+    if not leader:
+        if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+            raise TokenRefreshBusy(key)
+        return _followed(flight)
+
+    token = error = None
+    try:
+        token = _lead(key, started, deadline)
+        return token
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _publish(flight, token, error)
+
+
+def _lead(key: int, started: datetime, deadline: float) -> AccessToken:
+    delay = _POLL_MIN
+    while True:
+        lease = _try_lease(key)
+        if lease is not None:
+            break
+        row = _load(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _refreshed_since(row, started)
+        if token is not None:
+            _remember(key, token)
+            return token
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TokenRefreshBusy(key)
+        _sleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX)
+
+    try:
+        row = _load(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _refreshed_since(row, started)
+        if token is not None:
+            # 리스를 잡기 직전에 다른 워커가 갱신을 끝냄
+            _release(key, lease)
+            _remember(key, token)
+            return token
+        return _store(key, lease, get_toss_client().refresh_token(row["refresh_token"]))
+    except BaseException:
+        _release(key, lease)
+        raise
+
+
+def get_access_token(key: int) -> AccessToken:
+    """
+    유효한 access token (캐시 → DB → 필요하면 Toss 갱신).
+    예외: NoRefreshToken / TokenRefreshBusy / TokenRefreshFailed / Toss 호출 에러
+    """
+    token = _cached(key)
+    if token is None:
+        row = _load(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _stored_token(row)
+        if token is not None:
+            _remember(key, token)
+    if token is None:
+        return refresh_access_token(key)
+    if token.needs_refresh():
+        refresh_in_background(key)
+    return token
+
+
+def refresh_in_background(key: int) -> None:
+    """이미 이 프로세스에서 갱신 중이면 아무것도 하지 않는다"""
+    with _flights_lock:
+        if key in _flights:
+            return
+    _spawn(_background_refresh, key)
+
+
+def _spawn(fn, *args) -> None:
+    threading.Thread(target=fn, args=args, daemon=True, name="toss-token-refresh").start()
+
+
+def _background_refresh(key: int) -> None:
+    try:
+        refresh_access_token(key, wait=0)
+    except TokenRefreshBusy:
+        pass  # 다른 워커가 갱신 중
+    except Exception:
+        # 실패해도 아직 유효한 토큰이 있으니 다음 요청에서 다시 시도
+        logger.warning("[toss-token] background refresh failed key=%s", key, exc_info=True)
+    finally:
+        connection.close()
+
+
+# ----- async (ASGI 뷰용). DB 는 짧은 sync_to_async 로, 기다리는 동안은 스레드를 잡지 않는다 -----
+async def arefresh_access_token(key: int, *, wait: Optional[float] = None) -> AccessToken:
+    """refresh_access_token 의 async 버전 (같은 _flights / 리스를 공유)"""
+    started = datetime.now()
+    deadline = time.monotonic() + (REFRESH_WAIT if wait is None else wait)
+    flight, leader = _join(key)
+    if not leader:
+        delay = _POLL_MIN
+        while not flight.done.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TokenRefreshBusy(key)
+            await _asleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+        return _followed(flight)
+
+    token = error = None
+    try:
+        token = await _alead(key, started, deadline)
+        return token
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _publish(flight, token, error)
+
+
+async def _alead(key: int, started: datetime, deadline: float) -> AccessToken:
+    delay = _POLL_MIN
+    while True:
+        lease = await sync_to_async(_try_lease)(key)
+        if lease is not None:
+            break
+        row = await sync_to_async(_load)(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _refreshed_since(row, started)
+        if token is not None:
+            _remember(key, token)
+            return token
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TokenRefreshBusy(key)
+        await _asleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX)
+
+    try:
+        row = await sync_to_async(_load)(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _refreshed_since(row, started)
+        if token is not None:
+            await sync_to_async(_release)(key, lease)
+            _remember(key, token)
+            return token
+        res = await get_async_toss_client().refresh_token(row["refresh_token"])
+        return await sync_to_async(_store)(key, lease, res)
+    except BaseException:
+        await sync_to_async(_release)(key, lease)
+        raise
+
+
+async def aget_access_token(key: int) -> AccessToken:
+    """get_access_token 의 async 버전"""
+    token = _cached(key)
+    if token is None:
+        row = await sync_to_async(_load)(key)
+        if row is None:
+            raise NoRefreshToken(key)
+        token = _stored_token(row)
+        if token is not None:
+            _remember(key, token)
+    if token is None:
+        return await arefresh_access_token(key)
+    if token.needs_refresh():
+        arefresh_in_background(key)
+    return token
+
+
+_tasks: set = set()  # 실행 중인 백그라운드 갱신 (참조를 잡아 둬야 GC 되지 않는다)
+
+
+def arefresh_in_background(key: int) -> None:
+    with _flights_lock:
+        if key in _flights:
+            return
+    task = asyncio.get_running_loop().create_task(_abackground_refresh(key))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _abackground_refresh(key: int) -> None:
+    try:
+        await arefresh_access_token(key, wait=0)
+    except TokenRefreshBusy:
+        pass
+    except Exception:
+        logger.warning("[toss-token] background refresh failed key=%s", key, exc_info=True)
+
+
+def purge_expired_tokens(batch_size: int = 1000) -> int:
+    """refresh token 까지 만료된 행 (더는 갱신할 수 없음) 을 batch 단위로 삭제. 삭제한 행 수 반환"""
+    total = 0
+    now = datetime.now()
+    while True:
+        ids = list(
+            TossOAuthToken.objects.filter(refresh_token_expires_at__lte=now)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = TossOAuthToken.objects.filter(id__in=ids).delete()
+        total += deleted
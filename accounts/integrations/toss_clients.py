@@ -1,51 +1,263 @@
-import os, json, requests
-from typing import Dict, Optional, Tuple
+import asyncio, os, json, ssl, threading, time, weakref, requests
+import logging
+from typing import Dict, Optional
+
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 BASE = os.getenv("TOSS_BASE_URL", "https://apps-in-toss-api.toss.im")
 GEN_TOKEN_URL = os.getenv("TOSS_GEN_TOKEN_URL", f"{BASE}/api-partner/v1/apps-in-toss/user/oauth2/generate-token")
 REFRESH_URL   = os.getenv("TOSS_REFRESH_URL",   f"{BASE}/api-partner/v1/apps-in-toss/user/oauth2/refresh-token")
 LOGIN_ME_URL  = os.getenv("TOSS_LOGIN_ME_URL",  f"{BASE}/api-partner/v1/apps-in-toss/user/oauth2/login-me")
+ENDPOINTS = {"generate_token": GEN_TOKEN_URL, "refresh_token": REFRESH_URL, "login_me": LOGIN_ME_URL}
 
 CLIENT_CERT = os.getenv("TOSS_CLIENT_CERT")
 CLIENT_KEY  = os.getenv("TOSS_CLIENT_KEY")
+CA_BUNDLE   = os.getenv("TOSS_CA_BUNDLE") or None
 
 DEFAULT_TIMEOUT = (6, 20)  # (connect, read)
 
+POOL_MAXSIZE = int(os.getenv("TOSS_POOL_MAXSIZE", "10"))
+MAX_RETRIES  = int(os.getenv("TOSS_MAX_RETRIES", "2"))
+# async 클라이언트는 스레드 수에 묶이지 않으므로 동시 연결을 더 넉넉하게
+ASYNC_POOL_MAXSIZE = int(os.getenv("TOSS_ASYNC_POOL_MAXSIZE", "100"))
+
+RETRY_STATUSES = (502, 503, 504)
+RETRY_BACKOFF = 0.3
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class MTLSAdapter(HTTPAdapter):
+    """
+    클라이언트 인증서를 한 번만 로드한 SSLContext 를 커넥션 풀 전체에서 재사용.
+    (요청마다 cert= 를 넘기면 urllib3 가 매번 인증서 파일을 다시 읽는다)
+    """
+
+    def __init__(self, ssl_context: ssl.SSLContext, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        return super().proxy_manager_for(*args, **kwargs)
+
+
+def build_ssl_context() -> ssl.SSLContext:
+    ctx = ssl.create_default_context(cafile=CA_BUNDLE)
+    ctx.load_cert_chain(CLIENT_CERT, CLIENT_KEY)
+    return ctx
+
+
+_ssl_context: Optional[ssl.SSLContext] = None
+# get_session() 이 _session_lock 을 잡은 채로 build_session() → get_ssl_context() 를 부르므로 락을 따로 둔다
+_ssl_context_lock = threading.Lock()
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """인증서를 한 번만 읽은 SSLContext (동기 세션 / async 클라이언트 공용)"""
+    global _ssl_context
+    if _ssl_context is None:
+        with _ssl_context_lock:
+            if _ssl_context is None:
+                if not (CLIENT_CERT and CLIENT_KEY):
+                    raise RuntimeError("mTLS cert/key 경로가 설정되지 않았습니다.")
+                _ssl_context = build_ssl_context()
+    return _ssl_context
+
+
+def build_session() -> requests.Session:
+    # 재시도:
+    # - connect 에러는 요청이 나가기 전이므로 POST 포함 항상 재시도
+    # - read/status(502/503/504) 재시도는 멱등인 GET(login-me) 에만
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = MTLSAdapter(
+        get_ssl_context(),
+        pool_connections=4,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """프로세스 공용 keep-alive 세션 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                if not (CLIENT_CERT and CLIENT_KEY):
+                    raise RuntimeError("mTLS cert/key 경로가 설정되지 않았습니다.")
+                _session = build_session()
+    return _session
+
+
+# ----- 엔드포인트별 지연시간 메트릭 (latency_stats() → GET /api/ops/upstreams 의 "toss") -----
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, float]] = {}
+
+
+def _record(endpoint: str, elapsed_ms: float, ok: bool) -> None:
+    with _metrics_lock:
+        m = _metrics.setdefault(endpoint, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        m["count"] += 1
+        m["total_ms"] += elapsed_ms
+        m["max_ms"] = max(m["max_ms"], elapsed_ms)
+        if not ok:
+            m["errors"] += 1
+
+
+def latency_stats() -> Dict[str, Dict[str, float]]:
+    with _metrics_lock:
+        return {
+            name: {**m, "avg_ms": round(m["total_ms"] / m["count"], 1) if m["count"] else 0.0}
+            for name, m in _metrics.items()
+        }
+
+
+def _generate_token_payload(authorization_code: str, referrer: Optional[str]) -> str:
+    payload = {"authorizationCode": authorization_code}
+    if referrer:
+        payload["referrer"] = referrer
+    return json.dumps(payload)
+
+
 class TossMTLS:
-    def __init__(self):
-        if not (CLIENT_CERT and CLIENT_KEY):
+    """
+    session / endpoints 를 넘기면 그걸 쓴다 (벤치마크 / 테스트에서 가짜 서버로 붙일 때).
+    기본은 mTLS keep-alive 공용 세션 + 환경변수 URL.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, endpoints: Optional[Dict[str, str]] = None):
+        if session is None and not (CLIENT_CERT and CLIENT_KEY):
             raise RuntimeError("mTLS cert/key 경로가 설정되지 않았습니다.")
-        self.cert: Tuple[str, str] = (CLIENT_CERT, CLIENT_KEY)
+        self.session = session or get_session()
+        self.endpoints = endpoints or ENDPOINTS
+
+    def _call(self, endpoint: str, method: str, **kwargs) -> Dict:
+        started = time.perf_counter()
+        ok = False
+        try:
+            resp = self.session.request(method, self.endpoints[endpoint], timeout=DEFAULT_TIMEOUT, **kwargs)
+            resp.raise_for_status()
+            ok = True
+            return resp.json()
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _record(endpoint, elapsed_ms, ok)
+            logger.debug("[toss] %s %.1fms ok=%s", endpoint, elapsed_ms, ok)
 
     def generate_token(self, authorization_code: str, referrer: Optional[str]) -> Dict:
-        payload = {"authorizationCode": authorization_code}
-        if referrer:
-            payload["referrer"] = referrer
-        resp = requests.post(
-            GEN_TOKEN_URL,
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(payload),
-            cert=self.cert, timeout=DEFAULT_TIMEOUT,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._call("generate_token", "POST", data=_generate_token_payload(authorization_code, referrer))
 
     def refresh_token(self, refresh_token: str) -> Dict:
-        payload = {"refreshToken": refresh_token}
-        resp = requests.post(
-            REFRESH_URL,
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(payload),
-            cert=self.cert, timeout=DEFAULT_TIMEOUT,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._call("refresh_token", "POST", data=json.dumps({"refreshToken": refresh_token}))
 
     def get_login_me(self, access_token: str) -> Dict:
-        resp = requests.get(
-            LOGIN_ME_URL,
-            headers={"Content-Type": "application/json", "Authorization": f"Bearer {access_token}"},
-            cert=self.cert, timeout=DEFAULT_TIMEOUT,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._call("login_me", "GET", headers={"Authorization": f"Bearer {access_token}"})
+
+
+def build_async_client() -> httpx.AsyncClient:
+    # 재시도 규칙은 동기 세션과 같게:
+    # - connect 에러는 transport 가 재시도 (요청이 나가기 전이므로 POST 도 안전)
+    # - 502/503/504 재시도는 멱등인 GET(login-me) 에만 (AsyncTossMTLS._call)
+    transport = httpx.AsyncHTTPTransport(
+        verify=get_ssl_context(),
+        retries=MAX_RETRIES,
+        limits=httpx.Limits(max_connections=ASYNC_POOL_MAXSIZE, max_keepalive_connections=ASYNC_POOL_MAXSIZE),
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0]),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def _retry_wait(resp: httpx.Response, attempt: int) -> float:
+    try:
+        return float(resp.headers.get("retry-after") or "")
+    except ValueError:
+        return RETRY_BACKOFF * 2 ** attempt
+
+
+class AsyncTossMTLS:
+    """TossMTLS 의 async 버전 (httpx.AsyncClient 커넥션 풀, 같은 SSLContext / 메트릭 사용)"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, endpoints: Optional[Dict[str, str]] = None):
+        self.client = client or build_async_client()
+        self.endpoints = endpoints or ENDPOINTS
+
+    async def _call(self, endpoint: str, method: str, **kwargs) -> Dict:
+        started = time.perf_counter()
+        ok = False
+        attempts = 1 + (MAX_RETRIES if method == "GET" else 0)
+        try:
+            for attempt in range(attempts):
+                resp = await self.client.request(method, self.endpoints[endpoint], **kwargs)
+                if resp.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    break
+                await asyncio.sleep(_retry_wait(resp, attempt))
+            resp.raise_for_status()
+            ok = True
+            return resp.json()
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _record(endpoint, elapsed_ms, ok)
+            logger.debug("[toss] %s %.1fms ok=%s (async)", endpoint, elapsed_ms, ok)
+
+    async def generate_token(self, authorization_code: str, referrer: Optional[str]) -> Dict:
+        return await self._call("generate_token", "POST", content=_generate_token_payload(authorization_code, referrer))
+
+    async def refresh_token(self, refresh_token: str) -> Dict:
+        return await self._call("refresh_token", "POST", content=json.dumps({"refreshToken": refresh_token}))
+
+    async def get_login_me(self, access_token: str) -> Dict:
+        return await self._call("login_me", "GET", headers={"Authorization": f"Bearer {access_token}"})
+
+
+_client: Optional[TossMTLS] = None
+
+
+def get_toss_client() -> TossMTLS:
+    """뷰에서 쓰는 프로세스 공용 TossMTLS"""
+    global _client
+    if _client is None:
+        _client = TossMTLS()
+    return _client
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTossMTLS]" = weakref.WeakKeyDictionary()
+
+
+def get_async_toss_client() -> AsyncTossMTLS:
+    """
+    async 뷰에서 쓰는 AsyncTossMTLS. 이벤트 루프마다 하나
+    (httpx 커넥션 풀이 루프에 묶여 있어서, ASGI 워커에서는 사실상 프로세스 공용)
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncTossMTLS()
+    return client
@@ -0,0 +1,14 @@
+# accounts/management/commands/purge_toss_tokens.py
+from django.core.management.base import BaseCommand
+from accounts.integrations.token_store import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete Toss tokens whose refresh token has expired (users must log in again)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired Toss tokens."))
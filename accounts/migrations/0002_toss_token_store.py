@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:31
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def drop_duplicate_tokens(apps, schema_editor):
+    # 로그인마다 행이 쌓여 있던 경우: 가장 최근에 갱신된 행만 남긴다
+    # (옛 refresh token 은 쓰이지 않으므로 일기와 달리 그냥 지워도 된다)
+    TossOAuthToken = apps.get_model("accounts", "TossOAuthToken")
+    keys = list(
+        TossOAuthToken.objects.values("toss_user_key")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("toss_user_key", flat=True)
+    )
+    for key in keys:
+        rows = TossOAuthToken.objects.filter(toss_user_key=key)
+        latest = rows.order_by("-updated_at", "-id").values_list("id", flat=True).first()
+        rows.exclude(id=latest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tossoauthtoken',
+            name='access_token',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='tossoauthtoken',
+            name='access_token_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tossoauthtoken',
+            name='refresh_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tossoauthtoken',
+            name='refresh_token_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(drop_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tossoauthtoken',
+            name='toss_user_key',
+            field=models.BigIntegerField(unique=True),
+        ),
+    ]
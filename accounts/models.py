@@ -15,9 +15,16 @@ class AppUser(models.Model):
     @property
     def is_active(self) -> bool:
         return True
+
+
 class TossOAuthToken(models.Model):
-    toss_user_key = models.BigIntegerField(db_index=True)
+    # 유저당 한 행 (accounts.integrations.token_store 가 관리)
+    toss_user_key = models.BigIntegerField(unique=True)
     refresh_token = models.TextField()
-    refresh_token_expires_at = models.DateTimeField(null=True, blank=True)
+    refresh_token_expires_at = models.DateTimeField(null=True, blank=True, db_index=True)  # purge 기준
+    access_token = models.TextField(blank=True, default="")
+    access_token_expires_at = models.DateTimeField(null=True, blank=True)
+    # 갱신 중인 워커가 잡은 리스 (다른 워커는 이 시각까지 Toss 를 부르지 않고 결과를 기다림)
+    refresh_lease_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,9 +1,25 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from .app_jwt import verify_app_jwt
+from .jwt_cache import token_cache, token_key
 from ..models import AppUser
 
 
+class ClaimsUser:
+    """
+    DB 조회 없이 토큰 클레임(sub / toss_user_key)만으로 만든 가벼운 유저.
+    뷰에 jwt_claims_only = True 를 켠 읽기 전용 엔드포인트에서만 쓰인다.
+    (ORM 필터에 넘길 수 없으니 id / toss_user_key 만 필요한 곳에서만 사용할 것)
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, user_id, toss_user_key=None):
+        self.id = self.pk = int(user_id)
+        self.toss_user_key = toss_user_key
+
+
 class AppJWTAuthentication(BaseAuthentication):
     keyword = "Bearer"
 
@@ -24,7 +40,13 @@ class AppJWTAuthentication(BaseAuthentication):
             # 토큰이 비어 있으면 인증 실패
             raise exceptions.AuthenticationFailed("Empty token")
 
-        # 3) 토큰 검증
+        # 3) 캐시 확인 (이미 검증 + 유저 조회까지 끝난 토큰이면 jwt.decode / DB 생략)
+        key = token_key(token)
+        cached = token_cache.get(key)
+        if cached:
+            return (cached[0], None)
+
+        # 3-1) 토큰 검증
         try:
             payload = verify_app_jwt(token)
         except Exception:
@@ -38,6 +60,14 @@ class AppJWTAuthentication(BaseAuthentication):
         user_id = payload.get("sub") or payload.get("user_id")
         toss_user_key = payload.get("toss_user_key")
 
+        # 4-0) claims-only 뷰면 DB 를 건드리지 않고 클레임으로 바로 인증
+        view = (getattr(request, "parser_context", None) or {}).get("view")
+        if user_id and getattr(view, "jwt_claims_only", False):
+            try:
+                return (ClaimsUser(user_id, toss_user_key), None)
+            except (TypeError, ValueError):
+                raise exceptions.AuthenticationFailed("Invalid token")
+
         user = None
 
         # 4-1) 우선 user_id로 찾기
@@ -54,5 +84,6 @@ class AppJWTAuthentication(BaseAuthentication):
             # 401로 보내면 프런트에서 다시 로그인 유도 가능
             raise exceptions.AuthenticationFailed("User not found")
 
-        # 5) 정상 인증
+        # 5) 정상 인증 → 토큰 만료(또는 최대 TTL)까지 캐시
+        token_cache.set(key, user, payload)
         return (user, None)
@@ -0,0 +1,87 @@
+import os, time, hashlib, threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+# 검증된 토큰 → 유저 캐시 (프로세스 단위)
+# - 키: sha256(token)  (원문 토큰은 메모리에 남기지 않음)
+# - 값: 유저 필드 값만 저장하고 꺼낼 때마다 새 인스턴스를 만든다
+#       (요청들이 같은 모델 인스턴스를 나눠 쓰면 한 요청이 바꾼 속성이 다른 요청/스레드로 샌다)
+# - 만료: min(토큰 exp, 최대 TTL)
+# - 유저 삭제 시 이 프로세스의 항목은 바로 제거 (accounts.signals).
+#   다른 워커 프로세스에는 알릴 방법이 없으므로 TTL 을 짧게 둔다 (삭제된 유저는 최대 TTL 초까지 통과)
+CACHE_TTL  = int(os.getenv("APP_JWT_CACHE_TTL", "30"))     # 초
+CACHE_SIZE = int(os.getenv("APP_JWT_CACHE_SIZE", "2048"))
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: int = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key → (만료 시각, user pk, (모델 클래스, db, 필드 이름, 값), payload)
+        self._data: "OrderedDict[str, Tuple[float, Any, Tuple, Dict]]" = OrderedDict()
+        self._by_user: Dict[Any, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, Dict]]:
+        """(user, payload) 또는 None. user 는 호출마다 새로 만든 인스턴스. 만료된 항목은 여기서 지운다"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, _pk, snapshot, payload = item
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+        model, db, names, values = snapshot
+        return model.from_db(db, names, values), dict(payload)
+
+    def set(self, key: str, user: Any, payload: Dict) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+
+        fields = user._meta.concrete_fields
+        snapshot = (
+            type(user), user._state.db,
+            [f.attname for f in fields], [getattr(user, f.attname) for f in fields],
+        )
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (expires_at, user.pk, snapshot, dict(payload))
+            self._by_user.setdefault(user.pk, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def invalidate_user(self, user_id: Any) -> None:
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def _remove(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is None:
+            return
+        keys = self._by_user.get(item[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[item[1]]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+token_cache = TokenCache()
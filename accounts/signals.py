@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AppUser
+from .security.jwt_cache import token_cache
+
+
+@receiver(post_delete, sender=AppUser)
+def drop_cached_tokens(sender, instance, **kwargs):
+    # 삭제된 유저의 토큰이 캐시 TTL 동안 계속 통과하지 않도록
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=AppUser)
+def drop_stale_cached_user(sender, instance, created, **kwargs):
+    # 캐시는 유저 필드 값을 들고 있으므로, 바뀌면 다음 요청에서 DB 에서 다시 읽게
+    if not created:
+        token_cache.invalidate_user(instance.pk)
@@ -1,3 +1,205 @@
-from django.test import TestCase
+import json
+import ssl
+import threading
+import time
+from datetime import datetime, timedelta
 
-# Create your tests here.
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, Client, TestCase, override_settings
+from unittest import mock
+
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from .integrations import token_store, toss_clients
+from .integrations.fake_toss import FakeTossServer
+from .integrations.toss_clients import AsyncTossMTLS, TossMTLS
+from .models import AppUser, TossOAuthToken
+from .security.app_jwt import issue_app_jwt
+from .security.authentication import AppJWTAuthentication
+from .security.jwt_cache import token_cache
+from .views import auth_views
+
+
+class AppJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        token = issue_app_jwt(self.user.id, {"toss_user_key": 1})
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def _authenticate(self):
+        return AppJWTAuthentication().authenticate(self.request)[0]
+
+    def test_cache_hits_get_their_own_user_instance(self):
+        first = self._authenticate()
+        first.toss_user_key = 999  # 한 요청이 인스턴스를 건드려도
+        with self.assertNumQueries(0):
+            second = self._authenticate()
+        self.assertIsNot(second, first)
+        self.assertEqual((second.pk, second.toss_user_key), (self.user.pk, 1))
+        self.assertFalse(second._state.adding)
+
+    def test_saved_or_deleted_user_is_dropped_from_cache(self):
+        self._authenticate()
+        self.user.toss_user_key = 2
+        self.user.save()
+        self.assertEqual(self._authenticate().toss_user_key, 2)
+
+        self.user.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self._authenticate()
+
+
+class TossLoginTests(TestCase):
+    """동기(config.urls) / async(config.urls_async) 로그인 뷰를 가짜 Toss 서버에 실제 HTTP 로"""
+
+    def setUp(self):
+        token_store.clear_cache()
+
+    def _sync_post(self, server, path, body):
+        client = TossMTLS(session=requests.Session(), endpoints=server.endpoints)
+        with mock.patch.object(auth_views, "get_toss_client", lambda: client):
+            return Client().post(path, json.dumps(body), content_type="application/json")
+
+    async def _async_post(self, server, path, body):
+        client = AsyncTossMTLS(client=httpx.AsyncClient(), endpoints=server.endpoints)
+        with override_settings(ROOT_URLCONF="config.urls_async"), \
+                mock.patch.object(auth_views, "get_async_toss_client", lambda: client):
+            try:
+                return await AsyncClient().post(path, json.dumps(body), content_type="application/json")
+            finally:
+                await client.client.aclose()
+
+    async def test_sync_and_async_login_return_same_shape(self):
+        with FakeTossServer(user_key=77) as server:
+            sync = await sync_to_async(self._sync_post)(server, "/api/accounts/toss-login", {"authorizationCode": "c"})
+            async_ = await self._async_post(server, "/api/accounts/toss-login", {"authorizationCode": "c"})
+
+        self.assertEqual((sync.status_code, async_.status_code), (200, 200))
+        self.assertEqual(sync.json().keys(), async_.json().keys())
+        self.assertEqual(async_.json()["user"]["tossUserKey"], 77)
+        self.assertEqual(await AppUser.objects.filter(toss_user_key=77).acount(), 1)
+        token = await TossOAuthToken.objects.aget(toss_user_key=77)
+        self.assertEqual((token.refresh_token, token.access_token), ("fake-refresh-3", "fake-access-3"))
+        self.assertEqual(server.requests, {"generate_token": 2, "refresh_token": 0, "login_me": 2})
+
+    async def test_async_refresh_uses_stored_token_after_first_call(self):
+        await TossOAuthToken.objects.acreate(toss_user_key=77, refresh_token="r")
+        client = AsyncTossMTLS(client=httpx.AsyncClient())
+        with FakeTossServer() as server, mock.patch.object(token_store, "get_async_toss_client", lambda: client):
+            client.endpoints = server.endpoints
+            first = await self._async_post(server, "/api/accounts/toss-refresh", {"tossUserKey": 77})
+            second = await self._async_post(server, "/api/accounts/toss-refresh", {"tossUserKey": 77})
+            missing = await self._async_post(server, "/api/accounts/toss-refresh", {"tossUserKey": 78})
+            invalid = await self._async_post(server, "/api/accounts/toss-refresh", {})
+            await client.client.aclose()
+        self.assertEqual(
+            [r.status_code for r in (first, second, missing, invalid)], [200, 200, 404, 400]
+        )
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first.json()["accessToken"], "fake-access-1")
+        self.assertIn("tossUserKey", invalid.json())
+        self.assertEqual(server.requests["refresh_token"], 1)
+
+
+class TossSessionTests(TestCase):
+    def test_first_get_session_does_not_deadlock(self):
+        # get_session() → build_session() → get_ssl_context(): 락이 겹치면 첫 호출이 영원히 멈춘다
+        sessions = []
+        with mock.patch.multiple(toss_clients, CLIENT_CERT="c", CLIENT_KEY="k", _session=None, _ssl_context=None), \
+                mock.patch.object(toss_clients, "build_ssl_context", ssl.create_default_context):
+            worker = threading.Thread(target=lambda: sessions.append(toss_clients.get_session()), daemon=True)
+            worker.start()
+            worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(sessions), 1)
+
+
+class TokenStoreTests(TestCase):
+    def setUp(self):
+        token_store.clear_cache()
+        self.server = FakeTossServer(latency=0.1).start()
+        self.addCleanup(self.server.stop)
+        client = TossMTLS(session=requests.Session(), endpoints=self.server.endpoints)
+        patcher = mock.patch.object(token_store, "get_toss_client", lambda: client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _row(self, expires_in=None, **kwargs):
+        expires_at = datetime.now() + timedelta(seconds=expires_in) if expires_in is not None else None
+        return TossOAuthToken.objects.create(
+            toss_user_key=5, refresh_token="r", access_token="old" if expires_at else "",
+            access_token_expires_at=expires_at, **kwargs
+        )
+
+    def test_valid_token_is_served_without_calling_toss(self):
+        self._row(expires_in=3600)
+        token = token_store.get_access_token(5)
+        self.assertEqual(token.token, "old")
+        self.assertGreater(token.expires_in(), 3500)
+        self.assertEqual(self.server.requests["refresh_token"], 0)
+
+    def test_expired_token_is_refreshed_once_for_concurrent_callers(self):
+        self._row(expires_in=-1)
+        results = []
+
+        def follower():
+            while 5 not in token_store._flights:
+                time.sleep(0.005)
+            results.append(token_store.refresh_access_token(5).token)  # 리더의 결과를 기다림 (DB 접근 없음)
+
+        followers = [threading.Thread(target=follower) for _ in range(3)]
+        for t in followers:
+            t.start()
+        results.append(token_store.get_access_token(5).token)
+        for t in followers:
+            t.join()
+
+        self.assertEqual(results, ["fake-access-1"] * 4)
+        self.assertEqual(self.server.requests["refresh_token"], 1)
+        row = TossOAuthToken.objects.get(toss_user_key=5)
+        self.assertEqual((row.access_token, row.refresh_token), ("fake-access-1", "fake-refresh-1"))
+        self.assertIsNone(row.refresh_lease_until)
+
+    def test_token_close_to_expiry_is_refreshed_in_background(self):
+        self._row(expires_in=token_store.REFRESH_AHEAD - 10)
+        with mock.patch.object(token_store, "_spawn", lambda fn, *args: fn(*args)), \
+                mock.patch.object(token_store, "connection"):
+            token = token_store.get_access_token(5)
+        self.assertEqual(token.token, "old")  # 아직 유효한 토큰은 기다리지 않고 바로
+        self.assertEqual(token_store.get_access_token(5).token, "fake-access-1")
+        self.assertEqual(self.server.requests["refresh_token"], 1)
+
+    def test_waits_for_refresh_running_in_another_worker(self):
+        self._row(expires_in=-1, refresh_lease_until=datetime.now() + timedelta(seconds=30))
+
+        def other_worker_stores(_delay):
+            TossOAuthToken.objects.filter(toss_user_key=5).update(
+                access_token="theirs", access_token_expires_at=datetime.now() + timedelta(hours=1),
+                refresh_lease_until=None, updated_at=datetime.now(),
+            )
+
+        with mock.patch.object(token_store, "_sleep", other_worker_stores):
+            self.assertEqual(token_store.get_access_token(5).token, "theirs")
+        self.assertEqual(self.server.requests["refresh_token"], 0)
+
+    def test_busy_when_other_worker_does_not_finish_and_missing_row(self):
+        self._row(expires_in=-1, refresh_lease_until=datetime.now() + timedelta(seconds=30))
+        with mock.patch.object(token_store, "REFRESH_WAIT", 0.1):
+            with self.assertRaises(token_store.TokenRefreshBusy):
+                token_store.get_access_token(5)
+        with self.assertRaises(token_store.NoRefreshToken):
+            token_store.get_access_token(6)
+        self.assertEqual(self.server.requests["refresh_token"], 0)
+
+    def test_purge_deletes_rows_with_expired_refresh_token(self):
+        TossOAuthToken.objects.create(toss_user_key=1, refresh_token="a",
+                                      refresh_token_expires_at=datetime.now() - timedelta(days=1))
+        TossOAuthToken.objects.create(toss_user_key=2, refresh_token="b",
+                                      refresh_token_expires_at=datetime.now() + timedelta(days=1))
+        TossOAuthToken.objects.create(toss_user_key=3, refresh_token="c")
+        self.assertEqual(token_store.purge_expired_tokens(batch_size=1), 1)
+        self.assertEqual(sorted(TossOAuthToken.objects.values_list("toss_user_key", flat=True)), [2, 3])
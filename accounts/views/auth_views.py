@@ -1,21 +1,90 @@
 # accounts/views/auth_views.py
+import json
 import logging
 
-from datetime import datetime, timedelta, timezone
+from asgiref.sync import sync_to_async
 from django.db import transaction
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
 from accounts.serializers.auth_serializers import TossLoginSerializer, RefreshSerializer
-from accounts.integrations.toss_clients import TossMTLS
-from accounts.models import AppUser, TossOAuthToken
+from accounts.integrations import token_store
+from accounts.integrations.toss_clients import get_async_toss_client, get_toss_client
+from accounts.models import AppUser
 from accounts.security.app_jwt import issue_app_jwt
 logger = logging.getLogger(__name__)
 
-def ts_after(seconds: int):
-    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
 
+def _parse_token_res(token_res: dict):
+    """generate-token 응답 → (tokens, 에러 body). tokens: accessToken / refreshToken / 만료(초)"""
+    if token_res.get("resultType") != "SUCCESS":
+        return None, {"error": "toss_generate_token_failed", "raw": token_res}
+
+    token_success = token_res.get("success", {}) or {}
+    tokens = {
+        "access_token": token_success.get("accessToken"),
+        "refresh_token": token_success.get("refreshToken"),
+        "access_expires": token_success.get("expiresIn"),
+        "refresh_expires": token_success.get("refreshTokenExpiresIn"),  # 가능하면 쓰고, 없으면 None
+    }
+    if not tokens["access_token"]:
+        return None, {"error": "no_access_token", "raw": token_res}
+    return tokens, None
+
+
+def _parse_login_me(me: dict):
+    """login-me 응답 → (toss_user_key, 에러 body)"""
+    if me.get("resultType") != "SUCCESS":
+        return None, {"error": "toss_login_me_failed", "raw": me}
+
+    me_success = me.get("success", {}) or {}
+    toss_user_key = me_success.get("userKey")
+    if not toss_user_key:
+        return None, {"error": "no_user_key", "raw": me}
+    return toss_user_key, None
+
+
+def _save_login(toss_user_key, tokens: dict) -> AppUser:
+    """DB upsert & 토큰 저장 (access token 도 같이 저장 → 바로 이어지는 toss-refresh 는 Toss 를 부르지 않음)"""
+    with transaction.atomic():
+        user, _created = AppUser.objects.get_or_create(
+            toss_user_key=toss_user_key
+        )
+
+        if tokens["refresh_token"]:
+            token_store.save_tokens(
+                toss_user_key,
+                refresh_token=tokens["refresh_token"],
+                refresh_expires_in=tokens["refresh_expires"],
+                access_token=tokens["access_token"],
+                expires_in=tokens["access_expires"],
+            )
+    return user
+
+
+def _login_body(user: AppUser, toss_user_key, tokens: dict) -> dict:
+    """우리 앱용 JWT 발급 + 프론트로 보낼 최종 응답"""
+    app_jwt = issue_app_jwt(
+        user.id,
+        {"toss_user_key": toss_user_key},
+    )
+    return {
+        "jwt": app_jwt,
+        "toss": {
+            "accessTokenExpiresIn": tokens["access_expires"],
+            "refreshTokenExpiresIn": tokens["refresh_expires"],
+        },
+        "user": {
+            "id": user.id,
+            "tossUserKey": toss_user_key,
+        },
+    }
 
 
 class TossLoginView(APIView):
@@ -29,7 +98,7 @@ class TossLoginView(APIView):
         code = ser.validated_data["authorizationCode"]
         referrer = ser.validated_data.get("referrer")
 
-        client = TossMTLS()
+        client = get_toss_client()
 
         try:
             #
@@ -37,103 +106,28 @@ class TossLoginView(APIView):
             #
             token_res = client.generate_token(code, referrer)
             logger.warning(f"[toss-login] token_res = {token_res}")
-
-            if token_res.get("resultType") != "SUCCESS":
-                return Response(
-                    {
-                        "error": "toss_generate_token_failed",
-                        "raw": token_res,
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY,
-                )
-
-            token_success = token_res.get("success", {}) or {}
-
-            access_token = token_success.get("accessToken")
-            refresh_token = token_success.get("refreshToken")
-            access_expires = token_success.get("expiresIn")
-            refresh_expires = token_success.get("refreshTokenExpiresIn")  # 가능하면 쓰고, 없으면 None
-
-            if not access_token:
-                return Response(
-                    {
-                        "error": "no_access_token",
-                        "raw": token_res,
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY,
-                )
+            tokens, error = _parse_token_res(token_res)
+            if error:
+                return Response(error, status=status.HTTP_502_BAD_GATEWAY)
 
             #
             # 3. access_token -> 유저 정보 조회
             #
-            me = client.get_login_me(access_token)
+            me = client.get_login_me(tokens["access_token"])
             logger.warning(f"[toss-login] login_me = {me}")
-
-            if me.get("resultType") != "SUCCESS":
-                return Response(
-                    {
-                        "error": "toss_login_me_failed",
-                        "raw": me,
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY,
-                )
-
-            me_success = me.get("success", {}) or {}
-            toss_user_key = me_success.get("userKey")
-
-            if not toss_user_key:
-                return Response(
-                    {
-                        "error": "no_user_key",
-                        "raw": me,
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY,
-                )
+            toss_user_key, error = _parse_login_me(me)
+            if error:
+                return Response(error, status=status.HTTP_502_BAD_GATEWAY)
 
             #
             # 4. DB upsert & refresh_token 저장
             #
-            with transaction.atomic():
-                user, _created = AppUser.objects.get_or_create(
-                    toss_user_key=toss_user_key
-                )
-
-                if refresh_token:
-                    TossOAuthToken.objects.update_or_create(
-                        toss_user_key=toss_user_key,
-                        defaults={
-                            "refresh_token": refresh_token,
-                            "refresh_token_expires_at": ts_after(refresh_expires)
-                            if refresh_expires
-                            else None,
-                        },
-                    )
+            user = _save_login(toss_user_key, tokens)
 
             #
-            # 5. 우리 앱용 JWT 발급
+            # 5. 우리 앱용 JWT 발급 → 6. 프론트로 최종 응답
             #
-            app_jwt = issue_app_jwt(
-                user.id,
-                {"toss_user_key": toss_user_key},
-            )
-
-            #
-            # 6. 프론트로 최종 응답
-            #
-            return Response(
-                {
-                    "jwt": app_jwt,
-                    "toss": {
-                        "accessTokenExpiresIn": access_expires,
-                        "refreshTokenExpiresIn": refresh_expires,
-                    },
-                    "user": {
-                        "id": user.id,
-                        "tossUserKey": toss_user_key,
-                    },
-                },
-                status=status.HTTP_200_OK,
-            )
+            return Response(_login_body(user, toss_user_key, tokens), status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.exception("[toss-login] toss_login_failed")
@@ -146,25 +140,107 @@ class TossLoginView(APIView):
             )
 
 class TossRefreshView(APIView):
+    """유효한 Toss access token (token_store 에 저장된 게 있으면 Toss 를 부르지 않음)"""
     permission_classes = [permissions.AllowAny]
     def post(self, request):
         ser = RefreshSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         toss_user_key = ser.validated_data["tossUserKey"]
-        rec = TossOAuthToken.objects.filter(toss_user_key=toss_user_key).order_by("-updated_at").first()
-        if not rec:
+        try:
+            token = token_store.get_access_token(toss_user_key)
+        except token_store.NoRefreshToken:
             return Response({"error":"no_refresh_token"}, status=404)
+        except token_store.TokenRefreshBusy:
+            return Response({"error":"refresh_in_progress"}, status=503, headers={"Retry-After": "1"})
+        except Exception as e:
+            return Response({"error":"refresh_failed","detail":str(e)}, status=502)
+        return Response({"accessToken": token.token, "expiresIn": token.expires_in()}, status=200)
+
+
+# ---- ASGI 전용 async 버전 (config.urls_async 에서 연결) ----
+# Toss 응답을 기다리는 동안 스레드를 잡지 않는다. 요청/응답 형식은 위 DRF 뷰와 같다.
+# DRF APIView 는 async 핸들러를 지원하지 않아서 Django View + 같은 serializer 로 검증한다.
+
+def json_response(data, status_code: int = 200, headers=None) -> HttpResponse:
+    return HttpResponse(
+        JSONRenderer().render(data), status=status_code, content_type="application/json", headers=headers
+    )
+
+
+def _read_json(request):
+    """리턴: (data, 400 응답). 본문이 JSON 객체가 아니면 DRF 파서와 같은 모양의 400"""
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError as e:
+        return None, json_response({"detail": f"JSON parse error - {e}"}, status.HTTP_400_BAD_REQUEST)
+    if not isinstance(data, dict):
+        return None, json_response({"non_field_errors": ["Invalid data."]}, status.HTTP_400_BAD_REQUEST)
+    return data, None
 
-        client = TossMTLS()
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncTossLoginView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        data, bad = _read_json(request)
+        if bad is not None:
+            return bad
+        ser = TossLoginSerializer(data=data)
+        if not ser.is_valid():
+            return json_response(ser.errors, status.HTTP_400_BAD_REQUEST)
+
+        client = get_async_toss_client()
         try:
-            new_token = client.refresh_token(rec.refresh_token)
-            access_token = new_token.get("accessToken")
-            expires_in = new_token.get("expiresIn")
-            return Response({"accessToken": access_token, "expiresIn": expires_in}, status=200)
+            token_res = await client.generate_token(
+                ser.validated_data["authorizationCode"], ser.validated_data.get("referrer")
+            )
+            logger.warning(f"[toss-login] token_res = {token_res}")
+            tokens, error = _parse_token_res(token_res)
+            if error:
+                return json_response(error, status.HTTP_502_BAD_GATEWAY)
+
+            me = await client.get_login_me(tokens["access_token"])
+            logger.warning(f"[toss-login] login_me = {me}")
+            toss_user_key, error = _parse_login_me(me)
+            if error:
+                return json_response(error, status.HTTP_502_BAD_GATEWAY)
+
+            user = await sync_to_async(_save_login)(toss_user_key, tokens)
+            return json_response(_login_body(user, toss_user_key, tokens))
+
         except Exception as e:
-            return Response({"error":"refresh_failed","detail":str(e)}, status=502)
+            logger.exception("[toss-login] toss_login_failed")
+            return json_response({"error": "toss_login_failed", "detail": str(e)}, status.HTTP_502_BAD_GATEWAY)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncTossRefreshView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        data, bad = _read_json(request)
+        if bad is not None:
+            return bad
+        ser = RefreshSerializer(data=data)
+        if not ser.is_valid():
+            return json_response(ser.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            token = await token_store.aget_access_token(ser.validated_data["tossUserKey"])
+        except token_store.NoRefreshToken:
+            return json_response({"error": "no_refresh_token"}, 404)
+        except token_store.TokenRefreshBusy:
+            return json_response({"error": "refresh_in_progress"}, 503, {"Retry-After": "1"})
+        except Exception as e:
+            return json_response({"error": "refresh_failed", "detail": str(e)}, 502)
+        return json_response({"accessToken": token.token, "expiresIn": token.expires_in()})
+
 
 class MeView(APIView):
+    # id / tossUserKey 만 돌려주므로 토큰 클레임만으로 충분 (DB 조회 없음)
+    jwt_claims_only = True
+
     def get(self, request):
         user = request.user
         return Response({"id": user.id, "tossUserKey": user.toss_user_key}, status=200)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# 외부 API 를 기다리는 엔드포인트는 async 뷰로 (config/urls_async.py)
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'config.urls_async')
 
 application = get_asgi_application()
@@ -75,7 +75,8 @@ REST_FRAMEWORK = {
     ],
 }
 
-ROOT_URLCONF = 'config.urls'
+# ASGI 로 띄우면 config.asgi 가 config.urls_async 로 바꾼다 (analyze / Toss 로그인이 async 뷰)
+ROOT_URLCONF = os.getenv("DJANGO_ROOT_URLCONF", "config.urls")
 
 TEMPLATES = [
     {
@@ -114,6 +115,23 @@ DATABASES = {
 }
 
 
+# Cache
+# "entries": 유저별 응답 캐시 (entries.response_cache)
+# 무효화용 세대 값을 워커끼리 공유해야 하므로 공유 백엔드에서만 켠다 (예: django.core.cache.backends.redis.RedisCache)
+# 설정하지 않으면 DummyCache (캐시 안 함) - 워커별 locmem 이면 다른 워커의 수정이 TIMEOUT 동안 안 보인다
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "entries": {
+        "BACKEND": os.getenv("ENTRIES_CACHE_BACKEND") or "django.core.cache.backends.dummy.DummyCache",
+        "LOCATION": os.getenv("ENTRIES_CACHE_LOCATION", "entries"),
+        "TIMEOUT": int(os.getenv("ENTRIES_CACHE_TIMEOUT", "600")),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
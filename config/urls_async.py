@@ -0,0 +1,17 @@
+# config/urls_async.py
+# ASGI 서버(config.asgi)용 루트 urlconf.
+# 외부 API 를 기다리거나 응답을 스트리밍하는 엔드포인트만 async 뷰로 먼저 잡고, 나머지는 config.urls 그대로.
+from django.urls import path
+
+from accounts.views.auth_views import AsyncTossLoginView, AsyncTossRefreshView
+from entries.async_views import analyze_entry_async, export_entries_async
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/entries/<int:pk>/analyze/", analyze_entry_async),
+    # 스트리밍 응답은 async 이터레이터로 (동기 뷰로 가면 ASGI 가 전부 모은 뒤에 보낸다)
+    path("api/entries/export/", export_entries_async),
+    path("api/accounts/toss-login", AsyncTossLoginView.as_view()),
+    path("api/accounts/toss-refresh", AsyncTossRefreshView.as_view()),
+] + sync_urlpatterns
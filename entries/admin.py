@@ -1,9 +1,22 @@
 # entries/admin.py
 from django.contrib import admin
 from .models import Entry
+from .search import search_entry_ids
+
+# admin 검색 결과 상한 (관련도 상위 N개만)
+ADMIN_SEARCH_LIMIT = 1000
+
 
 @admin.register(Entry)
 class EntryAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "date", "title")
     list_filter = ("date",)
-    search_fields = ("title", "original_text")
+    # 실제 검색은 get_search_results 에서 전문 검색 인덱스로 (TEXT 컬럼 LIKE '%..%' 풀스캔 방지)
+    search_fields = ("title", "original_text", "corrected_text")
+    search_help_text = "제목 / 본문 / 교정된 영어 전문 검색"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        ids = [entry_id for entry_id, _ in search_entry_ids(search_term, limit=ADMIN_SEARCH_LIMIT)]
+        return queryset.filter(id__in=ids), False
@@ -0,0 +1,265 @@
+# entries/admission.py
+"""
+LLM 경로 입장 제어 (프로세스 단위 적응형 동시 실행 한도 + 짧은 대기열).
+
+OpenAI 지연이 튀면 analyze 요청이 워커 스레드를 전부 붙잡고 있게 되고,
+그러면 가벼운 CRUD 요청까지 같이 멈춘다. 그래서 LLM 호출은 한도 안에서만 돌리고
+넘치는 요청은 기다리게 하지 않고 바로 503 + Retry-After 로 돌려보낸다.
+
+- 한도: AIMD
+  - 성공 응답 지연(단기 EWMA)이 기준 지연(장기 EWMA) * LIMIT_TOLERANCE 이하이고
+    한도를 절반 이상 쓰고 있으면 +1/limit (한도만큼 끝날 때마다 대략 +1)
+  - 지연이 기준보다 크게 늘었거나 업스트림 과부하(429 / 5xx / 타임아웃 / 연결 실패)면 * LIMIT_BACKOFF
+    (한 번 줄인 뒤 단기 지연만큼은 다시 줄이지 않음 → 이미 나가 있던 요청들 때문에 연달아 깎이지 않게)
+- 대기열: 한도가 찼으면 최대 QUEUE_SIZE 개까지만 QUEUE_TIMEOUT 초 동안 기다림, 그 외엔 즉시 Overloaded
+- 상태는 limiter_states() 로 조회 (GET /api/ops/upstreams)
+"""
+from __future__ import annotations
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+LLM_LIMIT_INITIAL = int(os.getenv("LLM_LIMIT_INITIAL", "8"))
+LLM_LIMIT_MIN = int(os.getenv("LLM_LIMIT_MIN", "2"))
+LLM_LIMIT_MAX = int(os.getenv("LLM_LIMIT_MAX", "32"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "4"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "2"))  # 초
+LIMIT_TOLERANCE = float(os.getenv("LLM_LIMIT_TOLERANCE", "1.5"))
+LIMIT_BACKOFF = float(os.getenv("LLM_LIMIT_BACKOFF", "0.8"))
+
+_SHORT_ALPHA = 0.3  # 최근 지연 (몇 개 요청)
+_LONG_ALPHA = 0.02  # 기준 지연 (~50개 요청에 걸쳐 천천히 따라감)
+MAX_RETRY_AFTER = 30
+_POLL_MIN = 0.01  # aacquire 대기열 폴링 간격 (초)
+_POLL_MAX = 0.1
+
+
+class Overloaded(Exception):
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"limiter '{name}' is saturated (retry after {retry_after}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Slot:
+    """slot() 안에서 결과를 표시: 기본은 성공(지연 샘플로 사용)"""
+
+    SUCCESS = "success"
+    DROPPED = "dropped"  # 업스트림 과부하 → 한도 감소
+    IGNORED = "ignored"  # 지연과 무관한 결과 (브레이커 open, 요청 오류 등)
+
+    def __init__(self):
+        self.outcome = self.SUCCESS
+
+    def drop(self) -> None:
+        self.outcome = self.DROPPED
+
+    def ignore(self) -> None:
+        self.outcome = self.IGNORED
+
+
+def _failed_outcome(slot: Slot) -> str:
+    """블록이 예외로 끝났을 때: 업스트림 과부하로 표시된 것만 반영, 나머지는 무시"""
+    return Slot.DROPPED if slot.outcome == Slot.DROPPED else Slot.IGNORED
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: int = LLM_LIMIT_INITIAL,
+        min_limit: int = LLM_LIMIT_MIN,
+        max_limit: int = LLM_LIMIT_MAX,
+        queue_size: int = LLM_QUEUE_SIZE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._initial = initial
+        self._cond = threading.Condition()
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._waiting = 0
+        self._short_rtt: Optional[float] = None
+        self._long_rtt: Optional[float] = None
+        self._last_decrease = 0.0
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "decreased": 0}
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def _retry_after(self) -> int:
+        # 지금 나가 있는 요청 하나가 끝날 때쯤 (최근 지연 기준)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(self._short_rtt or 1)))
+
+    def _reject(self) -> Overloaded:
+        self._counters["rejected"] += 1
+        return Overloaded(self.name, self._retry_after())
+
+    def try_acquire(self) -> bool:
+        """기다리지 않고 바로 들어가면 True, 대기열에 서야 하면 False, 대기열도 꽉 찼으면 Overloaded"""
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                self._counters["admitted"] += 1
+                return True
+            if self._waiting >= self.queue_size:
+                raise self._reject()
+            return False
+
+    def acquire(self) -> None:
+        if self.try_acquire():
+            return
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            if self._waiting >= self.queue_size:
+                raise self._reject()
+
+            self._waiting += 1
+            self._counters["queued"] += 1
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject()
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                self._counters["admitted"] += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self, outcome: str = Slot.IGNORED, latency: Optional[float] = None) -> None:
+        with self._cond:
+            in_use = self._in_flight
+            self._in_flight -= 1
+            if outcome == Slot.DROPPED:
+                self._decrease()
+            elif outcome == Slot.SUCCESS and latency is not None:
+                self._on_sample(latency, in_use)
+            self._cond.notify_all()
+
+    def _on_sample(self, rtt: float, in_use: int) -> None:
+        self._short_rtt = rtt if self._short_rtt is None else (1 - _SHORT_ALPHA) * self._short_rtt + _SHORT_ALPHA * rtt
+        self._long_rtt = rtt if self._long_rtt is None else (1 - _LONG_ALPHA) * self._long_rtt + _LONG_ALPHA * rtt
+
+        if self._short_rtt > self._long_rtt * LIMIT_TOLERANCE:
+            self._decrease()
+        elif in_use * 2 >= self._limit:
+            # 한가할 때는 늘리지 않는다 (실제로 써 보지 않은 한도까지 부풀지 않게)
+            self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self._short_rtt or 0):
+            return
+        self._limit = max(float(self.min_limit), self._limit * LIMIT_BACKOFF)
+        self._last_decrease = now
+        self._counters["decreased"] += 1
+        logger.info("[limiter:%s] limit -> %s", self.name, self.limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[Slot]:
+        """
+        with limiter.slot() as slot: ...  (한도가 차 있으면 Overloaded)
+        블록 안에서 예외가 나면 지연 샘플로 쓰지 않는다 (slot.drop() 을 해뒀으면 한도는 줄인다).
+        """
+        self.acquire()
+        slot = Slot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except BaseException:
+            self.release(_failed_outcome(slot))
+            raise
+        self.release(slot.outcome, time.monotonic() - started)
+
+    async def aacquire(self) -> None:
+        """
+        acquire() 의 async 버전. 대기는 asyncio.sleep 폴링으로 한다.
+        (스레드에서 acquire() 를 기다리면 그 사이 요청이 취소돼도 스레드가 자리를 잡아 버려 새는 자리가 생긴다.
+         여기서는 자리를 잡는 순간과 리턴 사이에 await 가 없어서 취소돼도 새지 않는다)
+        """
+        if self.try_acquire():
+            return
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            if self._waiting >= self.queue_size:
+                raise self._reject()
+            self._waiting += 1
+            self._counters["queued"] += 1
+        try:
+            delay = _POLL_MIN
+            while True:
+                with self._cond:
+                    if self._in_flight < self.limit:
+                        self._in_flight += 1
+                        self._counters["admitted"] += 1
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject()
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, _POLL_MAX)
+        finally:
+            with self._cond:
+                self._waiting -= 1
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[Slot]:
+        """slot() 의 async 버전 (이벤트 루프를 막지 않고 기다림)"""
+        await self.aacquire()
+        slot = Slot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except BaseException:
+            self.release(_failed_outcome(slot))
+            raise
+        self.release(slot.outcome, time.monotonic() - started)
+
+    def reset(self) -> None:
+        with self._cond:
+            self._limit = float(self._initial)
+            self._short_rtt = self._long_rtt = None
+            self._last_decrease = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "latency_recent": round(self._short_rtt, 3) if self._short_rtt is not None else None,
+                "latency_baseline": round(self._long_rtt, 3) if self._long_rtt is not None else None,
+                **self._counters,
+            }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, **kwargs) -> AdaptiveLimiter:
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(name, **kwargs)
+        return _limiters[name]
+
+
+def limiter_states() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {l.name: l.snapshot() for l in limiters}
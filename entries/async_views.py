@@ -0,0 +1,154 @@
+# entries/async_views.py
+"""
+ASGI 전용 async 뷰 (config.urls_async 에서 동기 뷰 대신 연결된다).
+
+OpenAI 응답을 기다리는 동안 스레드를 잡고 있지 않으므로,
+ASGI 워커 하나가 느린 분석 요청 수백 개를 동시에 들고 있을 수 있다.
+DRF APIView 는 async 핸들러를 지원하지 않아서 Django View 로 만들고,
+인증 / 응답 모양 / 상태 코드만 기존 DRF 뷰와 맞춘다. DB 접근은 async ORM 이나 sync_to_async 로.
+
+스트리밍 응답(analyze?stream=1 SSE, export NDJSON)도 여기서 async 이터레이터로 만든다.
+ASGI 에서 StreamingHttpResponse 에 동기 이터레이터를 주면 Django 가 sync_to_async(list) 로
+전부 모은 뒤에야 보내기 때문이다 (SSE 가 분석이 끝난 뒤 한꺼번에 오고, export 는 통째로 메모리에 올라감).
+"""
+from __future__ import annotations
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from accounts.security.authentication import AppJWTAuthentication
+from .cache import get_cached_analysis, make_cache_key, store_analysis
+from .models import Entry
+from .ndjson import aexport_lines, export_response
+from .services import astream_analysis_with_openai, save_analysis
+from .singleflight import aanalyze_entry, abegin, busy_response, finish, flight_key
+from .sse import event_stream_response, sse_event
+from .views import EntryViewSet, _get_dev_user, section_events
+
+import logging
+logger = logging.getLogger(__name__)
+
+# ?async=1 은 기존 동기 액션으로 넘긴다 (작업 적재는 async 로 얻는 게 없음)
+_sync_analyze = EntryViewSet.as_view({"post": "analyze"})
+
+
+def json_response(data, status: int = 200, headers: Optional[dict] = None) -> HttpResponse:
+    """DRF JSONRenderer 와 같은 바이트로 (클라이언트 입장에선 동기 뷰와 구분되지 않게)"""
+    response = HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def from_drf_response(resp: Response) -> HttpResponse:
+    """services 가 돌려준 에러 Response (429/502/503 + Retry-After) → HttpResponse"""
+    return json_response(resp.data, resp.status_code, {k: v for k, v in resp.items() if k != "Content-Type"})
+
+
+async def _authenticate(request):
+    """
+    EntryViewSet 과 같은 규칙: DEBUG 면 dev 유저, 아니면 AppJWTAuthentication.
+    리턴: (user, None) 또는 (None, 403 응답) - DRF 와 마찬가지로 인증 실패도 403
+    """
+    if settings.DEBUG:
+        return await sync_to_async(_get_dev_user)(), None
+    try:
+        result = await sync_to_async(AppJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return None, json_response({"detail": e.detail}, 403)
+    if not result:
+        return None, json_response({"detail": NotAuthenticated.default_detail}, 403)
+    return result[0], None
+
+
+@csrf_exempt
+@require_POST
+async def analyze_entry_async(request, pk):
+    """POST /api/entries/<pk>/analyze/ 의 async 버전 (응답은 EntryViewSet.analyze 와 같다)"""
+    if request.GET.get("async") in ("1", "true"):
+        return await sync_to_async(_sync_analyze)(request, pk=pk)
+
+    user, denied = await _authenticate(request)
+    if denied is not None:
+        return denied
+
+    entry = await Entry.objects.filter(pk=pk, user=user).afirst()
+    if entry is None:
+        return json_response({"detail": NotFound.default_detail}, 404)
+
+    fresh = request.GET.get("fresh") in ("1", "true")
+    if request.GET.get("stream") in ("1", "true"):
+        return event_stream_response(_analysis_event_stream(entry, fresh))
+
+    data, cached = await aanalyze_entry(entry, fresh=fresh)
+    if isinstance(data, Response):
+        return from_drf_response(data)
+    return json_response({"status": "ok", "analysis": data, "cached": cached})
+
+
+async def _analysis_event_stream(entry, fresh):
+    """EntryViewSet._analysis_event_stream 의 async 버전 (이벤트 순서 / 저장 / 캐시 동작은 같다)"""
+    kwargs = dict(
+        original_lang=entry.original_lang,
+        original_text=entry.original_text,
+        title=entry.title,
+        meta=entry.meta or {},
+    )
+    key = make_cache_key(**kwargs)
+
+    data = None if fresh else await sync_to_async(get_cached_analysis)(key)
+    if data is not None:
+        for event in section_events(data):
+            yield event
+        await sync_to_async(save_analysis)(entry, data)
+        yield sse_event("done", {"analysis": data, "cached": True})
+        return
+
+    flight, shared = await abegin(flight_key(entry))
+    if flight is None:
+        if shared is None:
+            yield sse_event("error", {**busy_response().data, "status": 503})
+            return
+        data = shared["analysis"]
+        for event in section_events(data):
+            yield event
+        yield sse_event("done", {"analysis": data, "cached": True})
+        return
+
+    result = None
+    try:
+        async for kind, key_or_status, value in astream_analysis_with_openai(**kwargs):
+            if kind == "section":
+                yield sse_event(key_or_status, value)
+            elif kind == "error":
+                yield sse_event("error", {**value, "status": key_or_status})
+                return
+            else:
+                data = value
+
+        await sync_to_async(save_analysis)(entry, data)
+        result = {"analysis": data}
+    finally:
+        # 클라이언트가 중간에 끊어도 (aclose / 취소) 리스는 풀린다
+        await sync_to_async(finish)(flight, result)
+    try:
+        await sync_to_async(store_analysis)(key, data)
+    except Exception:
+        logger.warning("[Entry.analyze] cache store failed (stream)", exc_info=True)
+    yield sse_event("done", {"analysis": data, "cached": False})
+
+
+@require_GET
+async def export_entries_async(request):
+    """GET /api/entries/export/ 의 async 버전 (NDJSON 을 async ORM 으로 페이지씩 읽어 흘려보낸다)"""
+    user, denied = await _authenticate(request)
+    if denied is not None:
+        return denied
+    return export_response(aexport_lines(user))
@@ -0,0 +1,260 @@
+# entries/batch.py
+"""
+OpenAI Batch API 파이프라인 (야간 / 비긴급 분석용, 토큰 비용 절반)
+
+1) build_batch_lines: Entry → JSONL 요청 라인 (system_prompt / build_prompt 그대로)
+2) submit_batch / wait_for_batch: 업로드 + 배치 생성 + 폴링
+3) apply_batch_output: 결과 파일을 한 줄씩 스트리밍 → _parse_json → bulk_update
+   (custom_id 에 제출 시점의 content_hash 를 실어 보내고, 그 사이 수정된 일기는 반영하지 않는다)
+
+OpenAI 와 직접 통신하는 부분은 BatchClient 하나로 모아두었다.
+테스트/로컬에서는 LocalBatchClient 로 바꿔 끼우면 네트워크 없이 전 과정이 돈다.
+"""
+from __future__ import annotations
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from .chunking import estimate_tokens, output_budget
+from .models import Entry
+from .services import (
+    OPENAI_MODEL,
+    PROMPT_VERSION,
+    _parse_json,
+    build_prompt,
+    bulk_save_analyses,
+    client as openai_client,
+    system_prompt,
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "entry-"
+
+# 배치가 더 이상 진행되지 않는 상태들
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_request_line(entry: Entry) -> Dict:
+    prompt = build_prompt(
+        original_lang=entry.original_lang,
+        original_text=entry.original_text,
+        title=entry.title,
+        meta=entry.meta or {},
+    )
+    return {
+        "custom_id": f"{CUSTOM_ID_PREFIX}{entry.id}-{entry.content_hash}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt(entry.original_lang)},
+                {"role": "user", "content": prompt},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.2,
+            "max_completion_tokens": output_budget(estimate_tokens(prompt)),
+        },
+    }
+
+
+def build_batch_lines(entries: Iterable[Entry]) -> Iterator[str]:
+    for entry in entries:
+        yield json.dumps(build_request_line(entry), ensure_ascii=False)
+
+
+def write_batch_file(entries: Iterable[Entry], path: Path) -> int:
+    """JSONL 파일 작성. 쓴 줄 수 반환"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for line in build_batch_lines(entries):
+            f.write(line + "\n")
+            count += 1
+    return count
+
+
+class BatchClient(ABC):
+    """Batch API 와의 경계. 필요한 연산만 정의한다."""
+
+    @abstractmethod
+    def upload(self, path: Path) -> str:
+        ...
+
+    @abstractmethod
+    def create(self, input_file_id: str) -> str:
+        ...
+
+    @abstractmethod
+    def retrieve(self, batch_id: str) -> Dict:
+        """{"status": ..., "output_file_id": ..., "error_file_id": ...}"""
+
+    @abstractmethod
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        ...
+
+
+class OpenAIBatchClient(BatchClient):
+    def __init__(self, client=None):
+        # 배치 업로드/조회는 분석 요청과 달리 브레이커 밖이므로 SDK 기본 재시도를 그대로 쓴다
+        self.client = client or openai_client.with_options(max_retries=2)
+
+    def upload(self, path: Path) -> str:
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, input_file_id: str) -> str:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"prompt_version": PROMPT_VERSION},
+        )
+        return batch.id
+
+    def retrieve(self, batch_id: str) -> Dict:
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        # 결과 파일을 통째로 메모리에 올리지 않고 줄 단위로 읽는다
+        with self.client.files.with_streaming_response.content(file_id) as resp:
+            for line in resp.iter_lines():
+                if line:
+                    yield line
+
+
+class LocalBatchClient(BatchClient):
+    """
+    Batch API 로컬 대역.
+    responder(body) -> 모델 응답 문자열 을 받아서 create 시점에 전부 동기로 처리한다.
+    """
+
+    def __init__(self, responder: Callable[[Dict], str]):
+        self.responder = responder
+        self.files: Dict[str, list] = {}
+        self.batches: Dict[str, Dict] = {}
+
+    def upload(self, path: Path) -> str:
+        file_id = f"file-{len(self.files) + 1}"
+        with open(path, encoding="utf-8") as f:
+            self.files[file_id] = [line.rstrip("\n") for line in f if line.strip()]
+        return file_id
+
+    def create(self, input_file_id: str) -> str:
+        batch_id = f"batch-{len(self.batches) + 1}"
+        output = []
+        for line in self.files[input_file_id]:
+            req = json.loads(line)
+            output.append(json.dumps({
+                "custom_id": req["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": self.responder(req["body"])}}]},
+                },
+                "error": None,
+            }, ensure_ascii=False))
+        output_file_id = f"file-{len(self.files) + 1}"
+        self.files[output_file_id] = output
+        self.batches[batch_id] = {
+            "status": "completed",
+            "output_file_id": output_file_id,
+            "error_file_id": None,
+        }
+        return batch_id
+
+    def retrieve(self, batch_id: str) -> Dict:
+        return dict(self.batches[batch_id])
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        return iter(self.files[file_id])
+
+
+def submit_batch(batch_client: BatchClient, entries: Iterable[Entry], workdir: Path) -> Optional[str]:
+    """JSONL 작성 → 업로드 → 배치 생성. 대상이 없으면 None"""
+    workdir.mkdir(parents=True, exist_ok=True)
+    path = workdir / f"analysis-batch-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+    count = write_batch_file(entries, path)
+    if not count:
+        path.unlink(missing_ok=True)
+        return None
+
+    file_id = batch_client.upload(path)
+    batch_id = batch_client.create(file_id)
+    logger.info("[analysis-batch] submitted %s (%s requests, file=%s)", batch_id, count, file_id)
+    return batch_id
+
+
+def wait_for_batch(
+    batch_client: BatchClient,
+    batch_id: str,
+    *,
+    poll_interval: float = 60.0,
+    timeout: float = 24 * 60 * 60,
+) -> Dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        info = batch_client.retrieve(batch_id)
+        if info["status"] in TERMINAL_STATUSES:
+            return info
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"batch {batch_id} still {info['status']}")
+        time.sleep(poll_interval)
+
+
+def _parse_custom_id(custom_id: str) -> tuple[Optional[int], Optional[str]]:
+    """"entry-<id>-<content_hash>" → (id, content_hash). 해시가 없는 예전 형식은 (id, None)"""
+    if not custom_id or not custom_id.startswith(CUSTOM_ID_PREFIX):
+        return None, None
+    raw_id, sep, content_hash = custom_id[len(CUSTOM_ID_PREFIX):].partition("-")
+    try:
+        return int(raw_id), (content_hash if sep else None)
+    except ValueError:
+        return None, None
+
+
+def iter_batch_results(batch_client: BatchClient, file_id: str) -> Iterator[tuple[int, Optional[str], Dict]]:
+    """결과 파일 → (entry_id, 제출 시점 content_hash, _parse_json 결과). 실패한 줄은 로그만 남기고 건너뜀"""
+    for line in batch_client.iter_lines(file_id):
+        row = json.loads(line)
+        entry_id, content_hash = _parse_custom_id(row.get("custom_id", ""))
+        response = row.get("response") or {}
+        if entry_id is None or row.get("error") or response.get("status_code") != 200:
+            logger.warning("[analysis-batch] skipped %s: %s", row.get("custom_id"), row.get("error"))
+            continue
+        choices = (response.get("body") or {}).get("choices") or [{}]
+        text = (choices[0].get("message") or {}).get("content") or ""
+        yield entry_id, content_hash, _parse_json(text)
+
+
+def apply_batch_output(batch_client: BatchClient, file_id: str, *, batch_size: int = 200) -> int:
+    """
+    결과를 batch_size 단위로 Entry.analysis 에 bulk_update. 갱신한 행 수 반환
+    제출한 뒤 본문이 바뀐 일기(content_hash 불일치)는 예전 본문의 분석이므로 건너뛴다.
+    """
+    results = iter_batch_results(batch_client, file_id)
+    total = 0
+    while True:
+        chunk = {entry_id: (content_hash, data) for entry_id, content_hash, data in islice(results, batch_size)}
+        if not chunk:
+            return total
+
+        entries = Entry.objects.only("id", "user", "date", "content_hash").in_bulk(list(chunk))
+        pairs = []
+        for entry_id, entry in entries.items():
+            content_hash, data = chunk[entry_id]
+            if content_hash is not None and content_hash != entry.content_hash:
+                logger.info("[analysis-batch] skipped entry %s: edited after submit", entry_id)
+                continue
+            pairs.append((entry, data))
+        total += bulk_save_analyses(pairs)
@@ -0,0 +1,295 @@
+# entries/cache.py
+"""
+analyze_with_openai 결과 캐시 (2단 구조)
+
+1차: 프로세스 내 LRU (OrderedDict, 크기 제한 + TTL)
+2차: DB 테이블 (AnalysisCache, 워커 간 공유 / 재시작 후에도 유지)
+
+키는 (모델, 프롬프트 버전, 언어, 정규화된 본문, 제목, 메타) 의 sha256.
+→ 내용이 그대로인 일기를 다시 분석하면 OpenAI 호출 없이 바로 돌려준다.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from rest_framework.response import Response
+
+from .models import AnalysisCache
+from .services import OPENAI_MODEL, PROMPT_VERSION, aanalyze_with_openai, analyze_with_openai
+
+import logging
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(60 * 60 * 24 * 30)))  # 초, 기본 30일
+ANALYSIS_CACHE_LRU_SIZE = int(os.getenv("ANALYSIS_CACHE_LRU_SIZE", "512"))
+
+_WS_RE = re.compile(r"[ \t\u00a0\u3000]+")
+
+
+def normalize_text(text: str | None) -> str:
+    """
+    캐시 키용 본문 정규화.
+    - 유니코드 NFC (한글 자모 조합형/완성형 차이 제거)
+    - 줄바꿈 통일, 줄 끝 공백 제거, 연속 공백 1개로
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_WS_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return "\n".join(lines).strip()
+
+
+def make_cache_key(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None,
+) -> str:
+    payload = json.dumps(
+        [
+            OPENAI_MODEL,
+            PROMPT_VERSION,
+            original_lang,
+            normalize_text(original_text),
+            (title or "").strip(),
+            meta or {},
+        ],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(data: Any) -> bool:
+    """정상 파싱된 분석 결과만 캐시한다 (에러 Response, {"raw": ...} 제외)"""
+    return isinstance(data, dict) and "raw" not in data
+
+
+class _LRU:
+    """스레드 안전한 크기 제한 LRU + TTL"""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (monotonic() + (ttl if ttl is not None else self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_lru = _LRU(ANALYSIS_CACHE_LRU_SIZE, ANALYSIS_CACHE_TTL)
+
+_stats_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "bypass": 0}
+
+
+def _incr(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> Dict[str, Any]:
+    """프로세스 단위 hit/miss 카운터 (모니터링/로그용)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = (
+        round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    stats["lru_size"] = len(_lru)
+    return stats
+
+
+def get_cached_analysis(key: str) -> Optional[Dict[str, Any]]:
+    """LRU → DB 순서로 조회. 둘 다 없으면 None"""
+    data = _lru.get(key)
+    if data is not None:
+        _incr("memory_hits")
+        return data
+
+    row = AnalysisCache.objects.filter(key=key).only("result", "expires_at").first()
+    if row is None:
+        _incr("misses")
+        return None
+
+    now = datetime.now()
+    if row.expires_at <= now:
+        AnalysisCache.objects.filter(key=key).delete()
+        _incr("misses")
+        return None
+
+    AnalysisCache.objects.filter(key=key).update(hits=F("hits") + 1)
+    # DB 에 남은 TTL 만큼만 메모리에 올린다
+    _lru.set(key, row.result, ttl=(row.expires_at - now).total_seconds())
+    _incr("db_hits")
+    return row.result
+
+
+def store_analysis(key: str, data: Dict[str, Any]) -> None:
+    if not is_cacheable(data):
+        return
+
+    _lru.set(key, data)
+    AnalysisCache.objects.update_or_create(
+        key=key,
+        defaults={
+            "model": OPENAI_MODEL,
+            "prompt_version": PROMPT_VERSION,
+            "result": data,
+            "expires_at": datetime.now() + timedelta(seconds=ANALYSIS_CACHE_TTL),
+        },
+    )
+    _incr("stores")
+
+
+def invalidate(key: str) -> None:
+    _lru.pop(key)
+    AnalysisCache.objects.filter(key=key).delete()
+
+
+def purge_expired(batch_size: int = 1000) -> int:
+    """만료된 DB 캐시 행을 batch 단위로 삭제. 삭제한 행 수 반환"""
+    total = 0
+    now = datetime.now()
+    while True:
+        keys = list(
+            AnalysisCache.objects.filter(expires_at__lte=now)
+            .values_list("key", flat=True)[:batch_size]
+        )
+        if not keys:
+            return total
+        deleted, _ = AnalysisCache.objects.filter(key__in=keys).delete()
+        total += deleted
+
+
+def analyze_cached(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None,
+    fresh: bool = False,
+):
+    """
+    캐시를 거치는 analyze_with_openai.
+    fresh=True 면 캐시 조회를 건너뛰고 새로 분석한 뒤 캐시를 갱신한다.
+    (단, 업스트림 에러/브레이커 open 이면 캐시에 남아 있는 결과로 대신한다)
+
+    리턴: (data, cached)
+      data   - analyze_with_openai 와 동일 (dict 또는 에러 Response)
+      cached - 캐시에서 나온 결과인지 여부
+    """
+    key = make_cache_key(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+
+    if fresh:
+        _incr("bypass")
+    else:
+        data = get_cached_analysis(key)
+        if data is not None:
+            return data, True
+
+    data = analyze_with_openai(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+    if fresh and isinstance(data, Response):
+        # 재분석 요청인데 업스트림이 실패/차단(브레이커) 상태 → 예전 결과가 있으면 그걸로 대신
+        fallback = get_cached_analysis(key)
+        if fallback is not None:
+            logger.info("[analysis-cache] upstream %s, serving cached result key=%s", data.status_code, key)
+            return fallback, True
+    try:
+        store_analysis(key, data)
+    except Exception:
+        # 캐시 저장 실패는 분석 결과 자체에 영향을 주면 안 된다
+        logger.warning("[analysis-cache] store failed key=%s", key, exc_info=True)
+    return data, False
+
+
+async def aanalyze_cached(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None,
+    fresh: bool = False,
+):
+    """analyze_cached 의 async 버전. 캐시 조회/저장(DB)만 sync_to_async, OpenAI 호출은 await"""
+    key = make_cache_key(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+
+    if fresh:
+        _incr("bypass")
+    else:
+        data = await sync_to_async(get_cached_analysis)(key)
+        if data is not None:
+            return data, True
+
+    data = await aanalyze_with_openai(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+    if fresh and isinstance(data, Response):
+        fallback = await sync_to_async(get_cached_analysis)(key)
+        if fallback is not None:
+            logger.info("[analysis-cache] upstream %s, serving cached result key=%s", data.status_code, key)
+            return fallback, True
+    try:
+        await sync_to_async(store_analysis)(key, data)
+    except Exception:
+        logger.warning("[analysis-cache] store failed key=%s", key, exc_info=True)
+    return data, False
@@ -0,0 +1,135 @@
+# entries/chunking.py
+"""
+긴 일기 처리용 유틸.
+
+- estimate_tokens: 토크나이저 없이 대략적인 입력 토큰 수 (한글/CJK 는 글자당 ~1토큰, 그 외 ~4글자당 1토큰)
+- output_budget: 입력 길이에 비례한 max_output_tokens
+  (번역 + 교정문이 각각 원문 길이만큼 나오고, 설명/단어/점수는 거의 고정 크기)
+- split_text: 문단 → 문장 경계로 잘라서 chunk_tokens 이하 조각들로 묶기
+- merge_analyses: 조각별 분석 결과를 다시 하나의
+  translation / corrections / vocab_suggestions / score 형태로 합치기
+"""
+from __future__ import annotations
+import os
+import re
+from typing import Any, Dict, List
+
+OPENAI_MIN_OUTPUT_TOKENS = int(os.getenv("OPENAI_MIN_OUTPUT_TOKENS", "600"))
+OPENAI_MAX_OUTPUT_TOKENS = int(os.getenv("OPENAI_MAX_OUTPUT_TOKENS", "4000"))
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "900"))  # 이보다 길면 나눠서 분석
+ANALYSIS_CHUNK_CONCURRENCY = int(os.getenv("ANALYSIS_CHUNK_CONCURRENCY", "4"))
+
+# 번역 + 교정문 (원문 길이의 ~2배) 외에 고정적으로 나오는 부분 (설명 / 단어 3~5개 / 점수 코멘트)
+_FIXED_OUTPUT_TOKENS = 450
+_OUTPUT_PER_INPUT_TOKEN = 2.3
+
+MAX_VOCAB_SUGGESTIONS = 8
+
+_WIDE_RE = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u9fff\uac00-\ud7af]")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+# 문장 끝: . ! ? … 。 (따옴표/괄호 닫힘 포함) 뒤 공백
+_SENTENCE_RE = re.compile(r"(?<=[.!?…。])[\"'”’)\]]*\s+")
+
+
+def estimate_tokens(text: str | None) -> int:
+    text = text or ""
+    wide = len(_WIDE_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def output_budget(input_tokens: int) -> int:
+    budget = _FIXED_OUTPUT_TOKENS + int(input_tokens * _OUTPUT_PER_INPUT_TOKEN)
+    return max(OPENAI_MIN_OUTPUT_TOKENS, min(budget, OPENAI_MAX_OUTPUT_TOKENS))
+
+
+def _pieces(text: str, chunk_tokens: int) -> List[str]:
+    """문단 단위, 문단이 너무 길면 문장 단위, 문장도 너무 길면 그대로 (강제로 자르지 않음)"""
+    pieces = []
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= chunk_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(s.strip() for s in _SENTENCE_RE.split(paragraph) if s.strip())
+    return pieces
+
+
+def split_text(text: str, chunk_tokens: int = ANALYSIS_CHUNK_TOKENS) -> List[str]:
+    """
+    chunk_tokens 이하로 묶은 조각 목록 (짧으면 [text] 그대로).
+    한 조각 안의 문단/문장은 빈 줄("\\n\\n")로 다시 잇는다.
+    """
+    if estimate_tokens(text) <= chunk_tokens:
+        return [text]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in _pieces(text, chunk_tokens):
+        n = estimate_tokens(piece)
+        if current and size + n > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += n
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def merge_analyses(parts: List[Dict[str, Any]], weights: List[int]) -> Dict[str, Any]:
+    """
+    parts: 원문 순서대로의 조각별 분석 결과 (_parse_json 결과 → 섹션 형식은 보장됨)
+    weights: 조각별 입력 토큰 수 (점수 가중 평균용)
+    """
+    translation_to = next((p["translation"].get("to") for p in parts if p["translation"].get("to")), None)
+    merged: Dict[str, Any] = {
+        "translation": {
+            "to": translation_to,
+            "text": "\n\n".join(p["translation"].get("text", "") for p in parts if p["translation"].get("text")),
+        },
+        "corrections": {
+            "corrected": "\n\n".join(
+                p["corrections"].get("corrected", "") for p in parts if p["corrections"].get("corrected")
+            ),
+            "explanations": [
+                e for p in parts if isinstance(p["corrections"].get("explanations"), list)
+                for e in p["corrections"]["explanations"]
+            ],
+        },
+        "vocab_suggestions": [],
+        "score": {},
+    }
+
+    seen = set()
+    for p in parts:
+        for item in p["vocab_suggestions"]:
+            if not isinstance(item, dict):
+                continue
+            word = str(item.get("word", "")).strip().lower()
+            if word and word not in seen and len(merged["vocab_suggestions"]) < MAX_VOCAB_SUGGESTIONS:
+                seen.add(word)
+                merged["vocab_suggestions"].append(item)
+
+    scored = [
+        (p["score"], w) for p, w in zip(parts, weights)
+        if isinstance(p["score"].get("value"), (int, float))
+    ]
+    if scored:
+        total = sum(w for _, w in scored) or 1
+        # 코멘트는 가장 긴 조각, 다음에 신경 쓸 점은 점수가 가장 낮은 조각 기준
+        longest = max(scored, key=lambda s: s[1])[0]
+        weakest = min(scored, key=lambda s: s[0]["value"])[0]
+        merged["score"] = {
+            "value": round(sum(s["value"] * w for s, w in scored) / total),
+            "comment_ko": longest.get("comment_ko", ""),
+            "focus_next_time": weakest.get("focus_next_time", ""),
+        }
+
+    # 하나라도 파싱에 실패했으면 raw 를 남긴다 (→ 캐시되지 않음, 디버깅 가능)
+    raws = [p["raw"] for p in parts if "raw" in p]
+    if raws:
+        merged["raw"] = "\n---\n".join(raws)
+    return merged
@@ -0,0 +1,59 @@
+# entries/conditional.py
+"""
+조건부 GET (ETag / Last-Modified → 304) 헬퍼.
+
+검증자(validator)는 행을 읽어 직렬화하지 않고
+updated_at 하나 또는 max(updated_at) / count 집계만으로 만든다.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+
+
+def entry_etag(entry_id: int, updated_at: datetime) -> str:
+    return f'W/"e{entry_id}-{updated_at.timestamp():.6f}"'
+
+
+def fingerprint_etag(prefix: str, count: int, last_updated: Optional[datetime]) -> str:
+    ts = f"{last_updated.timestamp():.6f}" if last_updated else "0"
+    return f'W/"{prefix}-{count}-{ts}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    """
+    If-None-Match 의 ETag 목록(쉼표 구분) 중 하나와 약한 비교(W/ 무시)로 정확히 같으면 True.
+    "*" 는 항상 일치. Last-Modified 없이 ETag 만 쓰는 응답용
+    """
+    header = getattr(request, "_request", request).headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if tags == ["*"]:
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == target for tag in tags)
+
+
+def not_modified(request, etag: str, last_modified: Optional[datetime]):
+    """
+    If-None-Match / If-Modified-Since 가 맞으면 304 응답, 아니면 None.
+    (request 는 DRF Request 든 Django HttpRequest 든 상관없음)
+    """
+    django_request = getattr(request, "_request", request)
+    ts = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(django_request, etag=etag, last_modified=ts)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag: str, last_modified: Optional[datetime]):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # 유저별 데이터 → 공유 캐시 금지, 매번 재검증
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,164 @@
+# entries/fake_openai.py
+"""
+로컬 가짜 OpenAI 서버 (테스트 / 장애 재현 / 벤치마크용).
+
+    with FakeOpenAIServer(latency=0.2, faults=[{"status": 429, "headers": {"retry-after-ms": "50"}}]) as server:
+        client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+
+- /v1/responses, /v1/chat/completions 에 고정된 분석 JSON 으로 응답
+  ("stream": true 면 섹션 단위 delta 를 SSE 로. stream_gate 를 주면 첫 섹션을 보낸 뒤 set 될 때까지 멈춘다)
+- latency: 모든 요청에 넣는 지연 (초)
+- faults: 요청 순서대로 하나씩 꺼내 쓰는 장애 스크립트 {"status", "headers", "delay"}
+- error_rate: 스크립트가 비었을 때 무작위로 500 을 낼 확률
+"""
+from __future__ import annotations
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_ANALYSIS = {
+    "translation": {"to": "ko", "text": "오늘은 공원에 갔다."},
+    "corrections": {"corrected": "I went to the park today.", "explanations": []},
+    "vocab_suggestions": [{"word": "stroll", "meaning_ko": "산책하다", "example_en": "I strolled around."}],
+    "score": {"value": 80, "comment_ko": "좋아요", "focus_next_time": "시제"},
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # 기본 listen backlog(5)면 동시 연결이 몰릴 때 SYN 이 버려져 1초씩 늦어진다
+
+
+class FakeOpenAIServer:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        faults: Optional[List[Dict[str, Any]]] = None,
+        error_rate: float = 0.0,
+        analysis: Optional[Dict[str, Any]] = None,
+        stream_gate: Optional[threading.Event] = None,
+    ):
+        self.latency = latency
+        self.faults = list(faults or [])
+        self.error_rate = error_rate
+        self.analysis = analysis or DEFAULT_ANALYSIS
+        self.stream_gate = stream_gate
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                status, headers, body = server._respond(self.path)
+                if status == 200 and request.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for i, event in enumerate(server._stream_events(self.path, body)):
+                        if i == 1 and server.stream_gate is not None:
+                            server.stream_gate.wait(10)
+                        self.wfile.write(event)
+                    return
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._httpd = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, path: str):
+        with self._lock:
+            self.requests += 1
+            fault = self.faults.pop(0) if self.faults else None
+
+        time.sleep((fault or {}).get("delay", self.latency))
+        if fault is None and self.error_rate and random.random() < self.error_rate:
+            fault = {"status": 500}
+        if fault and fault.get("status", 200) != 200:
+            return fault["status"], fault.get("headers", {}), {
+                "error": {"message": "injected fault", "type": "server_error", "code": None}
+            }
+
+        text = json.dumps(self.analysis, ensure_ascii=False)
+        usage = {"input_tokens": 1200, "input_tokens_details": {"cached_tokens": 1024},
+                 "output_tokens": 300, "output_tokens_details": {"reasoning_tokens": 0}, "total_tokens": 1500}
+        if path.endswith("/chat/completions"):
+            return 200, {}, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500,
+                          "prompt_tokens_details": {"cached_tokens": 1024}},
+            }
+        return 200, {}, {
+            "id": "resp-fake", "object": "response", "created_at": int(time.time()), "model": "fake",
+            "status": "completed", "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+            "output": [{
+                "type": "message", "id": "msg-fake", "status": "completed", "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "usage": usage,
+        }
+
+    def _stream_events(self, path: str, body: Dict[str, Any]):
+        """완성된 응답 body → SSE 이벤트 바이트 목록 (섹션 하나가 delta 하나)"""
+        sections = list(self.analysis.items())
+        deltas = [
+            ("{" if i == 0 else " ") + f"{json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}"
+            + ("," if i < len(sections) - 1 else "}")
+            for i, (key, value) in enumerate(sections)
+        ]
+        if path.endswith("/chat/completions"):
+            base = {"id": body["id"], "object": "chat.completion.chunk", "created": body["created"], "model": "fake"}
+            chunks = [
+                {**base, "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+                for delta in deltas
+            ]
+            chunks.append({**base, "choices": [], "usage": body["usage"]})
+            return [f"data: {json.dumps(c, ensure_ascii=False)}\n\n".encode() for c in chunks] + [b"data: [DONE]\n\n"]
+
+        events = [
+            {"type": "response.output_text.delta", "item_id": "msg-fake", "output_index": 0,
+             "content_index": 0, "delta": delta, "logprobs": [], "sequence_number": i}
+            for i, delta in enumerate(deltas)
+        ]
+        events.append({"type": "response.completed", "response": body, "sequence_number": len(deltas)})
+        return [
+            f"event: {e['type']}\ndata: {json.dumps(e, ensure_ascii=False)}\n\n".encode() for e in events
+        ]
@@ -0,0 +1,157 @@
+# entries/jobs.py
+"""
+비동기 분석 작업 (AnalysisJob) 적재 / 처리.
+
+- enqueue_analysis: analyze 뷰에서 호출 → 202 + job id
+- claim_next_job:   워커가 pending 작업 하나를 원자적으로 가져감
+                    (UPDATE ... WHERE status='pending' 의 rowcount 로 선점 → DB 종류 무관,
+                     attempts 도 같은 UPDATE 에서 올려서 워커가 죽어도 시도 횟수가 남는다)
+- run_job:          OpenAI 분석 후 Entry.analysis 에 저장 (singleflight.analyze_entry, 같은 일기 요청과 합쳐짐)
+                    (LLM 동시 실행 한도 초과 / 브레이커 open 이면 실패 처리 없이 pending 으로 되돌림)
+- purge_finished_jobs: 끝난(done / failed) 지 ANALYSIS_JOB_RETENTION_DAYS 가 지난 작업 삭제
+                    (manage.py purge_analysis_jobs)
+"""
+from __future__ import annotations
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.db import close_old_connections
+from django.db.models import F
+from rest_framework.response import Response
+
+from .models import AnalysisJob, Entry
+from .singleflight import analyze_entry
+
+import logging
+logger = logging.getLogger(__name__)
+
+# 워커가 죽어서 running 에 멈춘 작업을 다시 pending 으로 돌리는 기준 (초)
+ANALYSIS_JOB_STALE_AFTER = int(os.getenv("ANALYSIS_JOB_STALE_AFTER", "300"))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+# 끝난 작업을 남겨두는 기간 (analysis-status 폴링 / 실패 원인 확인용)
+ANALYSIS_JOB_RETENTION_DAYS = int(os.getenv("ANALYSIS_JOB_RETENTION_DAYS", "7"))
+
+ACTIVE_STATUSES = (AnalysisJob.STATUS_PENDING, AnalysisJob.STATUS_RUNNING)
+# 실패로 치지 않고 pending 으로 되돌리는 503 응답 코드
+REQUEUE_CODES = ("overloaded", "analysis_in_progress", "upstream_unavailable")
+
+
+def enqueue_analysis(entry: Entry, *, fresh: bool = False) -> AnalysisJob:
+    """
+    분석 작업 적재. 같은 엔트리에 대기/진행 중인 작업이 있으면 그걸 그대로 돌려준다
+    (연타해도 작업이 쌓이지 않게).
+    """
+    job = (
+        AnalysisJob.objects.filter(entry=entry, status__in=ACTIVE_STATUSES)
+        .order_by("-id")
+        .first()
+    )
+    if job:
+        return job
+    return AnalysisJob.objects.create(entry=entry, fresh=fresh)
+
+
+def latest_job(entry: Entry) -> Optional[AnalysisJob]:
+    return AnalysisJob.objects.filter(entry=entry).order_by("-id").first()
+
+
+def claim_next_job() -> Optional[AnalysisJob]:
+    """pending 작업 하나를 running 으로 바꾸면서 가져온다. 없으면 None"""
+    candidates = list(
+        AnalysisJob.objects.filter(status=AnalysisJob.STATUS_PENDING)
+        .order_by("id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = AnalysisJob.objects.filter(
+            id=job_id, status=AnalysisJob.STATUS_PENDING
+        ).update(
+            status=AnalysisJob.STATUS_RUNNING,
+            started_at=datetime.now(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return AnalysisJob.objects.select_related("entry").get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """오래 running 상태로 남은 작업을 pending 으로 되돌리거나, 재시도 초과 시 failed 처리"""
+    cutoff = datetime.now() - timedelta(seconds=ANALYSIS_JOB_STALE_AFTER)
+    stale = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=ANALYSIS_JOB_MAX_ATTEMPTS).update(
+        status=AnalysisJob.STATUS_FAILED,
+        error="worker timeout",
+        finished_at=datetime.now(),
+    )
+    requeued = stale.update(status=AnalysisJob.STATUS_PENDING, started_at=None)
+    return failed + requeued
+
+
+def _finish(job: AnalysisJob, status: str, error: str = "") -> None:
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def purge_finished_jobs(days: int = ANALYSIS_JOB_RETENTION_DAYS, batch_size: int = 1000) -> int:
+    """done / failed 상태로 days 일 넘게 지난 작업을 batch 단위로 삭제. 삭제한 행 수 반환"""
+    cutoff = datetime.now() - timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(
+            AnalysisJob.objects.filter(
+                status__in=(AnalysisJob.STATUS_DONE, AnalysisJob.STATUS_FAILED), finished_at__lt=cutoff
+            ).values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = AnalysisJob.objects.filter(id__in=ids).delete()
+        total += deleted
+
+
+def run_job(job: AnalysisJob) -> Optional[float]:
+    """리턴: 다음 작업을 가져오기 전에 쉴 시간(초). LLM 동시 실행 한도가 꽉 찼을 때만 값이 있다"""
+    entry = job.entry
+    try:
+        data, _cached = analyze_entry(entry, fresh=job.fresh)
+    except Exception as e:
+        logger.exception("[analysis-job] job#%s failed", job.id)
+        _finish(job, AnalysisJob.STATUS_FAILED, str(e))
+        return
+
+    if isinstance(data, Response):
+        if data.data.get("code") in REQUEUE_CODES:
+            # 실패가 아니라 잠깐 자리가 없는 것 (다른 요청이 분석 중이거나 브레이커 open)
+            # → 시도 횟수를 쓰지 않고 pending 으로, retry_after 만큼 쉬었다가 다시
+            AnalysisJob.objects.filter(id=job.id).update(
+                status=AnalysisJob.STATUS_PENDING, started_at=None, attempts=F("attempts") - 1
+            )
+            return float(data.data.get("retry_after") or 1)
+        # analyze_with_openai 의 429/502 에러 응답
+        _finish(job, AnalysisJob.STATUS_FAILED, str(data.data.get("detail", "")))
+        return
+
+    _finish(job, AnalysisJob.STATUS_DONE)
+    logger.info("[analysis-job] job#%s done entry=%s", job.id, entry.id)
+
+
+def worker_loop(stop: threading.Event, poll_interval: float = 1.0) -> None:
+    """stop 이 set 될 때까지 작업을 가져와 처리 (스레드 하나당 하나씩 실행)"""
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim_next_job()
+        except Exception:
+            logger.exception("[analysis-job] claim failed")
+            job = None
+
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        backoff = run_job(job)
+        if backoff:
+            stop.wait(backoff)
@@ -0,0 +1,51 @@
+# entries/management/commands/analyze_batch.py
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from entries.batch import OpenAIBatchClient, apply_batch_output, submit_batch, wait_for_batch
+from entries.models import Entry
+
+
+class Command(BaseCommand):
+    help = "Analyze entries through the OpenAI Batch API (submit, poll, apply results)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="entries written on YYYY-MM-DD (default: today)")
+        parser.add_argument("--missing", action="store_true", help="only entries without analysis")
+        parser.add_argument("--collect", metavar="BATCH_ID", help="apply results of an existing batch")
+        parser.add_argument("--wait", action="store_true", help="poll until the batch finishes and apply results")
+        parser.add_argument("--poll-interval", type=float, default=60.0)
+        parser.add_argument("--batch-size", type=int, default=200, help="rows per bulk_update")
+        parser.add_argument("--workdir", default=str(settings.BASE_DIR / "batches"))
+
+    def handle(self, *args, **options):
+        batch_client = OpenAIBatchClient()
+
+        batch_id = options["collect"]
+        if not batch_id:
+            qs = Entry.objects.filter(date=options["date"] or date.today()).order_by("id")
+            if options["missing"]:
+                qs = qs.filter(analysis__isnull=True)
+
+            batch_id = submit_batch(
+                batch_client,
+                qs.only("id", "title", "original_lang", "original_text", "meta", "content_hash").iterator(chunk_size=500),
+                Path(options["workdir"]),
+            )
+            if not batch_id:
+                self.stdout.write("No entries to analyze.")
+                return
+            self.stdout.write(f"Submitted batch {batch_id}")
+            if not options["wait"]:
+                self.stdout.write(f"Run again with --collect {batch_id} once it completes.")
+                return
+
+        info = wait_for_batch(batch_client, batch_id, poll_interval=options["poll_interval"])
+        if info["status"] != "completed" or not info["output_file_id"]:
+            raise CommandError(f"batch {batch_id} ended as {info['status']}")
+
+        updated = apply_batch_output(batch_client, info["output_file_id"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Applied {updated} analyses from batch {batch_id}."))
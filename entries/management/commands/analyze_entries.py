@@ -0,0 +1,187 @@
+# entries/management/commands/analyze_entries.py
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from rest_framework.response import Response
+
+from entries import services
+from entries.admission import AdaptiveLimiter
+from entries.cache import analyze_cached
+from entries.jobs import REQUEUE_CODES
+from entries.models import Entry
+from entries.services import PROMPT_VERSION, bulk_save_analyses
+
+# 잠깐 자리가 없다는 503 (overloaded / 브레이커 open 등) 을 몇 번까지 기다렸다 다시 시도할지
+MAX_RETRIES = 5
+# 한도가 줄어 자리가 없으면 실패시키지 않고 이만큼까지 기다린다 (초)
+QUEUE_TIMEOUT = 600
+
+
+class Command(BaseCommand):
+    help = "(Re)analyze entries in bulk with bounded concurrency (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="AppUser id")
+        parser.add_argument("--since", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--until", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--missing", action="store_true", help="only entries without analysis")
+        parser.add_argument("--stale", action="store_true", help=f"only entries not analyzed with PROMPT_VERSION={PROMPT_VERSION}")
+        parser.add_argument("--fresh", action="store_true", help="bypass the analysis cache")
+        parser.add_argument("--limit", type=int, help="max entries to process")
+        parser.add_argument(
+            "--concurrency", type=int, default=8,
+            help="parallel OpenAI calls (own limiter of this size; it backs off on upstream overload)",
+        )
+        parser.add_argument("--batch-size", type=int, default=50, help="rows per bulk_update")
+        parser.add_argument("--chunk-size", type=int, default=200, help="rows fetched per DB round trip")
+        parser.add_argument("--checkpoint", help="file storing the last committed entry id and failed ids to retry")
+        parser.add_argument("--dry-run", action="store_true", help="only count matching entries")
+
+    def build_queryset(self, options):
+        qs = Entry.objects.all()
+        if options["user"]:
+            qs = qs.filter(user_id=options["user"])
+        if options["since"]:
+            qs = qs.filter(date__gte=options["since"])
+        if options["until"]:
+            qs = qs.filter(date__lte=options["until"])
+
+        # --missing / --stale 둘 다 주면 OR
+        cond = Q()
+        if options["missing"]:
+            cond |= Q(analysis__isnull=True)
+        if options["stale"]:
+            cond |= ~Q(analysis_version=PROMPT_VERSION)
+        if cond:
+            qs = qs.filter(cond)
+        return qs
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--concurrency and --batch-size must be >= 1")
+
+        checkpoint = Path(options["checkpoint"]) if options["checkpoint"] else None
+        last_id = 0
+        retry_ids = set()
+        if checkpoint and checkpoint.exists():
+            state = json.loads(checkpoint.read_text())
+            last_id = state.get("last_id", 0)
+            retry_ids = set(state.get("failed_ids", []))
+            self.stdout.write(f"Resuming after entry id {last_id} (retrying {len(retry_ids)} failed)")
+
+        # 지난번에 실패한 일기도 다시 시도한다 (id 순이라 먼저 처리됨)
+        qs = self.build_queryset(options).filter(Q(id__gt=last_id) | Q(id__in=retry_ids)).order_by("id")
+        if options["dry_run"]:
+            self.stdout.write(f"{qs.count()} entries match.")
+            return
+
+        rows = qs.only(
+            "id", "user", "date", "title", "original_lang", "original_text", "meta", "content_hash"
+        ).iterator(
+            chunk_size=options["chunk_size"]
+        )
+        if options["limit"]:
+            rows = islice(rows, options["limit"])
+
+        fresh = options["fresh"]
+
+        def analyze(entry):
+            for attempt in range(MAX_RETRIES + 1):
+                data, _cached = analyze_cached(
+                    original_lang=entry.original_lang,
+                    original_text=entry.original_text,
+                    title=entry.title,
+                    meta=entry.meta or {},
+                    fresh=fresh,
+                )
+                if not (isinstance(data, Response) and data.data.get("code") in REQUEUE_CODES):
+                    break
+                if attempt < MAX_RETRIES:
+                    # 실패가 아니라 잠깐 자리가 없는 것 → 워커(jobs.run_job)처럼 retry_after 만큼 쉬고 다시
+                    time.sleep(float(data.data.get("retry_after") or 1))
+            return entry, data
+
+        # 서버 프로세스용 한도(LLM_LIMIT_* / 짧은 대기열)를 그대로 쓰면 --concurrency 가 크거나
+        # 지연 때문에 한도가 줄 때 바로 503 으로 떨어져 실패로 기록된다.
+        # 이 프로세스에서는 --concurrency 크기의 한도를 따로 두고, 자리가 없으면 기다리게 한다
+        concurrency = options["concurrency"]
+        shared_limiter = services.analysis_limiter
+        services.analysis_limiter = AdaptiveLimiter(
+            "openai-backfill",
+            initial=concurrency,
+            min_limit=1,
+            max_limit=concurrency,
+            queue_size=concurrency,
+            queue_timeout=QUEUE_TIMEOUT,
+        )
+        try:
+            self.run(rows, analyze, checkpoint, last_id, retry_ids, options)
+        finally:
+            services.analysis_limiter = shared_limiter
+
+    def run(self, rows, analyze, checkpoint, last_id, retry_ids, options):
+        done = failed = skipped = 0
+        failed_ids = set(retry_ids)  # 체크포인트에 남길 (아직 성공하지 못한) id
+        seen = set()
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            while True:
+                batch = list(islice(rows, options["batch_size"]))
+                if not batch:
+                    break
+
+                results = []
+                for entry, data in pool.map(analyze, batch):
+                    seen.add(entry.id)
+                    if isinstance(data, Response):
+                        failed += 1
+                        failed_ids.add(entry.id)
+                        self.stderr.write(f"entry {entry.id}: {data.data.get('detail')}")
+                        continue
+                    results.append((entry, data))
+
+                # 분석하는 사이 본문이 바뀐(또는 삭제된) 일기는 예전 본문의 분석이므로 저장하지 않는다
+                # (batch.apply_batch_output 과 같은 방식) → 실패 목록에 남겨 다음 실행에서 새 본문으로 다시 분석
+                current = dict(
+                    Entry.objects.filter(id__in=[entry.id for entry, _ in results]).values_list("id", "content_hash")
+                )
+                fresh_results = []
+                for entry, data in results:
+                    if current.get(entry.id) != entry.content_hash:
+                        skipped += 1
+                        failed_ids.add(entry.id)
+                        self.stderr.write(f"entry {entry.id}: edited during analysis, skipped")
+                        continue
+                    failed_ids.discard(entry.id)
+                    fresh_results.append((entry, data))
+
+                done += bulk_save_analyses(fresh_results)
+
+                # 배치 단위로 커밋된 마지막 id + 실패한 id 기록 → 중단돼도 그 다음부터 재개, 실패한 건 다시 시도
+                last_id = max(last_id, batch[-1].id)
+                if checkpoint:
+                    self.write_checkpoint(checkpoint, last_id, failed_ids)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{done} analyzed, {failed} failed, {skipped} skipped, "
+                    f"{done / elapsed if elapsed else 0:.2f} entries/s (last id {batch[-1].id})"
+                )
+
+        if checkpoint and not options["limit"]:
+            # 끝까지 돌았는데 다시 나오지 않은 id 는 더 이상 조건에 맞지 않는 것 (이미 분석됨 / 삭제됨)
+            self.write_checkpoint(checkpoint, last_id, failed_ids & seen)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {done} analyzed, {failed} failed, {skipped} skipped in {elapsed:.1f}s"
+        ))
+
+    def write_checkpoint(self, path, last_id, failed_ids):
+        path.write_text(json.dumps({"last_id": last_id, "failed_ids": sorted(failed_ids)}))
@@ -0,0 +1,33 @@
+# entries/management/commands/backfill_vocab.py
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from entries.models import Entry
+from entries.vocab import upsert_vocab
+
+
+class Command(BaseCommand):
+    help = "Rebuild VocabItem rows from existing Entry.analysis vocab_suggestions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="AppUser id")
+        parser.add_argument("--batch-size", type=int, default=500, help="entries per upsert")
+
+    def handle(self, *args, **options):
+        qs = Entry.objects.filter(analysis__isnull=False)
+        if options["user"]:
+            qs = qs.filter(user_id=options["user"])
+        rows = qs.order_by("id").only("id", "user", "date", "analysis").iterator(chunk_size=options["batch_size"])
+
+        entries = words = 0
+        while True:
+            batch = list(islice(rows, options["batch_size"]))
+            if not batch:
+                break
+            # 멱등: 몇 번을 다시 돌려도 같은 결과 (first/last 는 일기 날짜 기준으로 병합)
+            words += upsert_vocab(batch)
+            entries += len(batch)
+            self.stdout.write(f"{entries} entries scanned, {words} words upserted (last id {batch[-1].id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {entries} entries, {words} words upserted."))
@@ -0,0 +1,147 @@
+# entries/management/commands/bench_upstreams.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest import mock
+
+import httpx
+import requests
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from openai import AsyncOpenAI, OpenAI
+from requests.adapters import HTTPAdapter
+
+from accounts.integrations.fake_toss import FakeTossServer
+from accounts.integrations.toss_clients import AsyncTossMTLS, TossMTLS
+from accounts.models import AppUser, TossOAuthToken
+from accounts.security.app_jwt import issue_app_jwt
+from accounts.views import auth_views
+from entries import services
+from entries.admission import AdaptiveLimiter
+from entries.fake_openai import FakeOpenAIServer
+from entries.models import AnalysisLease, Entry
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[int(round(q * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent throughput of analyze / toss-login under WSGI (thread pool, config.urls) "
+        "and ASGI (one event loop, config.urls_async) against local fake upstreams"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and mode")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--concurrency", type=int, default=200, help="ASGI requests in flight")
+        parser.add_argument("--latency", type=float, default=0.3, help="fake upstream latency (seconds)")
+        parser.add_argument("--only", choices=["analyze", "toss-login"])
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        toss_user_key = -int(time.time())
+        user = AppUser.objects.create(toss_user_key=toss_user_key)
+        TossOAuthToken.objects.create(toss_user_key=toss_user_key, refresh_token="bench")
+        # 요청마다 다른 일기 → 캐시 / single-flight 에 걸리지 않고 매번 업스트림까지 간다
+        entries = Entry.objects.bulk_create(
+            Entry(user=user, date=date(2000, 1, 1) + timedelta(days=i), title=f"bench {i}",
+                  original_lang="en", original_text=f"Bench entry number {i}.")
+            for i in range(2 * n)
+        )
+        ids = {"wsgi": [e.pk for e in entries[:n]], "asgi": [e.pk for e in entries[n:]]}
+        headers = {"Authorization": f"Bearer {issue_app_jwt(user.id, {'toss_user_key': toss_user_key})}"}
+
+        targets = {
+            "analyze": lambda mode, i: (f"/api/entries/{ids[mode][i]}/analyze/?fresh=1", {}),
+            # toss-refresh 는 저장된 access token 으로 바로 응답하므로, 매번 Toss 를 부르는 로그인으로 잰다
+            "toss-login": lambda mode, i: ("/api/accounts/toss-login", {"authorizationCode": f"bench-{mode}-{i}"}),
+        }
+        if options["only"]:
+            targets = {options["only"]: targets[options["only"]]}
+
+        # 한도는 벤치마크하려는 동시성보다 넉넉하게 (부하 차단이 아니라 처리량을 보려는 것)
+        limit = max(options["threads"], options["concurrency"])
+        limiter = AdaptiveLimiter("bench", initial=limit, max_limit=limit, queue_size=0)
+
+        try:
+            with FakeOpenAIServer(latency=options["latency"]) as llm, \
+                    FakeTossServer(latency=options["latency"], user_key=toss_user_key) as toss, \
+                    override_settings(DEBUG=False), \
+                    mock.patch.object(services, "analysis_limiter", limiter):
+                self.stdout.write(
+                    f"{n} requests per run, upstream latency {options['latency']}s, "
+                    f"WSGI {options['threads']} threads, ASGI {options['concurrency']} in flight"
+                )
+                for name, build in targets.items():
+                    wsgi = self._run_wsgi(build, n, options["threads"], headers, llm, toss)
+                    asgi = asyncio.run(self._run_asgi(build, n, options["concurrency"], headers, llm, toss))
+                    self._report(name, "wsgi", wsgi)
+                    self._report(name, "asgi", asgi)
+        finally:
+            AnalysisLease.objects.filter(key__in=[f"analyze:{e.pk}:{e.content_hash}" for e in entries]).delete()
+            TossOAuthToken.objects.filter(toss_user_key=toss_user_key).delete()
+            user.delete()
+
+    def _run_wsgi(self, build, n, threads, headers, llm, toss):
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=threads))
+        toss_client = TossMTLS(session=session, endpoints=toss.endpoints)
+        local = threading.local()
+
+        def one(i):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            path, body = build("wsgi", i)
+            started = time.perf_counter()
+            resp = local.client.post(path, body, content_type="application/json", headers=headers)
+            return resp.status_code, time.perf_counter() - started
+
+        with mock.patch.object(services, "client", OpenAI(api_key="x", base_url=llm.base_url, max_retries=0)), \
+                mock.patch.object(auth_views, "get_toss_client", lambda: toss_client):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                results = list(pool.map(one, range(n)))
+            return results, time.perf_counter() - started
+
+    async def _run_asgi(self, build, n, concurrency, headers, llm, toss):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        aclient = AsyncOpenAI(
+            api_key="x", base_url=llm.base_url, max_retries=0,
+            http_client=httpx.AsyncClient(limits=limits),
+        )
+        toss_client = AsyncTossMTLS(client=httpx.AsyncClient(limits=limits), endpoints=toss.endpoints)
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            path, body = build("asgi", i)
+            async with gate:
+                started = time.perf_counter()
+                resp = await client.post(path, body, content_type="application/json", headers=headers)
+                return resp.status_code, time.perf_counter() - started
+
+        with override_settings(ROOT_URLCONF="config.urls_async"), \
+                mock.patch.object(services, "get_async_client", lambda: aclient), \
+                mock.patch.object(auth_views, "get_async_toss_client", lambda: toss_client):
+            try:
+                started = time.perf_counter()
+                results = await asyncio.gather(*(one(i) for i in range(n)))
+                return results, time.perf_counter() - started
+            finally:
+                await aclient.close()
+                await toss_client.client.aclose()
+
+    def _report(self, name, mode, run):
+        results, elapsed = run
+        latencies = [latency for _, latency in results]
+        errors = sum(1 for code, _ in results if code != 200)
+        self.stdout.write(
+            f"{name:<13} {mode}  {len(results) / elapsed:8.1f} req/s  "
+            f"p50 {_percentile(latencies, 0.5) * 1000:7.1f}ms  p95 {_percentile(latencies, 0.95) * 1000:7.1f}ms"
+            + (f"  errors {errors}" if errors else "")
+        )
@@ -0,0 +1,16 @@
+# entries/management/commands/purge_analysis_cache.py
+from django.core.management.base import BaseCommand
+from entries.cache import purge_expired
+from entries.singleflight import purge_expired_leases
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows from the analysis cache and analysis lease tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(batch_size=options["batch_size"])
+        leases = purge_expired_leases(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired cache rows, {leases} expired leases."))
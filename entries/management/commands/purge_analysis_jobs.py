@@ -0,0 +1,15 @@
+# entries/management/commands/purge_analysis_jobs.py
+from django.core.management.base import BaseCommand
+from entries.jobs import ANALYSIS_JOB_RETENTION_DAYS, purge_finished_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete finished (done / failed) analysis jobs older than the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ANALYSIS_JOB_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_finished_jobs(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} analysis jobs."))
@@ -0,0 +1,15 @@
+# entries/management/commands/purge_tombstones.py
+from django.core.management.base import BaseCommand
+from entries.sync import TOMBSTONE_RETENTION_DAYS, purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete entry tombstones older than the sync retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=TOMBSTONE_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} tombstones."))
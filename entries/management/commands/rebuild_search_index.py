@@ -0,0 +1,16 @@
+# entries/management/commands/rebuild_search_index.py
+from django.db import connection
+from django.core.management.base import BaseCommand
+
+from entries.search import drop_search_index, install_search_index
+
+
+class Command(BaseCommand):
+    help = "Drop and recreate the entry full-text search index (FULLTEXT on MySQL, FTS5 on SQLite)"
+
+    def handle(self, *args, **options):
+        # SQLite 는 테이블을 다시 만드는 마이그레이션(AlterField 등) 뒤에 트리거가 사라지므로 이걸로 복구
+        with connection.schema_editor() as schema_editor:
+            drop_search_index(schema_editor)
+            install_search_index(schema_editor)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index ({connection.vendor})."))
@@ -0,0 +1,26 @@
+# entries/management/commands/rebuild_user_stats.py
+from django.core.management.base import BaseCommand
+
+from accounts.models import AppUser
+from entries.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute UserStats rollups (streaks, monthly scores, day bitmaps) from entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="AppUser id (default: every user)")
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            user_ids = [options["user"]]
+        else:
+            user_ids = AppUser.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=1000)
+
+        count = 0
+        for user_id in user_ids:
+            rebuild_user_stats(user_id)
+            count += 1
+            if count % 500 == 0:
+                self.stdout.write(f"{count} users rebuilt (last id {user_id})")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} users."))
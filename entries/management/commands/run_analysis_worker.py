@@ -0,0 +1,50 @@
+# entries/management/commands/run_analysis_worker.py
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from entries.jobs import requeue_stale_jobs, worker_loop
+
+
+class Command(BaseCommand):
+    help = "Process queued analysis jobs (analyze?async=1) with a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="number of worker threads")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between polls when idle")
+
+    def handle(self, *args, **options):
+        threads_n = max(1, options["threads"])
+        stop = threading.Event()
+
+        def _shutdown(signum, frame):
+            self.stdout.write("Stopping workers...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, _shutdown)
+        signal.signal(signal.SIGTERM, _shutdown)
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        threads = [
+            threading.Thread(
+                target=worker_loop,
+                args=(stop, options["poll_interval"]),
+                name=f"analysis-worker-{i}",
+                daemon=True,
+            )
+            for i in range(threads_n)
+        ]
+        for t in threads:
+            t.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {threads_n} analysis workers."))
+
+        # 메인 스레드는 주기적으로 멈춘 작업만 정리
+        while not stop.wait(60):
+            requeue_stale_jobs()
+
+        for t in threads:
+            t.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
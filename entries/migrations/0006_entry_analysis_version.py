@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entries', '0005_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='analysis_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
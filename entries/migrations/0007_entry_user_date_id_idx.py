@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('entries', '0006_entry_analysis_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['user', 'date', 'id'], name='entry_user_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:56
+
+import hashlib
+import json
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicates(apps, schema_editor):
+    # 같은 (user, date) 가 이미 여러 개면 유니크 제약을 걸 수 없다 → 자동 삭제하지 않고 알려준다
+    Entry = apps.get_model("entries", "Entry")
+    dupes = list(
+        Entry.objects.values("user_id", "date")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)[:20]
+    )
+    if dupes:
+        raise RuntimeError(
+            "중복된 (user, date) 일기가 있어 유니크 제약을 추가할 수 없습니다. 먼저 정리해주세요: "
+            + ", ".join(f"user={d['user_id']} date={d['date']} ({d['n']})" for d in dupes)
+        )
+
+
+def compute_content_hash(title, original_lang, original_text, meta) -> str:
+    # 이 마이그레이션 시점의 entries.models.compute_content_hash 사본 (이후 코드가 바뀌어도 결과가 달라지지 않게)
+    payload = json.dumps(
+        [title, original_lang, original_text, meta or {}],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fill_content_hash(apps, schema_editor):
+    Entry = apps.get_model("entries", "Entry")
+    batch = []
+    qs = Entry.objects.only("id", "title", "original_lang", "original_text", "meta")
+    for entry in qs.iterator(chunk_size=500):
+        entry.content_hash = compute_content_hash(
+            entry.title, entry.original_lang, entry.original_text, entry.meta
+        )
+        batch.append(entry)
+        if len(batch) >= 500:
+            Entry.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    if batch:
+        Entry.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('entries', '0007_entry_user_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        # 중복이 있으면 전체 테이블 해시 채우기 전에 바로 멈춘다
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='entry',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='entry_user_date_uniq'),
+        ),
+        # (user, date) 유니크 인덱스가 같은 역할을 하므로 제거
+        migrations.RemoveIndex(
+            model_name='entry',
+            name='entry_user_date_id_idx',
+        ),
+    ]
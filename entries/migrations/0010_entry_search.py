@@ -0,0 +1,91 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:04
+
+from django.db import migrations, models
+
+
+# 이 마이그레이션 시점의 entries.search / entries.models 사본 (이후 코드가 바뀌어도 같은 스키마와 값을 만들게)
+TABLE = "entries_entry"
+FULLTEXT_INDEX = "entry_fulltext_idx"
+FTS_TABLE = f"{TABLE}_fts"
+SEARCH_COLUMNS = ("title", "original_text", "corrected_text")
+
+
+def extract_corrected_text(analysis) -> str:
+    if not isinstance(analysis, dict):
+        return ""
+    corrections = analysis.get("corrections")
+    if not isinstance(corrections, dict):
+        return ""
+    return str(corrections.get("corrected") or "")
+
+
+def fill_corrected_text(apps, schema_editor):
+    Entry = apps.get_model("entries", "Entry")
+    batch = []
+    qs = Entry.objects.filter(analysis__isnull=False).only("id", "analysis")
+    for entry in qs.iterator(chunk_size=500):
+        entry.corrected_text = extract_corrected_text(entry.analysis)
+        batch.append(entry)
+        if len(batch) >= 500:
+            Entry.objects.bulk_update(batch, ["corrected_text"])
+            batch = []
+    if batch:
+        Entry.objects.bulk_update(batch, ["corrected_text"])
+
+
+def _sqlite_trigger_sql():
+    cols = ", ".join(SEARCH_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    insert = f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new});"
+    delete = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    return [
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN {insert} END",
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN {delete} END",
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {cols} ON {TABLE} BEGIN {delete} {insert} END",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} "
+            f"({', '.join(SEARCH_COLUMNS)}) WITH PARSER ngram"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"{', '.join(SEARCH_COLUMNS)}, content='{TABLE}', content_rowid='id', tokenize='trigram')"
+        )
+        for sql in _sqlite_trigger_sql():
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def remove_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {TABLE} DROP INDEX {FULLTEXT_INDEX}")
+    elif vendor == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entries', '0009_entry_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='corrected_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(fill_corrected_text, migrations.RunPython.noop),
+        # MySQL: FULLTEXT(ngram) / SQLite: FTS5(trigram) + 트리거 / 그 외: 없음 (icontains)
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
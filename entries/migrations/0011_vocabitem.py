@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('entries', '0010_entry_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VocabItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=200)),
+                ('word_normalized', models.CharField(max_length=200)),
+                ('meaning_ko', models.TextField(blank=True, default='')),
+                ('example_en', models.TextField(blank=True, default='')),
+                ('first_seen', models.DateField()),
+                ('last_seen', models.DateField()),
+                ('first_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='entries.entry')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vocab_items', to='accounts.appuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'last_seen', 'id'], name='vocab_user_last_seen_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'word_normalized'), name='vocab_user_word_uniq')],
+            },
+        ),
+    ]
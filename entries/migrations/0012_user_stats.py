@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def extract_score(analysis):
+    # 이 마이그레이션 시점의 entries.models.extract_score 사본
+    if not isinstance(analysis, dict):
+        return None
+    score = analysis.get("score")
+    if not isinstance(score, dict):
+        return None
+    try:
+        value = int(score.get("value"))
+    except (TypeError, ValueError):
+        return None
+    return min(max(value, 0), 100)
+
+
+def fill_score(apps, schema_editor):
+    Entry = apps.get_model("entries", "Entry")
+    batch = []
+    qs = Entry.objects.filter(analysis__isnull=False).only("id", "analysis")
+    for entry in qs.iterator(chunk_size=500):
+        entry.score = extract_score(entry.analysis)
+        batch.append(entry)
+        if len(batch) >= 500:
+            Entry.objects.bulk_update(batch, ["score"])
+            batch = []
+    if batch:
+        Entry.objects.bulk_update(batch, ["score"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('entries', '0011_vocabitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='accounts.appuser')),
+                ('months', models.JSONField(blank=True, default=dict)),
+                ('days', models.JSONField(blank=True, default=dict)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('streak_end', models.DateField(blank=True, null=True)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        # UserStats 행은 rebuild_user_stats 커맨드로 채운다
+        migrations.RunPython(fill_score, migrations.RunPython.noop),
+    ]
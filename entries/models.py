@@ -1,8 +1,47 @@
 # entries/models.py
+import hashlib
+import json
+
 from django.conf import settings
 from django.db import models
 from datetime import date as date_func
 
+# content_hash 계산에 들어가는 필드 (이 중 하나라도 바뀌면 해시가 바뀐다)
+CONTENT_FIELDS = ("title", "original_lang", "original_text", "meta")
+
+
+def compute_content_hash(title, original_lang, original_text, meta) -> str:
+    payload = json.dumps(
+        [title, original_lang, original_text, meta or {}],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def extract_corrected_text(analysis) -> str:
+    """analysis JSON 의 corrections.corrected (검색 인덱스용 사본)"""
+    if not isinstance(analysis, dict):
+        return ""
+    corrections = analysis.get("corrections")
+    if not isinstance(corrections, dict):
+        return ""
+    return str(corrections.get("corrected") or "")
+
+
+def extract_score(analysis):
+    """analysis JSON 의 score.value (0~100 정수, 없거나 이상하면 None)"""
+    if not isinstance(analysis, dict):
+        return None
+    score = analysis.get("score")
+    if not isinstance(score, dict):
+        return None
+    try:
+        value = int(score.get("value"))
+    except (TypeError, ValueError):
+        return None
+    return min(max(value, 0), 100)
+
+
 class Entry(models.Model):
     LANG_CHOICES = (("en", "English"), ("ko", "Korean"))
     user = models.ForeignKey(
@@ -17,12 +56,181 @@ class Entry(models.Model):
     original_text = models.TextField()
     meta = models.JSONField(default=dict, blank=True)  # {"weather": "...", "mood": "..."}
     analysis = models.JSONField(null=True, blank=True) # 저장 후 analyze에서 채움
+    analysis_version = models.CharField(max_length=64, blank=True, default="")  # 분석 당시 PROMPT_VERSION
+    content_hash = models.CharField(max_length=64, blank=True, default="")  # upsert 시 변경 여부 판단용
+    # analysis.corrections.corrected 사본. JSON 안의 값은 FULLTEXT 인덱스에 못 넣으므로 컬럼으로 뺀다
+    corrected_text = models.TextField(blank=True, default="")
+    score = models.PositiveSmallIntegerField(null=True, blank=True)  # analysis.score.value 사본 (통계 집계용)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-date", "-id"]
+        constraints = [
+            # 하루에 일기 하나. 목록 keyset 페이지네이션 / 캘린더 / by-date 조회도 이 인덱스를 탄다
+            # (InnoDB 보조 인덱스는 PK(id)를 포함하므로 (user, date, id) 순서 스캔이 그대로 된다)
+            models.UniqueConstraint(fields=["user", "date"], name="entry_user_date_uniq"),
+        ]
+        indexes = [
+            # 델타 싱크: (updated_at, id) keyset 범위 스캔
+            models.Index(fields=["user", "updated_at", "id"], name="entry_user_updated_idx"),
+        ]
 
     def __str__(self):
         return f"[{self.date}] {self.title} (user={self.user_id})"
+
+    def save(self, *args, **kwargs):
+        # 본문 관련 필드를 저장할 때는 content_hash 도 같이 맞춰준다
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(CONTENT_FIELDS):
+            self.content_hash = compute_content_hash(
+                self.title, self.original_lang, self.original_text, self.meta
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields = {*update_fields, "content_hash"}
+        # analysis 를 저장할 때는 검색용 corrected_text / 통계용 score 도 같이
+        if update_fields is None or "analysis" in update_fields:
+            self.corrected_text = extract_corrected_text(self.analysis)
+            self.score = extract_score(self.analysis)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "corrected_text", "score"}
+        super().save(*args, **kwargs)
+
+
+class EntryTombstone(models.Model):
+    """
+    삭제된 일기 기록 (델타 싱크용). Entry post_delete 시그널에서 채운다.
+    유저 삭제(cascade) 중에도 만들어지므로 AppUser FK 대신 user_id 값만 보관한다.
+    """
+    user_id = models.BigIntegerField()
+    entry_id = models.BigIntegerField()
+    date = models.DateField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_id", "deleted_at", "id"], name="tombstone_user_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"tombstone entry={self.entry_id} user={self.user_id} ({self.deleted_at})"
+
+
+class AnalysisCache(models.Model):
+    """
+    analyze_with_openai 결과의 영속 캐시 (2차 캐시).
+    key = sha256(model, prompt 버전, lang, 정규화된 본문, title, meta)
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    model = models.CharField(max_length=100)
+    prompt_version = models.CharField(max_length=64)
+    result = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]}… ({self.model}, {self.prompt_version})"
+
+
+class AnalysisJob(models.Model):
+    """
+    비동기 분석 작업 큐 (DB 기반).
+    analyze?async=1 → pending 으로 적재, run_analysis_worker 가 가져가서 처리.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name="analysis_jobs")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    fresh = models.BooleanField(default=False)  # 캐시 무시 여부
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="analysisjob_status_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"job#{self.id} entry={self.entry_id} [{self.status}]"
+
+
+class AnalysisLease(models.Model):
+    """
+    같은 일기 분석을 워커 간에 하나만 돌리기 위한 리스 (entries.singleflight).
+    key = "analyze:<entry id>:<content_hash>"
+    리더가 성공하면 result 를 채워 잠깐 남겨 두고 (기다리던 워커가 가져감), 실패하면 행을 지운다.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    owner = models.CharField(max_length=32)
+    result = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({'done' if self.result is not None else 'running'}, until {self.expires_at})"
+
+
+class VocabItem(models.Model):
+    """
+    analysis.vocab_suggestions 를 정규화해 둔 유저별 단어장.
+    분석 결과를 저장할 때마다 entries.vocab.upsert_vocab 으로 갱신한다.
+    """
+    user = models.ForeignKey("accounts.AppUser", on_delete=models.CASCADE, related_name="vocab_items")
+    word = models.CharField(max_length=200)  # 마지막으로 제안된 표기 그대로
+    word_normalized = models.CharField(max_length=200)  # 소문자 / 공백 정리 / 양끝 문장부호 제거
+    meaning_ko = models.TextField(blank=True, default="")
+    example_en = models.TextField(blank=True, default="")
+    first_entry = models.ForeignKey(
+        Entry, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    first_seen = models.DateField()  # 처음 등장한 일기 날짜
+    last_seen = models.DateField()  # 마지막으로 등장한 일기 날짜
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "word_normalized"], name="vocab_user_word_uniq"),
+        ]
+        indexes = [
+            # GET /api/vocab: 최근 본 순 keyset 페이지네이션
+            models.Index(fields=["user", "last_seen", "id"], name="vocab_user_last_seen_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.word} (user={self.user_id})"
+
+
+class UserStats(models.Model):
+    """
+    유저별 학습 통계 롤업 (GET /api/stats 는 이 행 하나만 PK 로 읽는다).
+    일기 저장/분석/삭제 때마다 entries.stats.apply_entry_changes 로 바뀐 부분만 갱신,
+    어긋났을 때는 rebuild_user_stats 커맨드로 전체 재계산.
+    """
+    user = models.OneToOneField(
+        "accounts.AppUser", on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    # {"2025-10": {"sum": 1234, "count": 15, "min": 60, "max": 95}}
+    months = models.JSONField(default=dict, blank=True)
+    # {"2025": "<base64>"} 1월 1일 = 0번 비트, 일기 쓴 날 = 1 (366비트 = 46바이트)
+    days = models.JSONField(default=dict, blank=True)
+    current_streak = models.PositiveIntegerField(default=0)  # streak_end 에서 끝나는 연속 일수
+    streak_end = models.DateField(null=True, blank=True)  # 가장 최근 일기 날짜
+    longest_streak = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"stats user={self.user_id} (streak {self.current_streak}/{self.longest_streak})"
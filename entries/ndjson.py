@@ -0,0 +1,265 @@
+# entries/ndjson.py
+"""
+일기 NDJSON 내보내기 / 가져오기.
+
+- 내보내기: (date, id) keyset 으로 EXPORT_CHUNK_SIZE 개씩 끊어 읽으며 한 줄씩 yield
+  → 일기 수 / analysis 크기와 상관없이 메모리 일정
+  (mysqlclient 는 .iterator() 도 결과 전체를 클라이언트에 버퍼링하므로 keyset 으로 나눠 읽는다)
+- 가져오기: 요청 본문을 줄 단위로 읽어 EntryCreateSerializer 로 검증한 뒤 IMPORT_BATCH_SIZE 개씩 bulk_create,
+  (user, date) 충돌은 skip(기본) 또는 overwrite. 새로 만든 행은 내보낼 때의 created_at 을 유지한다
+"""
+from __future__ import annotations
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from .models import Entry, compute_content_hash, extract_corrected_text, extract_score
+from .response_cache import bump_generation
+from .serializers import EntryCreateSerializer
+from .stats import apply_entry_changes
+from .vocab import upsert_vocab
+
+EXPORT_CHUNK_SIZE = 200
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+EXPORT_FIELDS = (
+    "date", "title", "original_lang", "original_text", "meta",
+    "analysis", "analysis_version", "created_at", "updated_at",
+)
+WRITABLE_FIELDS = ("title", "original_lang", "original_text", "meta", "analysis", "analysis_version")
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Accept: application/x-ndjson 요청이 406 으로 막히지 않게 (에러 응답은 한 줄 JSON)"""
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder) + "\n").encode("utf-8")
+
+
+def _export_page(user, last):
+    qs = Entry.objects.filter(user=user).order_by("date", "id").values(*EXPORT_FIELDS, "id")
+    if last:
+        qs = qs.filter(Q(date__gt=last[0]) | Q(date=last[0], id__gt=last[1]))
+    return qs[:EXPORT_CHUNK_SIZE]
+
+
+def _export_line(row) -> bytes:
+    return (json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + "\n").encode("utf-8")
+
+
+def export_lines(user) -> Iterator[bytes]:
+    last = None
+    while True:
+        rows = list(_export_page(user, last))
+        if not rows:
+            return
+        last = (rows[-1]["date"], rows[-1]["id"])
+        for row in rows:
+            row.pop("id")
+            yield _export_line(row)
+
+
+async def aexport_lines(user) -> AsyncIterator[bytes]:
+    """
+    export_lines 의 async 버전 (ASGI).
+    StreamingHttpResponse 는 동기 이터레이터를 ASGI 에서 sync_to_async(list) 로 한꺼번에 모아 보내므로
+    ASGI 에서는 이쪽을 써야 페이지 단위로 흘려보낸다.
+    """
+    last = None
+    while True:
+        rows = [row async for row in _export_page(user, last)]
+        if not rows:
+            return
+        last = (rows[-1]["date"], rows[-1]["id"])
+        for row in rows:
+            row.pop("id")
+            yield _export_line(row)
+
+
+def export_response(lines) -> StreamingHttpResponse:
+    """lines: export_lines (WSGI) 또는 aexport_lines (ASGI)"""
+    resp = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+    resp["Content-Disposition"] = f'attachment; filename="entries-{date.today():%Y%m%d}.ndjson"'
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+def _validation_message(errors) -> str:
+    return "; ".join(f"{field}: {' '.join(map(str, msgs))}" for field, msgs in errors.items())
+
+
+def _parse_created_at(value):
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(str(value))
+    if timezone.is_aware(created_at):
+        created_at = timezone.make_naive(created_at)  # USE_TZ=False → 서버 시간대 naive 로 저장
+    return created_at
+
+
+def _parse_line(raw: bytes | str) -> Dict:
+    item = json.loads(raw)
+    if not isinstance(item, dict):
+        raise ValueError("line must be a JSON object")
+    if not item.get("date"):
+        raise ValueError("date is required")
+
+    # 앱에서 쓰는 것과 같은 검증 (제목 길이 / 언어 / 최소 글자 수 등)
+    fields = {f: item[f] for f in EntryCreateSerializer.Meta.fields if f != "id" and item.get(f) is not None}
+    serializer = EntryCreateSerializer(data=fields)
+    if not serializer.is_valid():
+        raise ValueError(_validation_message(serializer.errors))
+    data = serializer.validated_data
+
+    meta = data.get("meta") or {}
+    if not isinstance(meta, dict):
+        raise ValueError("meta must be an object")
+
+    return {
+        "date": data["date"],
+        "title": data["title"],
+        "original_lang": data["original_lang"],
+        "original_text": data["original_text"],
+        "meta": meta,
+        "analysis": item.get("analysis"),
+        "analysis_version": item.get("analysis_version") or "",
+        "created_at": _parse_created_at(item.get("created_at")),
+    }
+
+
+def _write_batch(user, batch: Dict[date, Dict], overwrite: bool) -> tuple[int, int]:
+    """리턴: (written, skipped)"""
+    existing = set(
+        Entry.objects.filter(user=user, date__in=list(batch)).values_list("date", flat=True)
+    )
+    if not overwrite:
+        batch = {d: item for d, item in batch.items() if d not in existing}
+    skipped = len(existing) if not overwrite else 0
+    if not batch:
+        return 0, skipped
+
+    now = datetime.now()
+    objs = []
+    created_at: Dict[date, datetime] = {}
+    for item in batch.values():
+        item = dict(item)
+        if item["created_at"] and item["date"] not in existing:
+            created_at[item["date"]] = item["created_at"]
+        item["created_at"] = now
+        objs.append(Entry(
+            user=user,
+            content_hash=compute_content_hash(
+                item["title"], item["original_lang"], item["original_text"], item["meta"]
+            ),
+            corrected_text=extract_corrected_text(item["analysis"]),
+            score=extract_score(item["analysis"]),
+            updated_at=now,
+            **item,
+        ))
+
+    kwargs = {}
+    if overwrite:
+        kwargs = {
+            "update_conflicts": True,
+            "update_fields": [*WRITABLE_FIELDS, "content_hash", "corrected_text", "score", "updated_at"],
+        }
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs["unique_fields"] = ["user", "date"]
+    else:
+        # 위에서 걸렀지만 그 사이 다른 요청이 같은 날짜를 만들었을 수도 있음
+        kwargs = {"ignore_conflicts": True}
+
+    Entry.objects.bulk_create(objs, batch_size=IMPORT_BATCH_SIZE, **kwargs)
+    _fill_ids(user, objs)
+    written = [obj for obj in objs if obj.id]
+    _restore_created_at([obj for obj in written if obj.date in created_at], created_at)
+    upsert_vocab(obj for obj in written if obj.analysis)
+    apply_entry_changes(user.pk, added=[obj.date for obj in written])
+    # ignore_conflicts 로 버려진 행(그 사이 다른 요청이 만든 날짜)은 skipped 로 센다
+    return len(written), skipped + len(objs) - len(written)
+
+
+def _fill_ids(user, objs: List[Entry]) -> None:
+    """
+    bulk_create 는 ignore_conflicts / MySQL 에서 pk 를 채워주지 않으므로 (user, date) 로 다시 읽는다.
+    이번 배치가 쓴 내용(content_hash)과 같은 행만 id 를 채우고,
+    그 사이 다른 요청이 먼저 만든 날짜는 None 으로 둔다.
+    """
+    rows = Entry.objects.filter(user=user, date__in=[obj.date for obj in objs]).values_list(
+        "date", "id", "content_hash"
+    )
+    written = {(d, content_hash): entry_id for d, entry_id, content_hash in rows}
+    for obj in objs:
+        obj.id = written.get((obj.date, obj.content_hash))
+
+
+def _restore_created_at(objs: List[Entry], created_at: Dict[date, datetime]) -> None:
+    """bulk_create 는 auto_now_add 로 created_at 을 덮어쓰므로, 새로 만든 행에 한해 UPDATE 한 번으로 되돌린다"""
+    if not objs:
+        return
+    Entry.objects.filter(id__in=[obj.id for obj in objs]).update(
+        created_at=Case(
+            *(When(id=obj.id, then=Value(created_at[obj.date])) for obj in objs),
+            output_field=DateTimeField(),
+        )
+    )
+
+
+def import_lines(user, lines: Iterable[bytes], *, overwrite: bool = False) -> Dict:
+    """
+    lines: 요청 본문을 줄 단위로 넘기는 iterable (request 객체 그대로 넘겨도 됨)
+    리턴: {"received", "written", "skipped", "failed", "errors"}
+    """
+    received = written = skipped = failed = 0
+    errors: List[Dict] = []
+    batch: Dict[date, Dict] = {}
+
+    def flush():
+        nonlocal written, skipped
+        w, s = _write_batch(user, batch, overwrite)
+        written, skipped = written + w, skipped + s
+        batch.clear()
+
+    for lineno, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        received += 1
+        try:
+            item = _parse_line(raw)
+        except (ValueError, TypeError) as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": lineno, "error": str(e)})
+            continue
+
+        # 같은 날짜가 여러 줄이면 마지막 줄 기준 (앞 줄은 skipped 로 센다)
+        if item["date"] in batch:
+            skipped += 1
+        batch[item["date"]] = item
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    if written:
+        bump_generation(user.pk)  # bulk_create 는 post_save 를 안 탄다
+
+    return {
+        "received": received,
+        "written": written,
+        "skipped": skipped,
+        "failed": failed,
+        "errors": errors,
+    }
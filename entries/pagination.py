@@ -0,0 +1,107 @@
+# entries/pagination.py
+"""
+일기 목록 keyset(커서) 페이지네이션.
+
+정렬은 get_queryset 과 같은 (-date, -id).
+다음 페이지는 "마지막으로 본 (date, id) 보다 작은 것" 으로 조회하므로
+OFFSET 없이 (user, date) 유니크 인덱스 범위 스캔 한 번이면 된다 → 얼마나 깊이 스크롤하든 비용 일정.
+"""
+import base64
+import json
+import os
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+ENTRY_PAGE_SIZE = int(os.getenv("ENTRY_PAGE_SIZE", "20"))
+
+
+def encode_cursor(entry_date: date, entry_id: int) -> str:
+    raw = json.dumps({"d": entry_date.isoformat(), "i": entry_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(data["d"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise NotFound("Invalid cursor")
+
+
+class EntryCursorPagination(BasePagination):
+    page_size = ENTRY_PAGE_SIZE
+    # (날짜 컬럼, id) 내림차순 keyset. 다른 모델은 date_field 만 바꿔서 재사용
+    date_field = "date"
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    # ?all=1 → 예전처럼 전체 목록 (페이지네이션 없음)
+    unpaginated_query_param = "all"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.unpaginated_query_param) in ("1", "true"):
+            return None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{self.date_field}__lt": last_date}) | Q(**{self.date_field: last_date, "id__lt": last_id})
+            )
+
+        # 한 개 더 읽어서 다음 페이지 존재 여부 판단
+        rows = list(queryset.order_by(f"-{self.date_field}", "-id")[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        page = rows[:page_size]
+        self.next_cursor = (
+            encode_cursor(getattr(page[-1], self.date_field), page[-1].id) if self.has_next else None
+        )
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class VocabCursorPagination(EntryCursorPagination):
+    """단어장: 최근 본 순 (-last_seen, -id) → (user, last_seen, id) 인덱스 범위 스캔"""
+    date_field = "last_seen"
+    page_size = 50
+    max_page_size = 200
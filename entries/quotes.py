@@ -0,0 +1,113 @@
+# entries/quotes.py
+"""
+오늘의 문장(quotes) 인덱스.
+
+- quotes_data.json 은 프로세스당 한 번만 읽고, 파일 mtime 이 바뀌었을 때만 다시 읽는다.
+- 매 요청 random.sample 대신 날짜(KST) 기반 결정적 로테이션:
+  고정 시드로 섞어둔 순서에서 하루에 k 개씩 앞으로 넘어가므로
+  전체를 한 바퀴 돌기 전까지는 같은 문장이 다시 나오지 않는다.
+- 같은 날에는 같은 응답 → 자정(KST)까지 Cache-Control / ETag 로 캐시 가능.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import logging
+logger = logging.getLogger(__name__)
+
+KST = ZoneInfo("Asia/Seoul")
+QUOTES_PATH = Path(__file__).resolve().parent / "quotes_data.json"
+QUOTES_PER_DAY = 3
+SHUFFLE_SEED = 20251101  # 바꾸면 전체 로테이션 순서가 바뀐다
+MTIME_CHECK_INTERVAL = 5.0  # 초. 이 간격 이내에는 stat() 도 생략
+
+# 파일이 없거나 깨졌어도 API 는 죽지 않게 기본 fallback
+FALLBACK_QUOTES = (
+    ("I'm trying to focus on progress, not perfection.", "완벽보다 조금씩 나아지는 것에 집중하려고 해요."),
+    ("Today felt overwhelming, but I made it through.", "오늘은 버거웠지만 그래도 버텼어요."),
+    ("I’m slowly getting comfortable with being myself.", "조금씩 있는 그대로의 나를 편하게 느끼는 중이에요."),
+)
+
+
+class QuotesIndex:
+    def __init__(self, path: Path = QUOTES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._quotes: Tuple[Tuple[str, str], ...] = ()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.version = ""  # ETag 재료 (파일 내용 해시)
+
+    def _load(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if self._quotes and mtime == self._mtime:
+            return
+
+        try:
+            raw = self.path.read_bytes()
+            items = json.loads(raw)
+            quotes = tuple((q["en"], q["ko"]) for q in items if q.get("en") and q.get("ko"))
+            if not quotes:
+                raise ValueError("empty quotes file")
+        except Exception:
+            logger.warning("[quotes] failed to load %s, using fallback", self.path, exc_info=True)
+            raw = b""
+            quotes = FALLBACK_QUOTES
+
+        # 고정 시드 셔플 → 인접한 날끼리 비슷한 문장이 몰리지 않게
+        shuffled = list(quotes)
+        random.Random(SHUFFLE_SEED).shuffle(shuffled)
+        self._quotes = tuple(shuffled)
+        self._mtime = mtime
+        self.version = hashlib.sha1(raw).hexdigest()[:12]
+        logger.info("[quotes] loaded %d quotes (version=%s)", len(self._quotes), self.version)
+
+    def quotes(self) -> Tuple[Tuple[str, str], ...]:
+        now = time.monotonic()
+        if not self._quotes or now - self._checked_at >= MTIME_CHECK_INTERVAL:
+            with self._lock:
+                self._load()
+                self._checked_at = now
+        return self._quotes
+
+    def pick(self, day: date, offset: int = 0, k: int = QUOTES_PER_DAY) -> List[dict]:
+        quotes = self.quotes()
+        n = len(quotes)
+        k = min(k, n)
+        start = (day.toordinal() * k + offset) % n
+        return [
+            {"en": quotes[(start + i) % n][0], "ko": quotes[(start + i) % n][1]}
+            for i in range(k)
+        ]
+
+
+quotes_index = QuotesIndex()
+
+
+def today_kst() -> date:
+    return datetime.now(KST).date()
+
+
+def seconds_until_midnight_kst() -> int:
+    now = datetime.now(KST)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=KST)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def user_offset(user_id) -> int:
+    """유저마다 로테이션 시작점을 다르게 (같은 유저는 항상 같은 offset)"""
+    return int(hashlib.sha1(str(user_id).encode()).hexdigest()[:8], 16)
+
+
+def quotes_etag(day: date, offset: int) -> str:
+    return f'"q-{quotes_index.version}-{day.isoformat()}-{offset}"'
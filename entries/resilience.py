@@ -0,0 +1,263 @@
+# entries/resilience.py
+"""
+OpenAI 호출 보호막: 재시도(지수 백오프 + 지터, Retry-After 존중) + 프로세스 단위 서킷 브레이커.
+
+- 재시도 대상: 429 / 5xx / 타임아웃 / 연결 실패 (400 같은 요청 오류는 바로 실패)
+- 브레이커: 최근 BREAKER_WINDOW 번의 시도 중 실패율이 BREAKER_ERROR_RATE 이상이면 open
+  → BREAKER_COOLDOWN 초 동안 업스트림을 부르지 않고 즉시 CircuitOpenError
+  → 그 뒤 half-open 에서 한 번만 시험 호출, 성공하면 closed / 실패하면 다시 open
+- 상태는 breaker_states() 로 조회 (GET /api/ops/upstreams)
+
+SDK 자체 재시도(max_retries)는 끄고 이 모듈만 재시도한다 (재시도가 곱해지지 않도록).
+"""
+from __future__ import annotations
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+import logging
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("OPENAI_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))  # 초
+RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "8"))  # 한 번 기다리는 최대 시간 (초)
+
+BREAKER_WINDOW = int(os.getenv("OPENAI_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("OPENAI_BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("OPENAI_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN = float(os.getenv("OPENAI_BREAKER_COOLDOWN", "30"))  # 초
+
+# APITimeoutError 는 APIConnectionError 의 하위 클래스
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+T = TypeVar("T")
+
+_sleep = time.sleep  # 테스트에서 바꿔 끼울 수 있게
+_asleep = asyncio.sleep
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"circuit '{name}' is open (retry after {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = 실패
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._counters = {"opened": 0, "rejected": 0, "failures": 0, "successes": 0}
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self._counters["rejected"] += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self._counters["rejected"] += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            if self._state == self.HALF_OPEN:
+                logger.info("[breaker:%s] closed", self.name)
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and sum(self._outcomes) / calls >= self.error_rate:
+                self._open()
+
+    def release(self) -> None:
+        """성공/실패로 셀 수 없는 결과 (요청 오류 등) → half-open 시험 슬롯만 돌려준다"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self) -> None:
+        logger.warning("[breaker:%s] open for %.0fs", self.name, self.cooldown)
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._counters["opened"] += 1
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_after = self.retry_after()
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "error_rate": round(failures / calls, 4) if calls else 0.0,
+                "retry_after": round(retry_after, 1),
+                **self._counters,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def _retry_after_header(error) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error=None) -> float:
+    """attempt 는 1부터. Retry-After 가 있으면 그 값 (+ 약간의 지터), 없으면 full jitter 지수 백오프"""
+    hinted = _retry_after_header(error) if error is not None else None
+    if hinted is not None:
+        return hinted + random.uniform(0, min(1.0, hinted * 0.1))
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def _retry_delay(breaker: CircuitBreaker, attempt: int, max_attempts: int, error) -> Optional[float]:
+    """실패를 기록하고 다음 시도까지 기다릴 시간을 돌려준다. 더 시도하지 않을 거면 None"""
+    breaker.record_failure()
+    delay = backoff_delay(attempt, error)
+    if attempt == max_attempts or delay > RETRY_MAX_DELAY:
+        return None
+    logger.info(
+        "[retry:%s] attempt %s failed (%s), retrying in %.2fs",
+        breaker.name, attempt, type(error).__name__, delay,
+    )
+    return delay
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    breaker: CircuitBreaker,
+    *,
+    max_attempts: int = RETRY_MAX_ATTEMPTS,
+) -> T:
+    """
+    fn() 을 브레이커 + 재시도로 감싸서 실행.
+    브레이커가 열려 있으면 CircuitOpenError, 재시도를 다 쓰면 마지막 예외를 그대로 올린다.
+    """
+    for attempt in range(1, max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_after())
+        try:
+            result = fn()
+        except RETRYABLE_ERRORS as e:
+            delay = _retry_delay(breaker, attempt, max_attempts, e)
+            if delay is None:
+                raise
+            _sleep(delay)
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    *,
+    max_attempts: int = RETRY_MAX_ATTEMPTS,
+) -> T:
+    """call_with_retry 의 async 버전 (await fn(), 대기는 asyncio.sleep). 브레이커는 동기 버전과 공유"""
+    for attempt in range(1, max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_after())
+        try:
+            result = await fn()
+        except RETRYABLE_ERRORS as e:
+            delay = _retry_delay(breaker, attempt, max_attempts, e)
+            if delay is None:
+                raise
+            await _asleep(delay)
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
@@ -0,0 +1,130 @@
+# entries/response_cache.py
+"""
+유저별 세대(generation) 기반 응답 캐시 (list / calendar / by-date).
+
+- 캐시 키: entries:resp:{user}:{gen}:{view}:{쿼리 파라미터 해시}
+- Entry 가 저장/삭제될 때마다 그 유저의 gen 을 +1 (entries.signals)
+  → 예전 키는 더 이상 조회되지 않으므로 무효화 비용은 O(1), stale 응답 없음
+- 백엔드는 settings.CACHES["entries"]. 워커 간에 세대 값을 공유해야 stale 응답이 없으므로 공유 캐시(redis 등)만 의미가 있다.
+  설정하지 않으면 DummyCache → 캐시하지 않음 (프로세스 로컬 캐시로 다른 워커의 수정을 놓치지 않게)
+"""
+from __future__ import annotations
+import hashlib
+import threading
+import time
+from functools import wraps
+from typing import Any, Dict
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_ALIAS = "entries"
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _gen_key(user_id) -> str:
+    return f"entries:gen:{user_id}"
+
+
+def get_generation(user_id) -> int:
+    cache = _cache()
+    gen = cache.get(_gen_key(user_id))
+    if gen is None:
+        # 세대 키가 유실(eviction/재시작)돼도 예전 응답이 되살아나지 않도록 시각 기반 값으로 시작
+        cache.add(_gen_key(user_id), int(time.time() * 1000), timeout=None)
+        gen = cache.get(_gen_key(user_id))
+    return gen
+
+
+def bump_generation(user_id) -> None:
+    cache = _cache()
+    try:
+        cache.incr(_gen_key(user_id))
+    except ValueError:
+        cache.add(_gen_key(user_id), int(time.time() * 1000), timeout=None)
+
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+
+def _incr(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _response_key(user_id, gen: int, view_name: str, query_params) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(query_params.lists()))
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+    return f"entries:resp:{user_id}:{gen}:{view_name}:{digest}"
+
+
+def _from_cache(request, payload: Dict[str, Any]):
+    headers = payload["headers"]
+    if "ETag" in headers or "Last-Modified" in headers:
+        django_request = getattr(request, "_request", request)
+        not_modified = get_conditional_response(
+            django_request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(headers.get("Last-Modified")),
+        )
+        if not_modified is not None:
+            _incr("not_modified")
+            for name, value in headers.items():
+                not_modified[name] = value
+            return not_modified
+
+    response = Response(payload["data"])
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def cached_per_user(view_name: str):
+    """
+    EntryViewSet 메서드용 데코레이터. 200 응답만 캐시한다.
+    뷰셋에 get_owner() 가 있어야 한다.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if isinstance(_cache(), DummyCache):
+                return func(self, request, *args, **kwargs)
+            user_id = self.get_owner().pk
+            # 세대는 계산 "전에" 읽는다 → 계산 중 수정이 일어나면 그 결과는 옛 세대 키에만 남는다
+            gen = get_generation(user_id)
+            key = _response_key(user_id, gen, view_name, request.query_params)
+
+            payload = _cache().get(key)
+            if payload is not None:
+                _incr("hits")
+                return _from_cache(request, payload)
+
+            _incr("misses")
+            response = func(self, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                _cache().set(key, {
+                    "data": response.data,
+                    "headers": {h: response[h] for h in CACHED_HEADERS if h in response},
+                })
+            return response
+
+        return wrapper
+
+    return decorator
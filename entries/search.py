@@ -0,0 +1,146 @@
+# entries/search.py
+"""
+일기 전문 검색 (title / original_text / corrected_text).
+
+- MySQL: FULLTEXT INDEX ... WITH PARSER ngram (기본 ngram_token_size=2 → 한국어 두 글자 단어도 검색됨)
+         MATCH ... AGAINST (NATURAL LANGUAGE MODE) 점수 순
+- SQLite(로컬): FTS5 외부 콘텐츠 테이블 + trigram 토크나이저, bm25 순
+         trigram 은 3글자 미만 검색어를 못 찾으므로 그때만 원본 테이블에 LIKE
+- 그 외 DB: icontains (인덱스 없음)
+인덱스/트리거는 마이그레이션 0010_entry_search 에서 만든다.
+"""
+from __future__ import annotations
+import os
+from typing import List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Entry
+
+SEARCH_PAGE_SIZE = int(os.getenv("ENTRY_SEARCH_PAGE_SIZE", "20"))
+MAX_QUERY_LENGTH = 100
+
+TABLE = Entry._meta.db_table
+FULLTEXT_INDEX = "entry_fulltext_idx"
+FTS_TABLE = f"{TABLE}_fts"
+SEARCH_COLUMNS = ("title", "original_text", "corrected_text")
+
+_MATCH = f"MATCH({', '.join(SEARCH_COLUMNS)}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+
+
+def normalize_query(q: str) -> str:
+    return " ".join((q or "").split())[:MAX_QUERY_LENGTH]
+
+
+def _fts5_query(q: str) -> str:
+    # 검색어를 토큰별 "..." 구문으로 감싸서 FTS5 문법(AND/OR/NEAR/* 등)으로 해석되지 않게 한다
+    return " ".join('"%s"' % token.replace('"', '""') for token in q.split())
+
+
+def _mysql(q, user_id, limit, offset) -> List[Tuple[int, float]]:
+    where, params = f"{_MATCH}", [q]
+    if user_id is not None:
+        where += " AND user_id = %s"
+        params.append(user_id)
+    sql = (
+        f"SELECT id, {_MATCH} AS score FROM {TABLE} WHERE {where} "
+        f"ORDER BY score DESC, date DESC, id DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [q, *params, limit, offset])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _sqlite(q, user_id, limit, offset) -> List[Tuple[int, float]]:
+    tokens = q.split()
+    if all(len(token) >= 3 for token in tokens):
+        sql = (
+            # bm25 는 작을수록 관련도 높음
+            f"SELECT e.id, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"JOIN {TABLE} e ON e.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [_fts5_query(q)]
+    else:
+        # 짧은 검색어는 원본 테이블 LIKE (로컬 전용이라 풀스캔 허용)
+        sql, params = f"SELECT e.id, 0.0 AS score FROM {TABLE} e WHERE 1 = 1", []
+        for token in tokens:
+            escaped = token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql += " AND (" + " OR ".join(f"e.{c} LIKE %s ESCAPE '\\'" for c in SEARCH_COLUMNS) + ")"
+            params += [f"%{escaped}%"] * len(SEARCH_COLUMNS)
+
+    if user_id is not None:
+        sql += " AND e.user_id = %s"
+        params.append(user_id)
+    sql += " ORDER BY score DESC, e.date DESC, e.id DESC LIMIT %s OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit, offset])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _fallback(q, user_id, limit, offset) -> List[Tuple[int, float]]:
+    qs = Entry.objects.all()
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+    for token in q.split():
+        qs = qs.filter(
+            Q(title__icontains=token) | Q(original_text__icontains=token) | Q(corrected_text__icontains=token)
+        )
+    ids = qs.order_by("-date", "-id").values_list("id", flat=True)[offset: offset + limit]
+    return [(entry_id, 0.0) for entry_id in ids]
+
+
+def search_entry_ids(q: str, *, user_id: Optional[int] = None, limit: int = SEARCH_PAGE_SIZE, offset: int = 0):
+    """
+    관련도 순 (entry_id, score) 목록. user_id 가 None 이면 전체 (admin 용).
+    """
+    q = normalize_query(q)
+    if not q:
+        return []
+    if connection.vendor == "mysql":
+        return _mysql(q, user_id, limit, offset)
+    if connection.vendor == "sqlite":
+        return _sqlite(q, user_id, limit, offset)
+    return _fallback(q, user_id, limit, offset)
+
+
+# ---- 인덱스 설치 / 제거 (rebuild_search_index 커맨드에서 사용, 마이그레이션 0010 에는 같은 내용의 사본) ----
+
+def _sqlite_trigger_sql() -> List[str]:
+    cols = ", ".join(SEARCH_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    insert = f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new});"
+    delete = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    return [
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN {insert} END",
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN {delete} END",
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {cols} ON {TABLE} BEGIN {delete} {insert} END",
+    ]
+
+
+def install_search_index(schema_editor) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} "
+            f"({', '.join(SEARCH_COLUMNS)}) WITH PARSER ngram"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"{', '.join(SEARCH_COLUMNS)}, content='{TABLE}', content_rowid='id', tokenize='trigram')"
+        )
+        for sql in _sqlite_trigger_sql():
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(schema_editor) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {TABLE} DROP INDEX {FULLTEXT_INDEX}")
+    elif vendor == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
@@ -1,6 +1,6 @@
 # entries/serializers.py
 from rest_framework import serializers
-from .models import Entry
+from .models import Entry, VocabItem
 
 class EntryCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,3 +33,9 @@ class EntryListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Entry
         fields = ["id", "date", "title", "meta"]
+
+
+class VocabItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VocabItem
+        fields = ["id", "word", "meaning_ko", "example_en", "first_entry", "first_seen", "last_seen"]
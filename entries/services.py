@@ -1,14 +1,37 @@
 from __future__ import annotations
-import os, json
+import asyncio, os, json, math, weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from typing import Any, Dict
-from openai import OpenAI, RateLimitError, APIError
+from django.db import connection
+from openai import AsyncOpenAI, OpenAI, RateLimitError, APIError
 from rest_framework.response import Response
 from rest_framework import status
 
-client = OpenAI()
+from .chunking import ANALYSIS_CHUNK_CONCURRENCY, estimate_tokens, merge_analyses, output_budget, split_text
+from .models import Entry, compute_content_hash, extract_corrected_text, extract_score
+from .admission import Overloaded, get_limiter
+from .resilience import RETRYABLE_ERRORS, CircuitOpenError, acall_with_retry, call_with_retry, get_breaker
+from .response_cache import bump_generation
+from .stats import apply_entry_changes, dates_by_user
+from .vocab import upsert_vocab
+
+import logging
+logger = logging.getLogger(__name__)
+
+# SDK 자체 재시도는 끄고 entries.resilience 에서만 재시도 (재시도 횟수가 곱해지지 않게)
+client = OpenAI(max_retries=0)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+openai_breaker = get_breaker("openai")
+# LLM 호출 동시 실행 한도 (넘치면 바로 503 → 워커 스레드가 OpenAI 대기로 다 묶이지 않게)
+analysis_limiter = get_limiter("openai")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "20"))
 
+# SYSTEM_INSTRUCTION / 언어별 규칙(_BEHAVIOR_*) / build_prompt 내용을 바꾸면 반드시 이 값을 올릴 것
+# (분석 캐시 키에 포함되므로, 올리지 않으면 예전 프롬프트 결과가 그대로 재사용된다)
+PROMPT_VERSION = "2025-11-v2"
+
 # ✅ 시스템 인스트럭션 업데이트
 # - score 필드 포함
 # - 전체 JSON 스키마를 명확히 못 박음
@@ -28,6 +51,105 @@ SYSTEM_INSTRUCTION = (
     "- Do not add extra keys.\n"
 )
 
+# ---- 프롬프트 레이아웃 (프리픽스 캐싱용) ----
+# OpenAI 는 앞부분이 똑같은 프롬프트의 입력 토큰을 자동으로 캐시한다 (1024토큰 이상, 128토큰 단위).
+# 그래서 바뀌지 않는 부분(SYSTEM_INSTRUCTION + 언어별 규칙)은 전부 system 메시지에 언어별로 미리 만들어 두고,
+# 일기마다 달라지는 메타/제목/본문은 user 메시지(build_prompt)에 맨 뒤로 보낸다.
+# 글자 하나만 바뀌어도 캐시가 깨지므로 system_prompt() 결과에는 시각/유저 정보 등을 절대 넣지 말 것.
+
+# 영어로 쓴 일기인 경우:
+# - translation => 한국어 의역
+# - corrections => 더 자연스러운 영어 + 한국어 설명
+# - vocab_suggestions => 이 상황에서 써볼만한 추가 표현
+# - score => 0~100 / 한국어 피드백
+_BEHAVIOR_EN = (
+    "1. translation:\n"
+    '   - Set \"to\" to \"ko\".\n'
+    "   - \"text\": 위 영어 일기의 전체 의미를 한국어로 자연스럽게 설명식으로 풀어쓴 문장.\n"
+    "     (직역 금지. 필자의 감정/상황/의도까지 살려서 한국어로 말해줄 것.)\n\n"
+
+    "2. corrections:\n"
+    "   - \"corrected\": 원문 영어를 더 자연스럽고 정확하게 고친 영어 버전.\n"
+    "   - \"explanations\": 왜 그렇게 바꿨는지 한국어로 짧게 bullet 형식 설명.\n"
+    "     한국어로 답하고, 너무 길게 쓰지 말 것.\n\n"
+
+    "3. vocab_suggestions:\n"
+    "   - 사용자가 앞으로 비슷한 상황/기분/맥락에서 써볼 만한 자연스러운 영어 표현 3~5개를 제안.\n"
+    "   - 원문에 없던 표현도 적극 추천해도 된다.\n"
+    "   - 각 아이템은 {\"word\": 표현(단어/구/문장형 가능), \"meaning_ko\": 한국어 의미/뉘앙스, \"example_en\": 그 표현을 실제로 사용하는 짧은 영어 예문}.\n"
+    "   - 예문은 일기 톤(1인칭, 감정 묘사)으로 작성.\n\n"
+
+    "4. score:\n"
+    "   - \"value\": 0~100 사이 정수. 문법 정확도, 표현 자연스러움, 감정/상황 묘사의 구체성 세 가지를 기준으로 점수화.\n"
+    "   - \"comment_ko\": 잘한 점을 한국어로 짧게 칭찬하고 요약해줄 것.\n"
+    "   - \"focus_next_time\": 다음 일기에서 한 가지만 더 신경 쓰면 좋은 포인트를 한국어 한 줄로 제시.\n"
+)
+
+# 한국어로 쓴 일기인 경우:
+# - translation => 자연스러운 영어 번역
+# - corrections => 그 번역을 한 단계 더 네이티브스럽게 다듬은 버전 + 이유
+# - vocab_suggestions => 이 상황에서 자주 쓰는 표현 추천
+# - score => 영어로 표현하려고 한 시도까지 평가
+_BEHAVIOR_KO = (
+    "1. translation:\n"
+    '   - Set \"to\" to \"en\".\n'
+    "   - \"text\": 한국어 원문의 자연스러운 영어 번역. 말투는 일기(1인칭) 스타일을 유지.\n"
+    "     너무 딱딱한 비즈니스 영어 말고, 내가 실제로 겪은 하루를 얘기하는 느낌으로.\n\n"
+
+    "2. corrections:\n"
+    "   - \"corrected\": 위 번역문을 원어민이 다듬은 것처럼 더 자연스럽게 수정한 최종 영어 버전.\n"
+    "   - \"explanations\": 주요 수정 포인트를 한국어로 bullet 형태로 짧게 설명.\n\n"
+
+    "3. vocab_suggestions:\n"
+    "   - 사용자가 앞으로 비슷한 상황/감정/맥락에서 써볼 만한 자연스러운 영어 표현 3~5개를 제안.\n"
+    "   - 꼭 원문에 있던 단어일 필요는 없다.\n"
+    "   - 각 아이템은 {\"word\": 표현(단어/구/문장형 가능), \"meaning_ko\": 한국어 의미/뉘앙스, \"example_en\": 그 표현을 실제로 사용하는 짧은 영어 예문}.\n"
+    "   - 예문은 일기 말투(내 얘기)로 작성할 것.\n\n"
+
+    "4. score:\n"
+    "   - \"value\": 0~100 사이 정수. 영어로 감정을 표현하려는 시도, 구체성, 자연스러움 가능성 등을 기준으로 점수화.\n"
+    "   - \"comment_ko\": 한국어로 짧게 칭찬하고, 특히 좋았던 부분을 알려줄 것.\n"
+    "   - \"focus_next_time\": 다음에 한 가지만 더 의식하면 좋을 포인트를 한국어 한 줄로.\n"
+)
+
+_LANG_NOTES = {"en": "원문 언어: 영어", "ko": "원문 언어: 한국어"}
+_BEHAVIORS = {"en": _BEHAVIOR_EN, "ko": _BEHAVIOR_KO}
+
+# 언어별로 한 번만 조립해 두는 고정 프리픽스 (버전 표기도 여기에 → 버전이 바뀌면 캐시도 같이 갈린다)
+SYSTEM_PROMPTS = {
+    lang: (
+        f"{SYSTEM_INSTRUCTION}\n"
+        f"[prompt {PROMPT_VERSION}/{lang}]\n"
+        f"{_LANG_NOTES[lang]}\n"
+        "아래 규칙에 따라 반드시 지정된 JSON 형태로만 답하세요.\n\n"
+        f"{_BEHAVIORS[lang]}"
+    )
+    for lang in ("en", "ko")
+}
+
+
+def system_prompt(original_lang: str) -> str:
+    # 기존 동작과 같이 en 이 아니면 전부 한국어 규칙
+    return SYSTEM_PROMPTS["en" if original_lang == "en" else "ko"]
+
+
+def prompt_cache_key(original_lang: str) -> str:
+    """같은 프리픽스 요청이 같은 캐시 서버로 라우팅되도록 주는 힌트"""
+    return f"diary-analysis:{PROMPT_VERSION}:{'en' if original_lang == 'en' else 'ko'}"
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    이벤트 루프마다 AsyncOpenAI 하나 (httpx 커넥션 풀이 루프에 묶여 있어서 루프끼리 공유하면 안 된다).
+    ASGI 워커는 루프가 하나라 사실상 프로세스 공용, WSGI 에서 async_to_sync 로 돌면 요청마다 새로 만든다.
+    """
+    loop = asyncio.get_running_loop()
+    aclient = _async_clients.get(loop)
+    if aclient is None:
+        aclient = _async_clients[loop] = AsyncOpenAI(max_retries=0)
+    return aclient
+
+
 def build_prompt(
     original_lang: str,
     original_text: str,
@@ -35,83 +157,15 @@ def build_prompt(
     meta: dict | None = None
 ) -> str:
     """
+    user 메시지 (일기마다 달라지는 부분만). 고정 규칙은 system_prompt(original_lang) 에 있다.
     original_lang: 'en' | 'ko'
     original_text: user's diary body
     title: optional diary title
     meta: things like mood/weather
     """
-
-    meta_line = f"메타데이터: {json.dumps(meta or {}, ensure_ascii=False)}"
-    title_line = f"제목: {title or '(없음)'}"
-
-    # ✅ 언어별로 behavior를 갈라서, 모델이 헷갈리지 않게 한다.
-    if original_lang == "en":
-        lang_note = "원문 언어: 영어"
-
-        # 영어로 쓴 일기인 경우:
-        # - translation => 한국어 의역
-        # - corrections => 더 자연스러운 영어 + 한국어 설명
-        # - vocab_suggestions => 이 상황에서 써볼만한 추가 표현
-        # - score => 0~100 / 한국어 피드백
-        behavior = (
-            "1. translation:\n"
-            '   - Set \"to\" to \"ko\".\n'
-            "   - \"text\": 위 영어 일기의 전체 의미를 한국어로 자연스럽게 설명식으로 풀어쓴 문장.\n"
-            "     (직역 금지. 필자의 감정/상황/의도까지 살려서 한국어로 말해줄 것.)\n\n"
-
-            "2. corrections:\n"
-            "   - \"corrected\": 원문 영어를 더 자연스럽고 정확하게 고친 영어 버전.\n"
-            "   - \"explanations\": 왜 그렇게 바꿨는지 한국어로 짧게 bullet 형식 설명.\n"
-            "     한국어로 답하고, 너무 길게 쓰지 말 것.\n\n"
-
-            "3. vocab_suggestions:\n"
-            "   - 사용자가 앞으로 비슷한 상황/기분/맥락에서 써볼 만한 자연스러운 영어 표현 3~5개를 제안.\n"
-            "   - 원문에 없던 표현도 적극 추천해도 된다.\n"
-            "   - 각 아이템은 {\"word\": 표현(단어/구/문장형 가능), \"meaning_ko\": 한국어 의미/뉘앙스, \"example_en\": 그 표현을 실제로 사용하는 짧은 영어 예문}.\n"
-            "   - 예문은 일기 톤(1인칭, 감정 묘사)으로 작성.\n\n"
-
-            "4. score:\n"
-            "   - \"value\": 0~100 사이 정수. 문법 정확도, 표현 자연스러움, 감정/상황 묘사의 구체성 세 가지를 기준으로 점수화.\n"
-            "   - \"comment_ko\": 잘한 점을 한국어로 짧게 칭찬하고 요약해줄 것.\n"
-            "   - \"focus_next_time\": 다음 일기에서 한 가지만 더 신경 쓰면 좋은 포인트를 한국어 한 줄로 제시.\n"
-        )
-    else:
-        lang_note = "원문 언어: 한국어"
-
-        # 한국어로 쓴 일기인 경우:
-        # - translation => 자연스러운 영어 번역
-        # - corrections => 그 번역을 한 단계 더 네이티브스럽게 다듬은 버전 + 이유
-        # - vocab_suggestions => 이 상황에서 자주 쓰는 표현 추천
-        # - score => 영어로 표현하려고 한 시도까지 평가
-        behavior = (
-            "1. translation:\n"
-            '   - Set \"to\" to \"en\".\n'
-            "   - \"text\": 한국어 원문의 자연스러운 영어 번역. 말투는 일기(1인칭) 스타일을 유지.\n"
-            "     너무 딱딱한 비즈니스 영어 말고, 내가 실제로 겪은 하루를 얘기하는 느낌으로.\n\n"
-
-            "2. corrections:\n"
-            "   - \"corrected\": 위 번역문을 원어민이 다듬은 것처럼 더 자연스럽게 수정한 최종 영어 버전.\n"
-            "   - \"explanations\": 주요 수정 포인트를 한국어로 bullet 형태로 짧게 설명.\n\n"
-
-            "3. vocab_suggestions:\n"
-            "   - 사용자가 앞으로 비슷한 상황/감정/맥락에서 써볼 만한 자연스러운 영어 표현 3~5개를 제안.\n"
-            "   - 꼭 원문에 있던 단어일 필요는 없다.\n"
-            "   - 각 아이템은 {\"word\": 표현(단어/구/문장형 가능), \"meaning_ko\": 한국어 의미/뉘앙스, \"example_en\": 그 표현을 실제로 사용하는 짧은 영어 예문}.\n"
-            "   - 예문은 일기 말투(내 얘기)로 작성할 것.\n\n"
-
-            "4. score:\n"
-            "   - \"value\": 0~100 사이 정수. 영어로 감정을 표현하려는 시도, 구체성, 자연스러움 가능성 등을 기준으로 점수화.\n"
-            "   - \"comment_ko\": 한국어로 짧게 칭찬하고, 특히 좋았던 부분을 알려줄 것.\n"
-            "   - \"focus_next_time\": 다음에 한 가지만 더 의식하면 좋을 포인트를 한국어 한 줄로.\n"
-        )
-
-    # 실제 모델 입력 프롬프트
     return (
-        f"{lang_note}\n"
-        "아래 규칙에 따라 반드시 지정된 JSON 형태로만 답하세요.\n\n"
-        f"{behavior}\n"
-        f"{meta_line}\n"
-        f"{title_line}\n\n"
+        f"메타데이터: {json.dumps(meta or {}, ensure_ascii=False)}\n"
+        f"제목: {title or '(없음)'}\n\n"
         "---\n"
         "원문 시작\n"
         f"{original_text}\n"
@@ -120,6 +174,30 @@ def build_prompt(
     )
 
 
+def log_usage(usage, original_lang: str) -> None:
+    """
+    응답 usage 의 캐시된 입력 토큰 수를 로그로 남긴다 (프리픽스 캐시 적중률 확인용).
+    Responses API (input_tokens_details) / Chat Completions (prompt_tokens_details) 둘 다 처리.
+    """
+    if usage is None:
+        return
+    input_tokens = getattr(usage, "input_tokens", None)
+    details = getattr(usage, "input_tokens_details", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+        details = getattr(usage, "prompt_tokens_details", None)
+    output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", 0)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    ratio = cached / input_tokens if input_tokens else 0.0
+    logger.info(
+        "[openai-usage] prompt=%s lang=%s input=%s cached=%s (%.0f%%) output=%s",
+        PROMPT_VERSION, original_lang, input_tokens, cached, ratio * 100, output_tokens,
+    )
+
+
+_SECTION_TYPES = {"translation": {}, "corrections": {}, "vocab_suggestions": [], "score": {}}
+
+
 def _parse_json(text: str) -> Dict[str, Any]:
     """
     모델이 준 응답 문자열(text)을 JSON으로 파싱.
@@ -130,16 +208,239 @@ def _parse_json(text: str) -> Dict[str, Any]:
     except Exception:
         # 완전 망한 경우라도 raw는 남겨서 디버깅 가능하게
         data = {"raw": text}
+    if not isinstance(data, dict):
+        data = {"raw": text}
 
-    # 기본 필드들 강제 세팅 (없으면 빈값으로라도)
-    data.setdefault("translation", {})
-    data.setdefault("corrections", {})
-    data.setdefault("vocab_suggestions", [])
-    data.setdefault("score", {})
+    # 기본 필드들 강제 세팅 (없거나 형식이 다르면 빈값으로라도. 예: "translation": null, "score": 85)
+    for key, empty in _SECTION_TYPES.items():
+        if not isinstance(data.get(key), type(empty)):
+            data[key] = empty.copy()
 
     return data
 
 
+class SectionStreamParser:
+    """
+    스트리밍으로 들어오는 JSON 텍스트를 조각(chunk) 단위로 받아서,
+    최상위 키(translation / corrections / vocab_suggestions / score)의 값이
+    완성되는 즉시 (key, value) 로 꺼내준다.
+
+    문자열/이스케이프/중첩 깊이만 추적하는 단순 스캐너라서
+    전체 텍스트를 다시 파싱하지 않는다.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._key: str | None = None
+        self._value_start: int | None = None
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        self.text += chunk
+        text = self.text
+        done: list[tuple[str, Any]] = []
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    # 최상위에서 값보다 먼저 나온 문자열 = 키
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = json.loads(text[self._str_start:i + 1])
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                self._str_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text, i, done)
+            elif ch == ":" and self._depth == 1 and self._value_start is None:
+                self._value_start = i + 1
+            elif ch == "," and self._depth == 1:
+                self._emit(text, i, done)
+
+        self._pos = len(text)
+        return done
+
+    def _emit(self, text: str, end: int, done: list) -> None:
+        if self._key is not None and self._value_start is not None:
+            try:
+                done.append((self._key, json.loads(text[self._value_start:end])))
+            except ValueError:
+                pass
+        self._key = None
+        self._value_start = None
+
+
+def _stream_kwargs(original_lang: str, prompt: str):
+    """_request_kwargs 의 스트리밍 버전 (chat 은 마지막 청크에 usage 가 실려 오게)"""
+    responses_kwargs, chat_kwargs = _request_kwargs(original_lang, prompt)
+    return (
+        {**responses_kwargs, "stream": True},
+        {**chat_kwargs, "stream": True, "stream_options": {"include_usage": True}},
+    )
+
+
+def _response_event_delta(event, original_lang: str):
+    """Responses API 스트림 이벤트 → 텍스트 delta (없으면 None). 완료 이벤트면 usage 로그"""
+    kind = getattr(event, "type", "")
+    if kind == "response.output_text.delta":
+        return event.delta
+    if kind == "response.completed":
+        log_usage(getattr(event.response, "usage", None), original_lang)
+    return None
+
+
+def _chat_chunk_delta(chunk, original_lang: str):
+    if getattr(chunk, "usage", None):
+        log_usage(chunk.usage, original_lang)
+    if chunk.choices and chunk.choices[0].delta.content:
+        return chunk.choices[0].delta.content
+    return None
+
+
+def _stream_text_deltas(prompt: str, original_lang: str):
+    """모델 출력 텍스트를 delta 단위로 yield (Responses API 우선, 구버전 SDK면 chat 폴백)"""
+    responses_kwargs, chat_kwargs = _stream_kwargs(original_lang, prompt)
+    # 재시도는 스트림을 여는 요청까지만 (이미 내보낸 delta 는 되돌릴 수 없으므로)
+    try:
+        stream = call_with_retry(lambda: client.responses.create(**responses_kwargs), openai_breaker)
+    except TypeError:
+        stream = None
+
+    if stream is not None:
+        for event in stream:
+            delta = _response_event_delta(event, original_lang)
+            if delta:
+                yield delta
+        return
+
+    chunks = call_with_retry(lambda: client.chat.completions.create(**chat_kwargs), openai_breaker)
+    for chunk in chunks:
+        delta = _chat_chunk_delta(chunk, original_lang)
+        if delta:
+            yield delta
+
+
+async def _astream_text_deltas(prompt: str, original_lang: str):
+    """_stream_text_deltas 의 async 버전 (AsyncOpenAI 스트림)"""
+    responses_kwargs, chat_kwargs = _stream_kwargs(original_lang, prompt)
+    aclient = get_async_client()
+    try:
+        stream = await acall_with_retry(lambda: aclient.responses.create(**responses_kwargs), openai_breaker)
+    except TypeError:
+        stream = None
+
+    if stream is not None:
+        async for event in stream:
+            delta = _response_event_delta(event, original_lang)
+            if delta:
+                yield delta
+        return
+
+    chunks = await acall_with_retry(lambda: aclient.chat.completions.create(**chat_kwargs), openai_breaker)
+    async for chunk in chunks:
+        delta = _chat_chunk_delta(chunk, original_lang)
+        if delta:
+            yield delta
+
+
+def stream_analysis_with_openai(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+):
+    """
+    analyze_with_openai 의 스트리밍 버전 (제너레이터).
+
+    yield 하는 값:
+      ("section", key, value) - 최상위 섹션 하나가 완성될 때마다
+      ("done", None, data)    - 전체 결과 (_parse_json 통과한 dict)
+      ("error", status, body) - OpenAI 에러 (429 / 502 / 브레이커 open 이나 동시 실행 한도 초과면 503)
+    """
+    prompt = build_prompt(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+    parser = SectionStreamParser()
+
+    try:
+        # 스트림이 끝나거나 클라이언트가 끊길 때까지 슬롯을 잡고 있는다
+        with analysis_limiter.slot() as slot:
+            try:
+                for delta in _stream_text_deltas(prompt, original_lang):
+                    for key, value in parser.feed(delta):
+                        yield ("section", key, value)
+            except (CircuitOpenError, APIError) as e:
+                _mark_slot_error(slot, e)
+                raise
+    except (Overloaded, CircuitOpenError, APIError) as e:
+        yield _stream_error(e)
+        return
+
+    yield ("done", None, _parse_json(parser.text))
+
+
+async def astream_analysis_with_openai(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+):
+    """
+    stream_analysis_with_openai 의 async 버전 (async 제너레이터, ASGI 의 analyze?stream=1 용).
+    yield 하는 값 / 동시 실행 한도 / 재시도 / 브레이커는 동기 버전과 같다.
+    """
+    prompt = build_prompt(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+    parser = SectionStreamParser()
+
+    try:
+        async with analysis_limiter.aslot() as slot:
+            try:
+                async for delta in _astream_text_deltas(prompt, original_lang):
+                    for key, value in parser.feed(delta):
+                        yield ("section", key, value)
+            except (CircuitOpenError, APIError) as e:
+                _mark_slot_error(slot, e)
+                raise
+    except (Overloaded, CircuitOpenError, APIError) as e:
+        yield _stream_error(e)
+        return
+
+    yield ("done", None, _parse_json(parser.text))
+
+
+def _stream_error(e: Exception):
+    """스트리밍 중 예외 → ("error", status, body)"""
+    if isinstance(e, Overloaded):
+        return ("error", status.HTTP_503_SERVICE_UNAVAILABLE, overloaded_body(e))
+    resp = _openai_error_response(e)
+    return ("error", resp.status_code, resp.data)
+
+
 def analyze_with_openai(
     *,
     original_lang: str,
@@ -155,60 +456,334 @@ def analyze_with_openai(
     리턴: dict (analysis 결과)
     정상일 땐 dict 형태의 분석결과(JSON) 그대로 반환
     에러일 땐 DRF Response 반환 (429, 502 등)
+
+    ANALYSIS_CHUNK_TOKENS 보다 긴 일기는 문단/문장 단위로 나눠 병렬로 분석한 뒤 하나로 합친다
+    (지연 시간 = 가장 느린 조각 하나, 출력 토큰 한도에 걸려 JSON 이 잘리는 일도 없음)
+
+    동시 실행 한도(analysis_limiter)가 차 있으면 OpenAI 를 부르지 않고 바로 503 + Retry-After.
+    """
+    try:
+        with analysis_limiter.slot() as slot:
+            result = _analyze_chunks(
+                original_lang=original_lang, original_text=original_text, title=title, meta=meta
+            )
+            _mark_slot(slot, result)
+            return result
+    except Overloaded as e:
+        return _overloaded_response(e)
+
+
+async def aanalyze_with_openai(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+) -> Dict[str, Any]:
     """
+    analyze_with_openai 의 async 버전 (ASGI 뷰용).
+    리턴 형식 / 조각 나누기 / 동시 실행 한도 / 재시도 / 브레이커는 동기 버전과 같다 (한도와 브레이커는 공유).
+    """
+    try:
+        async with analysis_limiter.aslot() as slot:
+            result = await _aanalyze_chunks(
+                original_lang=original_lang, original_text=original_text, title=title, meta=meta
+            )
+            _mark_slot(slot, result)
+            return result
+    except Overloaded as e:
+        return _overloaded_response(e)
+
+
+def _mark_slot(slot, result) -> None:
+    if isinstance(result, Response):
+        # 업스트림 과부하(429 / 5xx / 타임아웃 / 연결 실패)만 한도를 줄인다.
+        # 브레이커 open(503)이나 400/401/404 같은 요청 오류는 지연과 무관하므로 무시
+        if getattr(result, "upstream_overloaded", False):
+            slot.drop()
+        else:
+            slot.ignore()
+
+
+def _mark_slot_error(slot, e: Exception) -> None:
+    """스트리밍 중 예외로 끝난 슬롯 표시 (_mark_slot 의 예외 버전)"""
+    if isinstance(e, RETRYABLE_ERRORS):
+        slot.drop()
+    else:
+        slot.ignore()
+
+
+def _analyze_chunks(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+) -> Dict[str, Any]:
+    """한도 안에서 실행되는 실제 분석 (긴 일기는 조각별 병렬 호출 후 합치기)"""
+    chunks = split_text(original_text)
+    if len(chunks) == 1:
+        return _analyze_once(
+            original_lang=original_lang, original_text=original_text, title=title, meta=meta
+        )
+
+    def analyze_chunk(chunk: str):
+        return _analyze_once(original_lang=original_lang, original_text=chunk, title=title, meta=meta)
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), ANALYSIS_CHUNK_CONCURRENCY)) as pool:
+        parts = list(pool.map(analyze_chunk, chunks))
+    return _merge_chunks(parts, chunks, original_text)
+
+
+async def _aanalyze_chunks(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+) -> Dict[str, Any]:
+    chunks = split_text(original_text)
+    if len(chunks) == 1:
+        return await _aanalyze_once(
+            original_lang=original_lang, original_text=original_text, title=title, meta=meta
+        )
 
+    semaphore = asyncio.Semaphore(ANALYSIS_CHUNK_CONCURRENCY)
+
+    async def analyze_chunk(chunk: str):
+        async with semaphore:
+            return await _aanalyze_once(original_lang=original_lang, original_text=chunk, title=title, meta=meta)
+
+    parts = await asyncio.gather(*(analyze_chunk(c) for c in chunks))
+    return _merge_chunks(list(parts), chunks, original_text)
+
+
+def _merge_chunks(parts, chunks, original_text: str):
+    # 한 조각이라도 OpenAI 에러면 그 에러를 그대로 (부분 결과는 저장하지 않는다)
+    for part in parts:
+        if isinstance(part, Response):
+            return part
+
+    logger.info("[analyze] split into %s chunks (%s chars)", len(chunks), len(original_text))
+    return merge_analyses(parts, [estimate_tokens(c) for c in chunks])
+
+
+def _request_kwargs(original_lang: str, prompt: str):
+    """리턴: (Responses API 인자, chat.completions 인자). 출력 한도는 입력 길이에 맞춰 잡는다"""
+    max_tokens = output_budget(estimate_tokens(prompt))
+    responses_kwargs = dict(
+        model=OPENAI_MODEL,
+        instructions=system_prompt(original_lang),  # 고정 프리픽스 (언어별로 미리 조립됨)
+        input=prompt,  # 일기마다 달라지는 부분
+        timeout=OPENAI_TIMEOUT,
+        text={"format": {"type": "json_object"}},  # 신형 SDK에서 지원되는 구조
+        max_output_tokens=max_tokens,
+        prompt_cache_key=prompt_cache_key(original_lang),
+    )
+    chat_kwargs = dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt(original_lang)},
+            {"role": "user", "content": prompt},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+        max_completion_tokens=max_tokens,
+        timeout=OPENAI_TIMEOUT,
+    )
+    return responses_kwargs, chat_kwargs
+
+
+def _analyze_once(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+) -> Dict[str, Any]:
+    """OpenAI 호출 한 번"""
     prompt = build_prompt(
         original_lang=original_lang,
         original_text=original_text,
         title=title,
         meta=meta,
     )
+    responses_kwargs, chat_kwargs = _request_kwargs(original_lang, prompt)
 
-    # 1) Responses API 우선 사용
     try:
-        resp = client.responses.create(
-            model=OPENAI_MODEL,
-            instructions=SYSTEM_INSTRUCTION,
-            input=prompt,
-            timeout=OPENAI_TIMEOUT,
-            response_format={"type": "json_object"},  # 신형 SDK에서 지원되는 구조
-            max_output_tokens=800,
-        )
+        # 1) Responses API 우선 사용 (재시도 / 브레이커는 call_with_retry 가 담당)
+        try:
+            resp = call_with_retry(lambda: client.responses.create(**responses_kwargs), openai_breaker)
+        except TypeError:
+            # 2) 구버전 SDK 환경이면 chat.completions로 폴백
+            chat = call_with_retry(lambda: client.chat.completions.create(**chat_kwargs), openai_breaker)
+            log_usage(chat.usage, original_lang)
+            return _parse_json(chat.choices[0].message.content or "")
 
+        log_usage(resp.usage, original_lang)
         # SDK 응답에서 모델 답변 텍스트 뽑아서 파싱
         return _parse_json(resp.output_text)
 
-    except TypeError:
-        # 2) 구버전 SDK 환경이면 chat.completions로 폴백
-        chat = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_INSTRUCTION},
-                {"role": "user", "content": prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-        )
+    except (CircuitOpenError, APIError) as e:
+        return _openai_error_response(e)
 
-        text = chat.choices[0].message.content or ""
-        return _parse_json(text)
 
-    except RateLimitError:
-        # OpenAI 요청 과금/쿼터 제한 등
+async def _aanalyze_once(
+    *,
+    original_lang: str,
+    original_text: str,
+    title: str | None = None,
+    meta: dict | None = None
+) -> Dict[str, Any]:
+    """_analyze_once 의 async 버전 (AsyncOpenAI)"""
+    prompt = build_prompt(
+        original_lang=original_lang,
+        original_text=original_text,
+        title=title,
+        meta=meta,
+    )
+    responses_kwargs, chat_kwargs = _request_kwargs(original_lang, prompt)
+    aclient = get_async_client()
+
+    try:
+        try:
+            resp = await acall_with_retry(lambda: aclient.responses.create(**responses_kwargs), openai_breaker)
+        except TypeError:
+            chat = await acall_with_retry(lambda: aclient.chat.completions.create(**chat_kwargs), openai_breaker)
+            log_usage(chat.usage, original_lang)
+            return _parse_json(chat.choices[0].message.content or "")
+
+        log_usage(resp.usage, original_lang)
+        return _parse_json(resp.output_text)
+
+    except (CircuitOpenError, APIError) as e:
+        return _openai_error_response(e)
+
+
+def _openai_error_response(e: Exception) -> Response:
+    if isinstance(e, CircuitOpenError):
+        # 최근 실패가 많아 업스트림 호출 자체를 건너뜀 (타임아웃까지 기다리지 않고 바로 실패)
         return Response(
+            circuit_open_body(e),
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(math.ceil(e.retry_after) or 1)},
+        )
+
+    if isinstance(e, RateLimitError):
+        # OpenAI 요청 과금/쿼터 제한 등 (재시도 후에도 실패)
+        resp = Response(
             {
                 "detail": "OpenAI API 사용 한도를 초과했습니다. Billing 상태를 확인해주세요.",
                 "code": "rate_limited",
             },
             status=status.HTTP_429_TOO_MANY_REQUESTS,
         )
-
-    except APIError as e:
-        # OpenAI 쪽 장애나 네트워크 이슈 등
-        return Response(
+    else:
+        # OpenAI 쪽 장애나 네트워크 이슈 등 (잘못된 요청 / 인증 오류도 클라이언트에겐 502)
+        resp = Response(
             {
                 "detail": f"OpenAI API 오류: {getattr(e, 'message', str(e))}",
                 "code": "openai_error",
             },
             status=status.HTTP_502_BAD_GATEWAY,
         )
+    # 동시 실행 한도를 줄일 신호인지 (_mark_slot). 본문에는 넣지 않는다
+    resp.upstream_overloaded = isinstance(e, RETRYABLE_ERRORS)
+    return resp
+
+
+def _overloaded_response(e: Overloaded) -> Response:
+    return Response(
+        overloaded_body(e),
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def circuit_open_body(e: CircuitOpenError) -> Dict[str, Any]:
+    return {
+        "detail": "분석 서버가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.",
+        "code": "upstream_unavailable",
+        "retry_after": math.ceil(e.retry_after),
+    }
+
+
+def overloaded_body(e: Overloaded) -> Dict[str, Any]:
+    return {
+        "detail": "분석 요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+        "code": "overloaded",
+        "retry_after": e.retry_after,
+    }
+
+
+def save_analysis(entry, data: Dict[str, Any]) -> None:
+    """
+    분석 결과를 Entry.analysis 에 저장.
+    (동기 analyze / 비동기 워커 등 모든 저장 경로가 여기를 거친다)
+    """
+    entry.analysis = data
+    entry.analysis_version = PROMPT_VERSION
+    entry.save(update_fields=["analysis", "analysis_version", "updated_at"])
+    upsert_vocab([entry])
+
+
+def bulk_save_analyses(pairs) -> int:
+    """
+    save_analysis 의 일괄 버전 (백필 / Batch API 결과 반영용).
+    pairs: (entry, data) 목록. entry 는 id / user_id / date 만 로드돼 있어도 된다.
+    bulk_update 는 post_save 를 타지 않으므로 응답 캐시 세대도 여기서 올린다.
+    """
+    now = datetime.now()
+    entries = []
+    for entry, data in pairs:
+        entry.analysis = data
+        entry.analysis_version = PROMPT_VERSION
+        entry.corrected_text = extract_corrected_text(data)  # bulk_update 는 save() 를 안 탄다
+        entry.score = extract_score(data)
+        entry.updated_at = now  # bulk_update 는 auto_now 를 채워주지 않는다
+        entries.append(entry)
+    if not entries:
+        return 0
+
+    Entry.objects.bulk_update(
+        entries, ["analysis", "analysis_version", "corrected_text", "score", "updated_at"]
+    )
+    upsert_vocab(entries)
+    for user_id, dates in dates_by_user(entries).items():
+        bump_generation(user_id)
+        apply_entry_changes(user_id, scored=dates)
+    return len(entries)
+
+
+def upsert_entry(user, entry_date: date, fields: Dict[str, Any]) -> int:
+    """
+    (user, date) 기준 INSERT ... ON DUPLICATE KEY UPDATE 한 번으로 저장하고 id 반환.
+    동시에 두 번 제출돼도 유니크 제약 덕분에 IntegrityError 없이 마지막 값으로 수렴한다.
+    fields: title / original_lang / original_text / meta
+    """
+    now = datetime.now()
+    obj = Entry(
+        user=user,
+        date=entry_date,
+        content_hash=compute_content_hash(
+            fields["title"], fields["original_lang"], fields["original_text"], fields["meta"]
+        ),
+        created_at=now,
+        updated_at=now,
+        **fields,
+    )
+    kwargs = {}
+    if connection.features.supports_update_conflicts_with_target:
+        # PostgreSQL / SQLite 는 ON CONFLICT (user_id, date) 대상 지정이 필요 (MySQL 은 불필요)
+        kwargs["unique_fields"] = ["user", "date"]
+    Entry.objects.bulk_create(
+        [obj],
+        update_conflicts=True,
+        update_fields=[*fields, "content_hash", "updated_at"],
+        **kwargs,
+    )
+    if obj.pk is None:
+        # MySQL 은 bulk_create 에서 pk 를 돌려주지 않는다 → 유니크 인덱스로 바로 조회
+        obj.pk = Entry.objects.filter(user=user, date=entry_date).values_list("id", flat=True).get()
+    apply_entry_changes(user.pk, added=[entry_date])  # bulk_create 는 post_save 를 안 탄다
+    return obj.pk
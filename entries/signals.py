@@ -0,0 +1,48 @@
+# entries/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Entry, EntryTombstone
+from .response_cache import bump_generation
+from .stats import apply_entry_changes
+
+# 이 필드들이 저장될 때만 통계(일기 쓴 날 / 월별 점수)가 바뀔 수 있다
+STATS_FIELDS = {"date", "analysis", "score"}
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def bump_entries_generation(sender, instance, **kwargs):
+    # 유저별 응답 캐시 무효화 (list / calendar / by-date)
+    bump_generation(instance.user_id)
+
+
+@receiver(post_delete, sender=Entry)
+def record_tombstone(sender, instance, **kwargs):
+    # 델타 싱크에서 "삭제됨" 으로 내려주기 위한 기록
+    EntryTombstone.objects.create(user_id=instance.user_id, entry_id=instance.id, date=instance.date)
+
+
+@receiver(pre_save, sender=Entry)
+def remember_previous_date(sender, instance, update_fields=None, raw=False, **kwargs):
+    # PUT/PATCH 로 date 가 바뀌면 예전 날짜의 day 비트 / 월 집계도 지워야 한다 → 저장 전 값을 기억
+    instance._previous_date = None
+    if raw or instance.pk is None or (update_fields is not None and "date" not in update_fields):
+        return
+    instance._previous_date = Entry.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+
+
+@receiver(post_save, sender=Entry)
+def update_stats_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and update_fields is not None and not STATS_FIELDS & set(update_fields):
+        return
+    previous = getattr(instance, "_previous_date", None)
+    removed = [previous] if previous is not None and previous != instance.date else []
+    apply_entry_changes(instance.user_id, added=[instance.date], removed=removed, scored=[instance.date])
+
+
+@receiver(post_delete, sender=Entry)
+def update_stats_on_delete(sender, instance, **kwargs):
+    apply_entry_changes(instance.user_id, removed=[instance.date])
@@ -0,0 +1,290 @@
+# entries/singleflight.py
+"""
+같은 일기 분석 요청 합치기 (single-flight).
+
+연타 / 클라이언트 재시도로 같은 일기에 analyze 가 동시에 여러 번 들어오면
+그만큼 OpenAI 토큰이 나가고, Entry.analysis 도 나중에 끝난 쪽이 덮어쓴다.
+키 (entry id, content_hash) 당 하나(리더)만 실제로 분석 + 저장하고, 나머지는 그 결과를 받아 간다.
+
+- 같은 프로세스: _flights (threading.Event 로 대기, DB 조회 없음)
+- 다른 워커: AnalysisLease 행
+  - INSERT 성공 또는 만료된 행을 UPDATE ... WHERE expires_at <= now 로 선점 (rowcount 로 판단)
+  - 리더가 성공하면 result 를 채우고 LEASE_GRACE 초 동안 남겨 둔다 → 기다리던 워커가 폴링으로 가져감
+    (리더가 끝난 뒤에 들어온 요청은 그 결과를 받지 않고 새 리더가 된다)
+  - 리더가 실패하면 (에러 응답 / 예외 / 스트림 끊김) 행을 지운다 → 기다리던 쪽 하나가 다시 리더가 된다
+  - 리더 프로세스가 죽으면 LEASE_TTL 뒤에 다른 워커가 넘겨받는다
+- LEASE_WAIT 초 안에 결과가 안 나오면 503 + Retry-After (업스트림을 중복 호출하지 않는다)
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import aanalyze_cached, analyze_cached, get_cached_analysis, make_cache_key
+from .models import AnalysisLease, Entry
+from .services import save_analysis
+
+import logging
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = int(os.getenv("ANALYSIS_LEASE_TTL", "120"))  # 리더가 죽었다고 보는 시간 (초)
+LEASE_WAIT = float(os.getenv("ANALYSIS_LEASE_WAIT", "60"))  # 다른 요청의 결과를 기다리는 최대 시간 (초)
+LEASE_GRACE = int(os.getenv("ANALYSIS_LEASE_GRACE", "15"))  # 결과를 리스 행에 남겨 두는 시간 (초)
+
+_POLL_MIN = 0.1
+_POLL_MAX = 1.0
+BUSY_RETRY_AFTER = 5
+
+_sleep = time.sleep  # 테스트에서 바꿔 끼울 수 있게
+_asleep = asyncio.sleep
+
+
+class _Flight:
+    def __init__(self, key: str):
+        self.key = key
+        self.owner = uuid.uuid4().hex
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def flight_key(entry: Entry) -> str:
+    return f"analyze:{entry.pk}:{entry.content_hash}"
+
+
+def _try_lease(key: str, owner: str, started: datetime) -> bool:
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=LEASE_TTL)
+    try:
+        with transaction.atomic():
+            AnalysisLease.objects.create(key=key, owner=owner, expires_at=expires_at)
+        return True
+    except IntegrityError:
+        pass
+    # 리더가 죽은 행, 또는 내가 들어오기 전에 이미 끝난 결과 → 넘겨받기
+    # (방금 끝난 분석을 ?fresh=1 재분석 요청이 그대로 받아 가지 않게)
+    stale = Q(expires_at__lte=now) | Q(
+        result__isnull=False, expires_at__lte=started + timedelta(seconds=LEASE_GRACE)
+    )
+    return bool(
+        AnalysisLease.objects.filter(stale, key=key)
+        .update(owner=owner, result=None, expires_at=expires_at)
+    )
+
+
+def _publish(flight: _Flight, result: Optional[Dict[str, Any]]) -> None:
+    flight.result = result
+    with _flights_lock:
+        if _flights.get(flight.key) is flight:
+            del _flights[flight.key]
+    flight.done.set()
+
+
+def begin(key: str, *, wait: Optional[float] = None) -> Tuple[Optional[_Flight], Optional[Dict[str, Any]]]:
+    """
+    리턴: (flight, None) → 내가 리더. 끝나면 반드시 finish(flight, result) 를 호출할 것 (finally)
+          (None, result) → 다른 요청(같은 프로세스 / 다른 워커)이 낸 결과
+          (None, None)   → wait (기본 LEASE_WAIT) 초 안에 결과가 나오지 않음
+    """
+    started = datetime.now()
+    deadline = time.monotonic() + (LEASE_WAIT if wait is None else wait)
+    while True:
+        with _flights_lock:
+            flight = _flights.get(key)
+            if flight is None:
+                flight = _flights[key] = _Flight(key)
+                break
+        if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+            return None, None
+        if flight.result is not None:
+            return None, flight.result
+        # 리더가 실패함 → 내가 다시 리더 자리를 노린다
+
+    # 이 프로세스에서는 내가 리더. 다른 워커와는 리스 행으로 겨룬다
+    delay = _POLL_MIN
+    while True:
+        if _try_lease(key, flight.owner, started):
+            return flight, None
+        row = AnalysisLease.objects.filter(key=key).values("result").first()
+        if row and row["result"] is not None:
+            _publish(flight, row["result"])
+            return None, row["result"]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _publish(flight, None)
+            return None, None
+        _sleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX)
+
+
+async def abegin(key: str, *, wait: Optional[float] = None) -> Tuple[Optional[_Flight], Optional[Dict[str, Any]]]:
+    """
+    begin 의 async 버전 (리턴도 같음).
+    sync_to_async(begin) 으로 감싸면 팔로워가 기다리는 동안 Django 의 sync 스레드(하나뿐)를 잡아서
+    다른 요청의 DB 접근까지 멈추므로, 대기는 asyncio.sleep 폴링으로 하고 DB 접근만 짧게 넘긴다.
+    """
+    started = datetime.now()
+    deadline = time.monotonic() + (LEASE_WAIT if wait is None else wait)
+    while True:
+        with _flights_lock:
+            flight = _flights.get(key)
+            if flight is None:
+                flight = _flights[key] = _Flight(key)
+                break
+        delay = _POLL_MIN
+        while not flight.done.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, None
+            await _asleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+        if flight.result is not None:
+            return None, flight.result
+
+    delay = _POLL_MIN
+    try:
+        while True:
+            if await sync_to_async(_try_lease)(key, flight.owner, started):
+                return flight, None
+            row = await AnalysisLease.objects.filter(key=key).values("result").afirst()
+            if row and row["result"] is not None:
+                _publish(flight, row["result"])
+                return None, row["result"]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _publish(flight, None)
+                return None, None
+            await _asleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+    except BaseException:
+        # 클라이언트가 끊겨 취소된 경우 등 → 같은 프로세스 팔로워가 LEASE_WAIT 내내 기다리지 않게
+        _publish(flight, None)
+        raise
+
+
+def finish(flight: _Flight, result: Optional[Dict[str, Any]]) -> None:
+    """result=None 이면 실패 (결과를 공유하지 않고 리스를 푼다)"""
+    try:
+        leases = AnalysisLease.objects.filter(key=flight.key, owner=flight.owner)
+        if result is None:
+            leases.delete()
+        else:
+            leases.update(result=result, expires_at=datetime.now() + timedelta(seconds=LEASE_GRACE))
+    except Exception:
+        # 리스 정리 실패는 LEASE_TTL 뒤에 자연히 풀린다
+        logger.warning("[singleflight] lease release failed key=%s", flight.key, exc_info=True)
+    finally:
+        _publish(flight, result)
+
+
+def busy_response() -> Response:
+    return Response(
+        {
+            "detail": "같은 일기를 분석하는 중입니다. 잠시 후 다시 시도해주세요.",
+            "code": "analysis_in_progress",
+            "retry_after": BUSY_RETRY_AFTER,
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(BUSY_RETRY_AFTER)},
+    )
+
+
+def analyze_entry(entry: Entry, *, fresh: bool = False):
+    """
+    analyze 뷰 / 비동기 워커 공용: 캐시 → (리더만) OpenAI → Entry.analysis 저장.
+    리턴: (data, cached) - analyze_cached 와 같음. 다른 요청의 결과를 받아 온 경우도 cached=True
+    """
+    kwargs = dict(
+        original_lang=entry.original_lang,
+        original_text=entry.original_text,
+        title=entry.title,
+        meta=entry.meta or {},
+    )
+    if not fresh:
+        # 캐시 히트는 합칠 필요가 없다 (리스 행을 만들지 않음)
+        data = get_cached_analysis(make_cache_key(**kwargs))
+        if data is not None:
+            save_analysis(entry, data)
+            return data, True
+
+    flight, shared = begin(flight_key(entry))
+    if flight is None:
+        if shared is None:
+            return busy_response(), False
+        # 리더가 이미 이 일기에 저장까지 마쳤다
+        entry.analysis = shared["analysis"]
+        return shared["analysis"], True
+
+    result = None
+    try:
+        data, cached = analyze_cached(**kwargs, fresh=fresh)
+        if isinstance(data, Response):
+            return data, cached
+        save_analysis(entry, data)
+        result = {"analysis": data}
+        return data, cached
+    finally:
+        finish(flight, result)
+
+
+async def aanalyze_entry(entry: Entry, *, fresh: bool = False):
+    """
+    analyze_entry 의 async 버전 (ASGI 뷰용). 리더의 OpenAI 호출 / 팔로워의 대기 모두 await
+    """
+    kwargs = dict(
+        original_lang=entry.original_lang,
+        original_text=entry.original_text,
+        title=entry.title,
+        meta=entry.meta or {},
+    )
+    if not fresh:
+        data = await sync_to_async(get_cached_analysis)(make_cache_key(**kwargs))
+        if data is not None:
+            await sync_to_async(save_analysis)(entry, data)
+            return data, True
+
+    flight, shared = await abegin(flight_key(entry))
+    if flight is None:
+        if shared is None:
+            return busy_response(), False
+        entry.analysis = shared["analysis"]
+        return shared["analysis"], True
+
+    result = None
+    try:
+        data, cached = await aanalyze_cached(**kwargs, fresh=fresh)
+        if isinstance(data, Response):
+            return data, cached
+        await sync_to_async(save_analysis)(entry, data)
+        result = {"analysis": data}
+        return data, cached
+    finally:
+        await sync_to_async(finish)(flight, result)
+
+
+def purge_expired_leases(batch_size: int = 1000) -> int:
+    """만료된 리스 행을 batch 단위로 삭제. 삭제한 행 수 반환"""
+    total = 0
+    now = datetime.now()
+    while True:
+        keys = list(
+            AnalysisLease.objects.filter(expires_at__lte=now)
+            .values_list("key", flat=True)[:batch_size]
+        )
+        if not keys:
+            return total
+        deleted, _ = AnalysisLease.objects.filter(key__in=keys).delete()
+        total += deleted
@@ -0,0 +1,32 @@
+# entries/sse.py
+"""Server-Sent Events 응답 헬퍼 (analyze?stream=1)"""
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accept: text/event-stream 요청이 DRF 콘텐츠 협상에서 406 으로 막히지 않게 하는 용도.
+    실제 스트림은 StreamingHttpResponse 가 보내고, 여기로 오는 건 에러 응답뿐이다.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event("error", data)
+
+
+def sse_event(event: str, data) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+def event_stream_response(events) -> StreamingHttpResponse:
+    """events: SSE 바이트를 내는 이터레이터 (WSGI) 또는 async 이터레이터 (ASGI)"""
+    response = StreamingHttpResponse(events, content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx 버퍼링 끄기
+    return response
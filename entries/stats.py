@@ -0,0 +1,180 @@
+# entries/stats.py
+"""
+유저별 통계 롤업 (UserStats) 유지.
+
+- 일기 쓴 날: 연도별 366비트 비트맵 → 해당 날짜 비트만 켜고 끈다
+- 점수: 월별 sum / count / min / max. min/max 는 빼기가 안 되므로 바뀐 "그 달" 만
+        (user, date) 인덱스 범위에서 Entry.score 로 다시 집계 (보통 쿼리 1번)
+- 연속 기록: 비트맵만으로 메모리에서 계산 (DB 조회 없음)
+
+호출 위치: entries.signals (save / delete), bulk 경로(upsert_entry, bulk_save_analyses, NDJSON import)
+"""
+from __future__ import annotations
+import base64
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .models import Entry, UserStats
+
+BITMAP_BYTES = 46  # 366비트
+
+
+def _day_index(d: date) -> int:
+    return d.timetuple().tm_yday - 1
+
+
+def _month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _load_bitmap(days: Dict[str, str], year: int) -> bytearray:
+    raw = days.get(str(year))
+    return bytearray(base64.b64decode(raw)) if raw else bytearray(BITMAP_BYTES)
+
+
+def _store_bitmap(days: Dict[str, str], year: int, bits: bytearray) -> None:
+    if any(bits):
+        days[str(year)] = base64.b64encode(bytes(bits)).decode()
+    else:
+        days.pop(str(year), None)
+
+
+def _set_day(days: Dict[str, str], d: date, on: bool) -> None:
+    bits = _load_bitmap(days, d.year)
+    i = _day_index(d)
+    if on:
+        bits[i // 8] |= 1 << (i % 8)
+    else:
+        bits[i // 8] &= ~(1 << (i % 8)) & 0xFF
+    _store_bitmap(days, d.year, bits)
+
+
+def iter_days(days: Dict[str, str]) -> Iterable[date]:
+    """비트맵 → 일기 쓴 날짜 (오름차순)"""
+    for year in sorted(days, key=int):
+        bits = _load_bitmap(days, int(year))
+        jan1 = date(int(year), 1, 1)
+        for i in range(len(bits) * 8):
+            if bits[i // 8] >> (i % 8) & 1:
+                yield jan1 + timedelta(days=i)
+
+
+def _compute_streaks(days: Dict[str, str]):
+    """리턴: (가장 최근 날짜에서 끝나는 연속 일수, 그 날짜, 최장 연속 일수)"""
+    run = longest = 0
+    prev: Optional[date] = None
+    for d in iter_days(days):
+        run = run + 1 if prev and d - prev == timedelta(days=1) else 1
+        longest = max(longest, run)
+        prev = d
+    return run, prev, longest
+
+
+def _month_aggregate(user_id, month_start: date) -> Optional[Dict[str, int]]:
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    agg = Entry.objects.filter(
+        user_id=user_id, date__gte=month_start, date__lt=next_month, score__isnull=False
+    ).aggregate(sum=Sum("score"), count=Count("id"), min=Min("score"), max=Max("score"))
+    return agg if agg["count"] else None
+
+
+def _recompute_streaks(stats: UserStats) -> None:
+    stats.current_streak, stats.streak_end, stats.longest_streak = _compute_streaks(stats.days)
+
+
+def apply_entry_changes(
+    user_id,
+    *,
+    added: Iterable[date] = (),
+    removed: Iterable[date] = (),
+    scored: Iterable[date] = (),
+) -> None:
+    """
+    added: 일기가 (새로) 있는 날짜 / removed: 일기가 삭제된 날짜 / scored: 점수가 바뀌었을 수 있는 날짜
+    삭제만 있는 경우엔 행을 새로 만들지 않는다 (유저 cascade 삭제 중일 수 있음)
+    """
+    added, removed, scored = list(added), list(removed), list(scored)
+    if not (added or removed or scored):
+        return
+
+    with transaction.atomic():
+        if added or scored:
+            UserStats.objects.get_or_create(user_id=user_id)
+        stats = UserStats.objects.select_for_update().filter(user_id=user_id).first()
+        if stats is None:
+            return
+
+        for d in added:
+            _set_day(stats.days, d, True)
+        for d in removed:
+            _set_day(stats.days, d, False)
+
+        for month_start in {d.replace(day=1) for d in (*added, *removed, *scored)}:
+            agg = _month_aggregate(user_id, month_start)
+            if agg:
+                stats.months[_month_key(month_start)] = agg
+            else:
+                stats.months.pop(_month_key(month_start), None)
+
+        _recompute_streaks(stats)
+        stats.save()
+
+
+def rebuild_user_stats(user_id) -> UserStats:
+    """전체 재계산 (드리프트 복구용). 일기 수만큼 (date, score) 두 컬럼만 읽는다"""
+    days: Dict[str, str] = {}
+    months: Dict[str, Dict[str, int]] = {}
+    rows = Entry.objects.filter(user_id=user_id).order_by("date").values_list("date", "score")
+    bitmaps: Dict[int, bytearray] = {}
+    for d, score in rows.iterator(chunk_size=1000):
+        bits = bitmaps.setdefault(d.year, bytearray(BITMAP_BYTES))
+        i = _day_index(d)
+        bits[i // 8] |= 1 << (i % 8)
+        if score is None:
+            continue
+        m = months.setdefault(_month_key(d), {"sum": 0, "count": 0, "min": score, "max": score})
+        m["sum"] += score
+        m["count"] += 1
+        m["min"] = min(m["min"], score)
+        m["max"] = max(m["max"], score)
+    for year, bits in bitmaps.items():
+        _store_bitmap(days, year, bits)
+
+    stats = UserStats(user_id=user_id, days=days, months=months)
+    _recompute_streaks(stats)
+    stats.save()
+    return stats
+
+
+def current_streak(stats: UserStats, today: date) -> int:
+    """저장된 연속 기록이 오늘/어제에서 끝날 때만 유효 (그 이전이면 이미 끊김)"""
+    if stats.streak_end and stats.streak_end >= today - timedelta(days=1):
+        return stats.current_streak
+    return 0
+
+
+def serialize_stats(stats: Optional[UserStats], today: date, year: Optional[int] = None) -> Dict:
+    if stats is None:
+        return {"current_streak": 0, "longest_streak": 0, "last_entry_date": None, "months": {}, "days": {}}
+    months = {
+        key: {**m, "avg": round(m["sum"] / m["count"], 1)}
+        for key, m in sorted(stats.months.items())
+    }
+    days = stats.days if year is None else {k: v for k, v in stats.days.items() if k == str(year)}
+    return {
+        "current_streak": current_streak(stats, today),
+        "longest_streak": stats.longest_streak,
+        "last_entry_date": stats.streak_end,
+        "months": months,
+        "days": days,
+    }
+
+
+def dates_by_user(entries: Iterable) -> Dict[int, List[date]]:
+    grouped: Dict[int, List[date]] = {}
+    for entry in entries:
+        grouped.setdefault(entry.user_id, []).append(entry.date)
+    return grouped
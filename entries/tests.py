@@ -1,3 +1,1230 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import re
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openai import AsyncOpenAI, OpenAI
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from accounts.integrations import toss_clients
+from accounts.models import AppUser
+from accounts.security.app_jwt import issue_app_jwt
+from . import cache as analysis_cache, jobs, resilience, services, singleflight
+from .admission import AdaptiveLimiter, Overloaded, Slot
+from .batch import BatchClient, LocalBatchClient, apply_batch_output, submit_batch
+from .chunking import estimate_tokens, merge_analyses, output_budget, split_text
+from .fake_openai import DEFAULT_ANALYSIS, FakeOpenAIServer
+from .models import AnalysisCache, AnalysisJob, AnalysisLease, Entry, UserStats, VocabItem
+from .pagination import EntryCursorPagination, decode_cursor, encode_cursor
+from .quotes import today_kst
+from .resilience import CircuitBreaker, breaker_states
+from .services import save_analysis
+from .stats import rebuild_user_stats
+from .sync import TOMBSTONE_RETENTION_DAYS, encode_sync_cursor, fetch_changes
+
+_ENTRY_TABLE = Entry._meta.db_table
+_COLUMN_RE = re.compile(r'[`"]%s[`"]\.[`"](\w+)[`"]' % _ENTRY_TABLE)
+_FROM_ENTRY_RE = re.compile(r'^\s*SELECT\s.*?\sFROM\s+[`"]%s[`"]' % _ENTRY_TABLE, re.IGNORECASE | re.DOTALL)
+
+
+def selected_entry_columns(sql: str) -> set[str]:
+    """SELECT 절에서 entries_entry 의 컬럼만 뽑는다 (WHERE / ORDER BY 는 제외)"""
+    select_clause = re.split(r"\sFROM\s", sql, maxsplit=1, flags=re.IGNORECASE)[0]
+    return set(_COLUMN_RE.findall(select_clause))
+
+
+class ColumnSetAssertionsMixin:
+    """
+    엔드포인트가 읽는 Entry 컬럼 집합을 고정해두는 헬퍼.
+    모든 SELECT 가 expected 안의 컬럼만 읽어야 통과한다.
+    누가 .only() / values_list 를 빼먹어서 행이 다시 넓어지면 여기서 잡힌다.
+    """
+
+    def assertEntryColumns(self, expected, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        selects = [q["sql"] for q in ctx.captured_queries if _FROM_ENTRY_RE.match(q["sql"])]
+        self.assertTrue(selects, "no SELECT on %s was executed" % _ENTRY_TABLE)
+        for sql in selects:
+            self.assertLessEqual(selected_entry_columns(sql), set(expected), sql)
+        return result
+
+
+class EntryProjectionTests(ColumnSetAssertionsMixin, TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entry = Entry.objects.create(
+            user=self.user,
+            date=date(2025, 10, 1),
+            title="Park",
+            original_lang="en",
+            original_text="I went to the park today and it was nice.",
+            analysis={"score": {"value": 80}},
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_reads_list_columns_only(self):
+        res = self.assertEntryColumns(
+            {"id", "date", "title", "meta"},
+            self.client.get, "/api/entries/",
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_calendar_reads_date_and_id_only(self):
+        # updated_at 은 ETag 용 MAX(updated_at) 집계
+        res = self.assertEntryColumns(
+            {"id", "date", "updated_at"},
+            self.client.get, "/api/entries/?calendar=1&month=2025-10",
+        )
+        self.assertEqual(res.data, {"2025-10-01": self.entry.id})
+
+    def test_by_date_reads_detail_columns_only(self):
+        res = self.assertEntryColumns(
+            {"id", "date", "title", "original_lang", "original_text",
+             "meta", "analysis", "created_at", "updated_at"},
+            self.client.get, "/api/entries/by-date/?date=2025-10-01",
+        )
+        self.assertTrue(res.data["exists"])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entry = Entry.objects.create(
+            user=self.user,
+            date=date(2025, 10, 1),
+            title="Park",
+            original_lang="en",
+            original_text="I went to the park today and it was nice.",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_resources_return_304(self):
+        for url in (
+            f"/api/entries/{self.entry.id}/",
+            "/api/entries/by-date/?date=2025-10-01",
+            "/api/entries/?calendar=1&month=2025-10",
+        ):
+            first = self.client.get(url)
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again.content, b"", url)
+
+    def test_update_changes_etag(self):
+        url = f"/api/entries/{self.entry.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.entry.title = "Park again"
+        self.entry.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class QuotesTests(TestCase):
+    def _get(self, day, **headers):
+        with mock.patch("entries.views.today_kst", return_value=day):
+            return APIClient().get("/api/quotes/", **headers)
+
+    def test_quotes_rotate_daily(self):
+        first, same, next_day = (self._get(day) for day in (date(2025, 11, 1), date(2025, 11, 1), date(2025, 11, 2)))
+        self.assertEqual(len(first.data), 3)
+        self.assertEqual(first.data, same.data)
+        self.assertEqual(first["ETag"], same["ETag"])
+        self.assertNotEqual(first.data, next_day.data)
+        self.assertNotEqual(first["ETag"], next_day["ETag"])
+
+    def test_matching_etag_returns_304(self):
+        day = date(2025, 11, 1)
+        etag = self._get(day)["ETag"]
+        for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+            with self.subTest(header=header):
+                res = self._get(day, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(res.status_code, 304)
+                self.assertEqual(res["ETag"], etag)
+
+        # 부분 문자열로만 겹치는 값 / 전날 ETag 는 일치가 아니다
+        for header in (f'"x{etag}"', self._get(date(2025, 10, 31))["ETag"]):
+            with self.subTest(header=header):
+                self.assertEqual(self._get(day, HTTP_IF_NONE_MATCH=header).status_code, 200)
+
+
+_LOCMEM_ENTRIES_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "entries": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "entries-test"},
+}
+
+
+@override_settings(CACHES=_LOCMEM_ENTRIES_CACHE)  # 기본값(DummyCache)은 캐시를 안 하므로 무효화를 확인하려면 실제 백엔드로
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.body = {
+            "date": "2025-10-01",
+            "title": "Park",
+            "original_lang": "en",
+            "original_text": "I went to the park today and it was nice.",
+        }
+
+    def test_upsert_invalidates_cached_by_date(self):
+        url = "/api/entries/by-date/?date=2025-10-01"
+        self.assertFalse(self.client.get(url).data["exists"])
+
+        self.client.post("/api/entries/upsert-by-date/", self.body, format="json")
+        self.assertEqual(self.client.get(url).data["entry"]["title"], "Park")
+
+        self.client.post("/api/entries/upsert-by-date/", {**self.body, "title": "Park 2"}, format="json")
+        self.assertEqual(self.client.get(url).data["entry"]["title"], "Park 2")
+
+    def test_second_read_is_served_from_cache(self):
+        self.client.post("/api/entries/upsert-by-date/", self.body, format="json")
+        url = "/api/entries/?calendar=1&month=2025-10"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).data), 1)
+
+    def test_delete_invalidates_cached_calendar(self):
+        url = "/api/entries/?calendar=1&month=2025-10"
+        res = self.client.post("/api/entries/upsert-by-date/", self.body, format="json")
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+        self.client.delete(f"/api/entries/{res.data['id']}/")
+        self.assertEqual(self.client.get(url).data, {})
+
+    def test_upsert_validates_updates_too(self):
+        url = "/api/entries/upsert-by-date/"
+        created = self.client.post(url, self.body, format="json")
+        self.assertEqual((created.status_code, created.data["action"]), (201, "created"))
+        self.assertEqual(self.client.post(url, self.body, format="json").data["action"], "unchanged")
+
+        res = self.client.post(url, {**self.body, "original_text": "Too short."}, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Entry.objects.get(id=created.data["id"]).original_text, self.body["original_text"])
+
+        updated = self.client.post(url, {**self.body, "title": "Park 2"}, format="json")
+        self.assertEqual((updated.status_code, updated.data), (200, {"id": created.data["id"], "action": "updated"}))
+
+
+_DIARY_TEXT = "I went for a long walk in the park after work today."
+
+
+class ExportImportTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _import(self, lines, query=""):
+        body = "\n".join(json.dumps(line) if isinstance(line, dict) else line for line in lines)
+        return self.client.post(f"/api/entries/import/{query}", data=body, content_type="application/x-ndjson")
+
+    def test_export_round_trips_through_import(self):
+        res = self._import([
+            {"date": f"2025-10-{d:02d}", "title": f"Day {d}", "original_lang": "en", "original_text": _DIARY_TEXT}
+            for d in range(1, 4)
+        ] + ["not json", {"date": "2025-10-04", "title": "Short", "original_lang": "en", "original_text": "hi"}])
+        self.assertEqual((res.data["written"], res.data["failed"]), (3, 2))
+        self.assertEqual(res.data["errors"][1]["line"], 5)  # 앱과 같은 최소 글자 수 검증
+
+        created_at = datetime(2025, 10, 1, 21, 30, 15)
+        Entry.objects.filter(user=self.user).update(created_at=created_at)
+        res = self.client.get("/api/entries/export/")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["Day 1", "Day 2", "Day 3"])
+
+        Entry.objects.filter(user=self.user).delete()
+        res = self._import(lines)
+        self.assertEqual(res.data["written"], 3)
+        self.assertTrue(all(Entry.objects.filter(user=self.user).values_list("content_hash", flat=True)))
+        self.assertEqual(set(Entry.objects.filter(user=self.user).values_list("created_at", flat=True)), {created_at})
+
+    def test_conflicting_dates_are_skipped_unless_overwrite(self):
+        line = {"date": "2025-10-01", "title": "Old", "original_lang": "en", "original_text": _DIARY_TEXT}
+        self._import([line])
+        self.assertEqual(self._import([{**line, "title": "New"}]).data["skipped"], 1)
+        self.assertEqual(Entry.objects.get(user=self.user).title, "Old")
+
+        self._import([{**line, "title": "New"}], "?on_conflict=overwrite")
+        self.assertEqual(Entry.objects.get(user=self.user).title, "New")
+
+    def test_rows_lost_to_a_concurrent_insert_are_not_counted_as_written(self):
+        line = {"date": "2025-10-01", "title": "Mine", "original_lang": "en", "original_text": _DIARY_TEXT}
+        real_bulk_create = Entry.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # 중복 확인 직후 다른 요청이 같은 날짜를 먼저 만든 상황
+            Entry.objects.create(user=self.user, date=date(2025, 10, 1), title="Theirs",
+                                 original_lang="en", original_text=_DIARY_TEXT)
+            return real_bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Entry.objects, "bulk_create", racing_bulk_create):
+            res = self._import([line])
+        self.assertEqual((res.data["written"], res.data["skipped"]), (0, 1))
+        self.assertEqual(Entry.objects.get(user=self.user).title, "Theirs")
+
+    def test_imported_analysis_links_vocab_to_the_new_entry(self):
+        analysis = {"vocab_suggestions": [{"word": "stroll", "meaning_ko": "산책하다"}]}
+        line = {"date": "2025-10-01", "title": "Walk", "original_lang": "en", "original_text": _DIARY_TEXT,
+                "analysis": analysis}
+        self._import([line])
+        self._import([{**line, "date": "2025-10-02"}], "?on_conflict=overwrite")
+
+        item = VocabItem.objects.get(user=self.user, word_normalized="stroll")
+        first = Entry.objects.get(user=self.user, date=date(2025, 10, 1))
+        self.assertEqual((item.first_entry_id, item.first_seen, item.last_seen), (first.id, first.date, date(2025, 10, 2)))
+
+
+@mock.patch("entries.sync.SYNC_SAFETY_LAG", 0)
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.entries = [
+            Entry.objects.create(user=self.user, date=date(2025, 7, day), original_lang="en", original_text="x")
+            for day in (1, 2, 3)
+        ]
+
+    def _sync(self, since=None):
+        return self.client.get("/api/entries/sync/", {"since": since} if since else {})
+
+    def test_only_rows_updated_after_cursor(self):
+        full = self._sync()
+        self.assertEqual(len(full.data["changed"]), 3)
+
+        self.entries[1].title = "edited"
+        self.entries[1].save()
+        res = self._sync(full.data["cursor"])
+        self.assertEqual([(e["id"], e["title"]) for e in res.data["changed"]], [(self.entries[1].id, "edited")])
+        self.assertEqual(res.data["deleted"], [])
+        self.assertEqual(self._sync(res.data["cursor"]).data["changed"], [])
+
+    def test_deletes_come_back_as_tombstones(self):
+        cursor = self._sync().data["cursor"]
+        gone = self.entries[0]
+        self.client.delete(f"/api/entries/{gone.id}/")
+
+        res = self._sync(cursor)
+        self.assertEqual(res.data["changed"], [])
+        self.assertEqual(res.data["deleted"], [{"id": gone.id, "date": gone.date}])
+        self.assertEqual(self._sync().data["deleted"], [])  # 전체 동기화에는 삭제분이 필요 없다
+
+    def test_entry_moved_to_another_date(self):
+        cursor = self._sync().data["cursor"]
+        moved = self.entries[2]
+        self.assertEqual(self.client.patch(f"/api/entries/{moved.id}/", {"date": "2025-07-20"}).status_code, 200)
+
+        res = self._sync(cursor)
+        # 같은 id 가 새 날짜로 내려온다 (클라이언트는 id 기준으로 옛 날짜에서 옮긴다)
+        self.assertEqual([(e["id"], e["date"]) for e in res.data["changed"]], [(moved.id, "2025-07-20")])
+        self.assertEqual(res.data["deleted"], [])
+
+    def test_pages_until_caught_up(self):
+        changed, _, cursor, has_more = fetch_changes(self.user, None, page_size=2)
+        self.assertTrue(has_more)
+        rest, _, _, has_more = fetch_changes(self.user, cursor, page_size=2)
+        self.assertFalse(has_more)
+        self.assertEqual([e.id for e in changed + rest], [e.id for e in self.entries])
+
+    def test_expired_or_invalid_cursor(self):
+        stale = datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS + 1)
+        res = self._sync(encode_sync_cursor((stale, 0), (stale, 0)))
+        self.assertEqual((res.status_code, res.data["code"]), (410, "resync_required"))
+        self.assertEqual(self._sync("not-a-cursor").status_code, 400)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_matches_text_and_corrected_english(self):
+        other = AppUser.objects.create(toss_user_key=2)
+        Entry.objects.create(user=other, date=date(2025, 10, 1), title="공원", original_lang="ko", original_text="공원에 갔다")
+        park = Entry.objects.create(user=self.user, date=date(2025, 10, 1), title="산책", original_lang="ko", original_text="오늘 공원에 갔다")
+        work = Entry.objects.create(user=self.user, date=date(2025, 10, 2), title="회사", original_lang="ko", original_text="회의가 길었다")
+        work.analysis = {"corrections": {"corrected": "The meeting was exhausting."}}
+        work.save(update_fields=["analysis", "updated_at"])
+
+        def ids(q):
+            return [r["id"] for r in self.client.get("/api/entries/search/", {"q": q}).data["results"]]
+
+        self.assertEqual(ids("공원에"), [park.id])
+        self.assertEqual(ids("공원"), [park.id])
+        self.assertEqual(ids("exhausting"), [work.id])
+
+        work.delete()
+        self.assertEqual(ids("exhausting"), [])
+
+
+class EntryPaginationTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.entries = Entry.objects.bulk_create(
+            Entry(user=self.user, date=date(2025, 5, day), title=f"day {day}", original_lang="en", original_text="x")
+            for day in range(1, 6)
+        )
+
+    def _titles(self, res):
+        return [r["title"] for r in res.data["results"]]
+
+    def test_cursor_round_trip_across_pages(self):
+        res = self.client.get("/api/entries/", {"page_size": 2})
+        pages = [self._titles(res)]
+        while res.data["next"]:
+            last_date, last_id = decode_cursor(res.data["next_cursor"])
+            self.assertEqual(Entry.objects.get(id=last_id).date, last_date)
+            if len(pages) == 1:
+                # 페이지 사이에 더 최근 일기가 생겨도 keyset 이라 밀리거나 겹치지 않는다
+                Entry.objects.create(user=self.user, date=date(2025, 5, 9), original_lang="en", original_text="x")
+            res = self.client.get(res.data["next"])
+            pages.append(self._titles(res))
+
+        self.assertEqual(pages, [["day 5", "day 4"], ["day 3", "day 2"], ["day 1"]])
+        self.assertIsNone(res.data["next_cursor"])
+
+    def test_same_date_rows_are_ordered_by_id(self):
+        same_day = date(2025, 5, 1)
+        VocabItem.objects.bulk_create(
+            VocabItem(user=self.user, word=f"w{i}", word_normalized=f"w{i}", first_seen=same_day, last_seen=same_day)
+            for i in range(5)
+        )
+        res = self.client.get("/api/vocab/", {"page_size": 2})
+        words = [r["word"] for r in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            words += [r["word"] for r in res.data["results"]]
+        self.assertEqual(words, list(VocabItem.objects.order_by("-id").values_list("word", flat=True)))
+
+    def test_tampered_cursor_is_rejected(self):
+        self.assertEqual(decode_cursor(encode_cursor(date(2025, 5, 3), 7)), (date(2025, 5, 3), 7))
+        bad = [
+            "not-a-cursor",
+            base64.urlsafe_b64encode(b'{"d":"2025-13-01","i":1}').decode(),
+            base64.urlsafe_b64encode(b'{"d":"2025-05-01"}').decode(),
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+        ]
+        for cursor in bad:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get("/api/entries/", {"cursor": cursor}).status_code, 404)
+
+    def test_page_size_is_bounded(self):
+        def page_len(**params):
+            return len(self.client.get("/api/entries/", params).data["results"])
+
+        with mock.patch.object(EntryCursorPagination, "page_size", 3), \
+                mock.patch.object(EntryCursorPagination, "max_page_size", 4):
+            self.assertEqual(page_len(), 3)
+            self.assertEqual(page_len(page_size="abc"), 3)
+            self.assertEqual(page_len(page_size=0), 1)
+            self.assertEqual(page_len(page_size=100), 4)
+        self.assertEqual(len(self.client.get("/api/entries/", {"all": 1}).data), 5)  # ?all=1 은 페이지 없이 전체
+
+
+class VocabTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _analyzed(self, day, words):
+        entry = Entry.objects.create(
+            user=self.user, date=date(2025, 10, day), title="t", original_lang="en", original_text="x"
+        )
+        save_analysis(entry, {"vocab_suggestions": [{"word": w, "meaning_ko": m} for w, m in words]})
+        return entry
+
+    def test_analysis_writes_upsert_vocab(self):
+        self._analyzed(5, [("Cheer up!", "힘내"), ("run out of", "다 떨어지다")])
+        earlier = self._analyzed(1, [("cheer  up", "기운 내")])  # 예전 일기를 나중에 분석
+
+        res = self.client.get("/api/vocab/")
+        self.assertEqual([r["word"] for r in res.data["results"]], ["run out of", "Cheer up"])
+        cheer = res.data["results"][1]
+        self.assertEqual((cheer["meaning_ko"], cheer["first_entry"]), ("힘내", earlier.id))
+        self.assertEqual((cheer["first_seen"], cheer["last_seen"]), ("2025-10-01", "2025-10-05"))
+
+    def test_vocab_is_paginated_and_scoped_to_user(self):
+        other = AppUser.objects.create(toss_user_key=2)
+        VocabItem.objects.create(user=other, word="x", word_normalized="x", first_seen=date.today(), last_seen=date.today())
+        for day in range(1, 4):
+            self._analyzed(day, [(f"word {day}", "")])
+
+        res = self.client.get("/api/vocab/", {"page_size": 2})
+        self.assertEqual([r["word"] for r in res.data["results"]], ["word 3", "word 2"])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([r["word"] for r in res.data["results"]], ["word 1"])
+        self.assertIsNone(res.data["next"])
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        caches["entries"].clear()
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = today_kst()
+
+    def _write(self, days_ago, score=None):
+        entry = Entry.objects.create(
+            user=self.user, date=self.today - timedelta(days=days_ago),
+            title="t", original_lang="en", original_text="x",
+        )
+        if score is not None:
+            save_analysis(entry, {"score": {"value": score}})
+        return entry
+
+    def test_rollup_tracks_saves_and_deletes(self):
+        self._write(0, 80)
+        yesterday = self._write(1, 60)
+        self._write(2)
+        self._write(5, 90)
+
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/stats/").data
+        self.assertEqual((data["current_streak"], data["longest_streak"]), (3, 3))
+        months = data["months"].values()  # 월이 걸쳐 있을 수 있으니 합쳐서 확인
+        self.assertEqual(sum(m["count"] for m in months), 3)
+        self.assertEqual((min(m["min"] for m in months), max(m["max"] for m in months)), (60, 90))
+
+        yesterday.delete()
+        data = self.client.get("/api/stats/").data
+        self.assertEqual((data["current_streak"], data["longest_streak"]), (1, 1))
+
+        stats = UserStats.objects.get(pk=self.user.pk)
+        rebuilt = rebuild_user_stats(self.user.pk)
+        self.assertEqual((stats.days, stats.months), (rebuilt.days, rebuilt.months))
+
+    def test_date_change_clears_previous_day_and_month(self):
+        entry = self._write(0, 70)
+        moved = self.today - timedelta(days=40)  # 다른 달로
+        resp = self.client.patch(f"/api/entries/{entry.pk}/", {"date": moved.isoformat()}, format="json")
+        self.assertEqual(resp.status_code, 200)
+
+        stats = UserStats.objects.get(pk=self.user.pk)
+        rebuilt = rebuild_user_stats(self.user.pk)
+        self.assertEqual((stats.days, stats.months), (rebuilt.days, rebuilt.months))
+        self.assertNotIn(self.today.strftime("%Y-%m"), stats.months)
+
+
+class AnalysisCacheTests(TestCase):
+    def setUp(self):
+        analysis_cache._lru.clear()
+        self.upstream = mock.Mock(return_value={"score": {"value": 80}})
+        patcher = mock.patch("entries.cache.analyze_with_openai", self.upstream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analyze(self, text=_DIARY_TEXT, **kwargs):
+        return analysis_cache.analyze_cached(original_lang="en", original_text=text, title="Walk", **kwargs)
+
+    def test_second_call_is_an_lru_hit(self):
+        self.assertEqual(self._analyze(), ({"score": {"value": 80}}, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(self._analyze(), ({"score": {"value": 80}}, True))
+        self.assertEqual(self.upstream.call_count, 1)
+
+    def test_lru_miss_falls_back_to_db_row(self):
+        self._analyze()
+        analysis_cache._lru.clear()  # 다른 워커 / 재시작 후
+
+        self.assertEqual(self._analyze(), ({"score": {"value": 80}}, True))
+        self.assertEqual(self.upstream.call_count, 1)
+        self.assertEqual(AnalysisCache.objects.get().hits, 1)
+        with self.assertNumQueries(0):
+            self._analyze()  # DB 에서 읽은 결과는 LRU 에도 올라간다
+
+    def test_key_changes_with_prompt_version_and_content(self):
+        key = analysis_cache.make_cache_key(original_lang="en", original_text=_DIARY_TEXT, title="Walk")
+        same = analysis_cache.make_cache_key(original_lang="en", original_text=f"  {_DIARY_TEXT}\r\n", title="Walk")
+        edited = analysis_cache.make_cache_key(original_lang="en", original_text=_DIARY_TEXT + " Tired.", title="Walk")
+        with mock.patch("entries.cache.PROMPT_VERSION", "next"):
+            bumped = analysis_cache.make_cache_key(original_lang="en", original_text=_DIARY_TEXT, title="Walk")
+        self.assertEqual(key, same)  # 공백 / 줄바꿈 차이는 같은 키
+        self.assertEqual(len({key, edited, bumped}), 3)
+
+        self._analyze()
+        with mock.patch("entries.cache.PROMPT_VERSION", "next"):
+            self.assertFalse(self._analyze()[1])
+        self.assertEqual(self.upstream.call_count, 2)
+
+    def test_fresh_bypasses_and_refreshes_the_cache(self):
+        self._analyze()
+        self.upstream.return_value = {"score": {"value": 90}}
+
+        self.assertEqual(self._analyze(fresh=True), ({"score": {"value": 90}}, False))
+        self.assertEqual(self.upstream.call_count, 2)
+        self.assertEqual(self._analyze(), ({"score": {"value": 90}}, True))
+        self.assertEqual(AnalysisCache.objects.get().result, {"score": {"value": 90}})
+
+    def test_fresh_serves_cached_result_when_upstream_fails(self):
+        self._analyze()
+        self.upstream.return_value = Response({"detail": "upstream error"}, status=502)
+        self.assertEqual(self._analyze(fresh=True), ({"score": {"value": 80}}, True))
+
+
+class SectionStreamParserTests(TestCase):
+    def _feed_all(self, parser, chunks):
+        return [event for chunk in chunks for event in parser.feed(chunk)]
+
+    def test_sections_split_across_deltas(self):
+        text = json.dumps(DEFAULT_ANALYSIS, ensure_ascii=False)
+        parser = services.SectionStreamParser()
+        events = self._feed_all(parser, text)  # 한 글자씩
+
+        self.assertEqual([key for key, _ in events], list(DEFAULT_ANALYSIS))  # 나온 순서 그대로
+        self.assertEqual(dict(events), DEFAULT_ANALYSIS)
+
+    def test_each_section_is_emitted_as_soon_as_it_closes(self):
+        parser = services.SectionStreamParser()
+        self.assertEqual(parser.feed('{"translation": {"to": "ko", "text": "a, \\"b\\" {c}'), [])
+        self.assertEqual(parser.feed('"},'), [("translation", {"to": "ko", "text": 'a, "b" {c}'})])
+        self.assertEqual(parser.feed(' "score": {"value": 7'), [])
+        self.assertEqual(parser.feed("0}}"), [("score", {"value": 70})])
+
+    def test_truncated_final_section_is_not_emitted(self):
+        parser = services.SectionStreamParser()
+        events = parser.feed('{"translation": {"text": "ok"}, "score": {"value": 8')
+        self.assertEqual(events, [("translation", {"text": "ok"})])
+
+    def test_malformed_section_is_skipped(self):
+        parser = services.SectionStreamParser()
+        events = parser.feed('{"corrections": {corrected: nope}, "score": {"value": 80}}')
+        self.assertEqual(events, [("score", {"value": 80})])
+
+    def test_sync_stream_view_emits_sections_then_done(self):
+        user = AppUser.objects.create(toss_user_key=1)
+        entry = Entry.objects.create(user=user, date=date(2025, 4, 1), original_lang="en", original_text=_DIARY_TEXT)
+        client = APIClient()
+        client.force_authenticate(user)
+        with FakeOpenAIServer() as server, \
+                mock.patch.object(services, "client", OpenAI(api_key="x", base_url=server.base_url, max_retries=0)):
+            resp = client.post(f"/api/entries/{entry.pk}/analyze/?stream=1")
+            body = b"".join(resp.streaming_content)
+
+        self.assertTrue(resp["Content-Type"].startswith("text/event-stream"))
+        self.assertEqual(
+            re.findall(rb"^event: (\w+)", body, re.M),
+            [b"translation", b"corrections", b"vocab_suggestions", b"score", b"done"],
+        )
+        entry.refresh_from_db()
+        self.assertEqual(entry.analysis, DEFAULT_ANALYSIS)
+
+
+class PromptPrefixTests(TestCase):
+    def _kwargs(self, lang, text, title, meta):
+        return services._request_kwargs(lang, services.build_prompt(lang, text, title, meta))
+
+    def test_static_prefix_is_identical_and_entry_data_comes_after(self):
+        first = ("en", _DIARY_TEXT, "Walk", {"mood": "tired"})
+        second = ("en", "Rainy day, stayed home and read a book all afternoon.", "Rain", {"weather": "rain"})
+        (responses_a, chat_a), (responses_b, chat_b) = self._kwargs(*first), self._kwargs(*second)
+
+        prefix = services.SYSTEM_PROMPTS["en"].encode()
+        for responses, chat in ((responses_a, chat_a), (responses_b, chat_b)):
+            self.assertEqual(responses["instructions"].encode(), prefix)
+            self.assertEqual(chat["messages"][0]["content"].encode(), prefix)
+        self.assertEqual(responses_a["prompt_cache_key"], responses_b["prompt_cache_key"])
+
+        # 일기마다 달라지는 값은 프리픽스가 아니라 그 뒤 (input / user 메시지) 에만
+        sent = [(first, responses_a, chat_a), (second, responses_b, chat_b)]
+        for (_lang, text, title, meta), responses, chat in sent:
+            for value in (text, title, *meta.values()):
+                self.assertNotIn(value, services.SYSTEM_PROMPTS["en"])
+                self.assertIn(value, responses["input"])
+                self.assertIn(value, chat["messages"][1]["content"])
+
+    def test_non_english_entries_share_the_korean_prefix(self):
+        ko = self._kwargs("ko", "오늘은 비가 와서 집에서 책을 읽었다.", None, None)[0]
+        other = self._kwargs("ja", "今日は雨でした。", None, None)[0]
+        self.assertEqual(ko["instructions"], services.SYSTEM_PROMPTS["ko"])
+        self.assertEqual(other["instructions"], services.SYSTEM_PROMPTS["ko"])
+        self.assertEqual(ko["prompt_cache_key"], other["prompt_cache_key"])
+
+
+class ChunkingTests(TestCase):
+    def test_long_text_is_split_on_boundaries_and_merged(self):
+        paragraph = " ".join(["I went to the park today."] * 80)
+        chunks = split_text("\n\n".join([paragraph] * 3), chunk_tokens=600)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(c.endswith(".") for c in chunks))
+        self.assertLess(output_budget(estimate_tokens("hi")), output_budget(estimate_tokens(paragraph)))
+
+        parts = [
+            {"translation": {"to": "ko", "text": "a"}, "corrections": {"corrected": "A", "explanations": ["x"]},
+             "vocab_suggestions": [{"word": "Cheer up"}], "score": {"value": 90, "focus_next_time": "good"}},
+            {"translation": {"to": "ko", "text": "b"}, "corrections": {"corrected": "B", "explanations": ["y"]},
+             "vocab_suggestions": [{"word": "cheer up"}, {"word": "calm down"}], "score": {"value": 60, "focus_next_time": "tense"}},
+        ]
+        merged = merge_analyses(parts, [100, 300])
+        self.assertEqual(merged["translation"], {"to": "ko", "text": "a\n\nb"})
+        self.assertEqual(merged["corrections"]["explanations"], ["x", "y"])
+        self.assertEqual([v["word"] for v in merged["vocab_suggestions"]], ["Cheer up", "calm down"])
+        self.assertEqual((merged["score"]["value"], merged["score"]["focus_next_time"]), (68, "tense"))
+
+
+    def test_malformed_sections_do_not_break_the_merge(self):
+        parts = [
+            services._parse_json(json.dumps({"translation": None, "corrections": "oops", "score": 85,
+                                             "vocab_suggestions": ["stroll", {"word": "walk"}]})),
+            services._parse_json(json.dumps({"translation": {"to": "ko", "text": "b"}, "score": {"value": 70}})),
+            services._parse_json("[1, 2]"),
+        ]
+        merged = merge_analyses(parts, [100, 100, 100])
+        self.assertEqual(merged["translation"], {"to": "ko", "text": "b"})
+        self.assertEqual([v["word"] for v in merged["vocab_suggestions"]], ["walk"])
+        self.assertEqual(merged["score"]["value"], 70)
+        self.assertEqual(merged["raw"], "[1, 2]")
+
+
+class ResilienceTests(TestCase):
+    """가짜 OpenAI 서버(entries.fake_openai)에 실제 HTTP 로 붙여서 재시도 / 브레이커 확인"""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker("test", window=4, min_calls=4, error_rate=0.5, cooldown=60)
+        patcher = mock.patch.object(services, "openai_breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analyze(self, server):
+        client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+        with mock.patch.object(services, "client", client):
+            return services.analyze_with_openai(original_lang="en", original_text="I went to the park.")
+
+    def test_retries_honor_retry_after(self):
+        faults = [{"status": 429, "headers": {"retry-after-ms": "10"}}, {"status": 503}]
+        with FakeOpenAIServer(faults=faults) as server, mock.patch.object(resilience, "_sleep") as sleep:
+            data = self._analyze(server)
+        self.assertEqual(data["score"]["value"], 80)
+        self.assertEqual(server.requests, 3)
+        self.assertGreaterEqual(sleep.call_args_list[0].args[0], 0.01)
+        self.assertEqual(self.breaker.snapshot()["state"], "closed")
+
+    def test_breaker_opens_and_fails_fast(self):
+        with FakeOpenAIServer(error_rate=1.0) as server, mock.patch.object(resilience, "_sleep"):
+            first = self._analyze(server)  # 3번 시도 → 실패 3
+            second = self._analyze(server)  # 1번 더 실패 → 실패율 100% → open
+            requests = server.requests
+            third = self._analyze(server)
+
+        self.assertEqual((first.status_code, second.status_code), (502, 503))
+        self.assertEqual(third.status_code, 503)
+        self.assertEqual(server.requests, requests)  # 업스트림을 부르지 않음
+        self.assertIn("Retry-After", third)
+        self.assertEqual(breaker_states()["openai"]["name"], "openai")
+
+
+class AdmissionTests(TestCase):
+    def test_saturated_limiter_sheds_load_without_calling_upstream(self):
+        limiter = AdaptiveLimiter("test", initial=1, min_limit=1, queue_size=0)
+        results = []
+
+        def analyze(client):
+            with mock.patch.object(services, "client", client):
+                results.append(services.analyze_with_openai(original_lang="en", original_text="Hi."))
+
+        with FakeOpenAIServer(latency=0.3) as server, mock.patch.object(services, "analysis_limiter", limiter):
+            client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+            first = threading.Thread(target=analyze, args=(client,))
+            first.start()
+            while limiter.snapshot()["in_flight"] == 0:
+                time.sleep(0.01)
+            analyze(client)  # 한도 1 이 이미 차 있음 → 대기열 없음 → 즉시 503
+            first.join()
+
+        rejected = next(r for r in results if not isinstance(r, dict))
+        self.assertEqual(rejected.status_code, 503)
+        self.assertEqual(rejected.data["code"], "overloaded")
+        self.assertIn("Retry-After", rejected)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(limiter.snapshot()["in_flight"], 0)
+
+    def _stream_with_fault(self, limiter, fault):
+        # 재시도까지 전부 실패하도록 같은 장애를 시도 횟수만큼
+        with FakeOpenAIServer(faults=[fault] * resilience.RETRY_MAX_ATTEMPTS) as server, \
+                mock.patch.object(services, "analysis_limiter", limiter), \
+                mock.patch.object(services, "openai_breaker", CircuitBreaker("test", min_calls=100)), \
+                mock.patch.object(resilience, "RETRY_BASE_DELAY", 0.01), \
+                mock.patch.object(services, "client", OpenAI(api_key="x", base_url=server.base_url, max_retries=0)):
+            return list(services.stream_analysis_with_openai(original_lang="en", original_text="Hi."))
+
+    def test_stream_upstream_overload_lowers_limit(self):
+        for fault_status, error_status in ((429, 429), (500, 502)):
+            limiter = AdaptiveLimiter("test", initial=4, min_limit=1)
+            events = self._stream_with_fault(limiter, {"status": fault_status})
+            self.assertEqual(events[-1][:2], ("error", error_status))
+            self.assertLess(limiter.limit, 4)
+            self.assertEqual(limiter.snapshot()["in_flight"], 0)
+
+    def test_bad_request_does_not_lower_limit(self):
+        limiter = AdaptiveLimiter("test", initial=4, min_limit=1)
+        events = self._stream_with_fault(limiter, {"status": 400})
+        self.assertEqual(events[-1][:2], ("error", 502))
+        self.assertEqual(limiter.limit, 4)
+
+        with FakeOpenAIServer(faults=[{"status": 401}]) as server, \
+                mock.patch.object(services, "analysis_limiter", limiter), \
+                mock.patch.object(services, "client", OpenAI(api_key="x", base_url=server.base_url, max_retries=0)):
+            result = services.analyze_with_openai(original_lang="en", original_text="Hi.")
+        self.assertEqual(result.status_code, 502)
+        self.assertEqual(limiter.limit, 4)
+
+    async def test_dropped_async_slot_lowers_limit_on_exception(self):
+        limiter = AdaptiveLimiter("test", initial=4, min_limit=1)
+        with self.assertRaises(RuntimeError):
+            async with limiter.aslot() as slot:
+                slot.drop()
+                raise RuntimeError("upstream overloaded")
+        self.assertLess(limiter.limit, 4)
+
+    def test_limit_grows_when_busy_and_backs_off_on_latency_or_overload(self):
+        limiter = AdaptiveLimiter("test", initial=4, min_limit=1, max_limit=8)
+        for _ in range(20):
+            for _ in range(4):
+                limiter.acquire()
+            for _ in range(4):
+                limiter.release(Slot.SUCCESS, 0.1)
+        self.assertGreater(limiter.limit, 4)
+
+        grown = limiter.limit
+        limiter.acquire()
+        limiter.release(Slot.SUCCESS, 5.0)  # 기준 지연보다 훨씬 느림
+        self.assertLess(limiter.limit, grown)
+
+        limiter.reset()
+        limiter.acquire()
+        limiter.release(Slot.DROPPED)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_queued_request_times_out(self):
+        limiter = AdaptiveLimiter("test", initial=1, min_limit=1, queue_size=1, queue_timeout=0.05)
+        limiter.acquire()
+        with self.assertRaises(Overloaded) as ctx:
+            limiter.acquire()
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+        self.assertEqual(limiter.snapshot()["rejected"], 1)
+
+    def test_cancelled_async_waiter_does_not_leak_a_slot(self):
+        limiter = AdaptiveLimiter("test", initial=1, min_limit=1, max_limit=1, queue_size=1, queue_timeout=5)
+
+        async def scenario():
+            async def wait_for_slot():
+                async with limiter.aslot():
+                    pass
+
+            limiter.acquire()
+            waiter = asyncio.ensure_future(wait_for_slot())
+            while limiter.snapshot()["waiting"] == 0:
+                await asyncio.sleep(0.01)
+            waiter.cancel()  # ASGI 에서 클라이언트가 끊긴 경우
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            limiter.release()
+            await asyncio.sleep(0.2)  # 예전 구현이면 이 사이 스레드가 자리를 잡아 버림
+
+        asyncio.run(scenario())
+        self.assertEqual((limiter.snapshot()["in_flight"], limiter.snapshot()["waiting"]), (0, 0))
+
+
+class OpsUpstreamsTests(TestCase):
+    def test_staff_sees_toss_latency_next_to_limiters(self):
+        with mock.patch.object(toss_clients, "_metrics", {}):
+            toss_clients._record("login_me", 120.0, True)
+            toss_clients._record("login_me", 80.0, False)
+            client = APIClient()
+            client.force_authenticate(User.objects.create_user("ops", is_staff=True))
+            res = client.get("/api/ops/upstreams/")
+
+        self.assertIn("openai", res.data["limiters"])
+        self.assertEqual(
+            res.data["toss"],
+            {"login_me": {"count": 2, "errors": 1, "total_ms": 200.0, "max_ms": 120.0, "avg_ms": 100.0}},
+        )
+
+    def test_app_users_are_forbidden(self):
+        client = APIClient()
+        client.force_authenticate(AppUser.objects.create(toss_user_key=1))
+        self.assertEqual(client.get("/api/ops/upstreams/").status_code, 403)
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entry = Entry.objects.create(
+            user=self.user, date=date(2025, 3, 1), original_lang="en", original_text="I went to the park."
+        )
+        self.key = singleflight.flight_key(self.entry)
+        analysis_cache._lru.clear()
+
+    def _analyze(self, server, **kwargs):
+        client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+        with mock.patch.object(services, "client", client):
+            return singleflight.analyze_entry(self.entry, **kwargs)
+
+    def test_concurrent_callers_in_process_share_leader_result(self):
+        flight, _ = singleflight.begin(self.key)
+        got = []
+        follower = threading.Thread(target=lambda: got.append(singleflight.begin(self.key, wait=5)))
+        follower.start()
+        time.sleep(0.1)  # 팔로워가 리더의 결과를 기다리는 중 (DB 는 건드리지 않음)
+        singleflight.finish(flight, {"analysis": {"score": {"value": 90}}})
+        follower.join()
+
+        self.assertEqual(got, [(None, {"analysis": {"score": {"value": 90}}})])
+        self.assertEqual(AnalysisLease.objects.get(key=self.key).result["analysis"]["score"]["value"], 90)
+
+    def test_result_from_another_worker_is_reused_without_upstream_call(self):
+        AnalysisLease.objects.create(key=self.key, owner="other", expires_at=datetime.now() + timedelta(seconds=60))
+
+        def other_worker_finishes(_delay):
+            AnalysisLease.objects.filter(key=self.key).update(
+                result={"analysis": {"score": {"value": 70}}},
+                expires_at=datetime.now() + timedelta(seconds=singleflight.LEASE_GRACE),
+            )
+
+        with FakeOpenAIServer() as server, mock.patch.object(singleflight, "_sleep", other_worker_finishes):
+            data, cached = self._analyze(server, fresh=True)
+        self.assertEqual((data["score"]["value"], cached), (70, True))
+        self.assertEqual(server.requests, 0)
+
+    def test_fresh_request_after_leader_finished_runs_again(self):
+        AnalysisLease.objects.create(
+            key=self.key, owner="other", result={"analysis": {"score": {"value": 70}}},
+            expires_at=datetime.now() + timedelta(seconds=5),
+        )
+        with FakeOpenAIServer() as server:
+            data, cached = self._analyze(server, fresh=True)
+        self.assertEqual((data["score"]["value"], cached), (80, False))
+        self.assertEqual(server.requests, 1)
+
+    def test_running_lease_elsewhere_returns_busy_then_expired_lease_is_taken_over(self):
+        AnalysisLease.objects.create(key=self.key, owner="other", expires_at=datetime.now() + timedelta(seconds=60))
+        with FakeOpenAIServer() as server, mock.patch.object(singleflight, "LEASE_WAIT", 0.2):
+            busy, _ = self._analyze(server)
+            self.assertEqual((busy.status_code, busy.data["code"]), (503, "analysis_in_progress"))
+            self.assertEqual(server.requests, 0)
+
+            AnalysisLease.objects.filter(key=self.key).update(expires_at=datetime.now() - timedelta(seconds=1))
+            data, cached = self._analyze(server)
+
+        self.assertEqual((data["score"]["value"], cached), (80, False))
+        self.assertEqual(server.requests, 1)
+        lease = AnalysisLease.objects.get(key=self.key)
+        self.assertNotEqual(lease.owner, "other")
+        self.assertIsNotNone(lease.result)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.score, 80)
+
+    def test_failed_leader_releases_lease(self):
+        with FakeOpenAIServer(faults=[{"status": 400}]) as server:
+            data, _ = self._analyze(server)
+        self.assertEqual(data.status_code, 502)
+        self.assertFalse(AnalysisLease.objects.filter(key=self.key).exists())
+        self.assertNotIn(self.key, singleflight._flights)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entries = [
+            Entry.objects.create(
+                user=self.user, date=date(2025, 5, day), title="t", original_lang="en", original_text=f"Day {day}."
+            )
+            for day in (1, 2)
+        ]
+
+    def test_entries_edited_after_submit_are_not_overwritten(self):
+        batch_client = LocalBatchClient(lambda body: json.dumps({"score": {"value": 75}}))
+        with tempfile.TemporaryDirectory() as workdir:
+            batch_id = submit_batch(batch_client, Entry.objects.order_by("id"), Path(workdir))
+        edited = self.entries[1]
+        edited.original_text = "Rewritten while the batch was running."
+        edited.save()
+
+        output_file_id = batch_client.retrieve(batch_id)["output_file_id"]
+        self.assertEqual(apply_batch_output(batch_client, output_file_id), 1)
+        self.assertEqual(Entry.objects.get(id=self.entries[0].id).score, 75)
+        self.assertIsNone(Entry.objects.get(id=edited.id).analysis)
+
+    def test_batch_client_requires_every_operation(self):
+        class UploadOnly(BatchClient):
+            def upload(self, path):
+                return "file-1"
+
+        with self.assertRaises(TypeError):
+            UploadOnly()
+
+
+class AnalyzeEntriesCommandTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entries = [
+            Entry.objects.create(
+                user=self.user, date=date(2025, 6, day), title="t", original_lang="en", original_text=f"Day {day}."
+            )
+            for day in (1, 2, 3)
+        ]
+
+    def _run(self, checkpoint, fail_ids=()):
+        def analyze_cached(*, original_text, **_kwargs):
+            if any(original_text == e.original_text for e in self.entries if e.id in fail_ids):
+                return Response({"detail": "upstream error"}, status=502), False
+            return {"score": {"value": 60}}, False
+
+        with mock.patch("entries.management.commands.analyze_entries.analyze_cached", analyze_cached):
+            call_command(
+                "analyze_entries", "--missing", "--batch-size", "1", "--checkpoint", checkpoint,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+        return json.loads(Path(checkpoint).read_text())
+
+    def test_failed_entries_are_retried_on_resume(self):
+        failing = self.entries[1].id
+        with tempfile.TemporaryDirectory() as workdir:
+            checkpoint = str(Path(workdir) / "checkpoint.json")
+            state = self._run(checkpoint, fail_ids={failing})
+            self.assertEqual(state, {"last_id": self.entries[2].id, "failed_ids": [failing]})
+            self.assertIsNone(Entry.objects.get(id=failing).analysis)
+
+            state = self._run(checkpoint)
+        self.assertEqual(state["failed_ids"], [])
+        self.assertEqual(Entry.objects.get(id=failing).score, 60)
+
+    def test_overloaded_entries_are_retried_not_failed(self):
+        calls = []
+        limits = []
+
+        def analyze_cached(*, original_text, **_kwargs):
+            calls.append(original_text)
+            limits.append(services.analysis_limiter.max_limit)
+            if calls.count(original_text) == 1:
+                return Response({"code": "overloaded", "retry_after": 1}, status=503), False
+            return {"score": {"value": 70}}, False
+
+        shared = services.analysis_limiter
+        with tempfile.TemporaryDirectory() as workdir, \
+                mock.patch("entries.management.commands.analyze_entries.analyze_cached", analyze_cached), \
+                mock.patch("entries.management.commands.analyze_entries.time.sleep") as sleep:
+            checkpoint = str(Path(workdir) / "checkpoint.json")
+            call_command(
+                "analyze_entries", "--missing", "--concurrency", "3", "--checkpoint", checkpoint,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+            state = json.loads(Path(checkpoint).read_text())
+
+        self.assertEqual(state["failed_ids"], [])
+        self.assertEqual(len(calls), 6)
+        self.assertEqual(sleep.call_count, 3)
+        self.assertEqual(set(limits), {3})  # 서버용 한도가 아니라 --concurrency 크기의 자기 한도
+        self.assertIs(services.analysis_limiter, shared)
+        self.assertEqual([e.score for e in Entry.objects.filter(user=self.user)], [70, 70, 70])
+
+    def test_entry_edited_during_analysis_is_not_overwritten(self):
+        edited = self.entries[0]
+
+        def analyze_cached(*, original_text, **_kwargs):
+            if original_text == edited.original_text:
+                Entry.objects.filter(id=edited.id).update(original_text="Edited.", content_hash="edited")
+            return {"score": {"value": 60}}, False
+
+        class InlinePool:  # 스레드에서는 sqlite 테스트 DB 에 쓸 수 없어서 같은 스레드에서 실행
+            def __init__(self, **_kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, fn, items):
+                return map(fn, items)
+
+        with tempfile.TemporaryDirectory() as workdir, \
+                mock.patch("entries.management.commands.analyze_entries.ThreadPoolExecutor", InlinePool), \
+                mock.patch("entries.management.commands.analyze_entries.analyze_cached", analyze_cached):
+            checkpoint = str(Path(workdir) / "checkpoint.json")
+            call_command(
+                "analyze_entries", "--missing", "--checkpoint", checkpoint,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+            state = json.loads(Path(checkpoint).read_text())
+
+        self.assertIsNone(Entry.objects.get(id=edited.id).analysis)
+        self.assertEqual(state["failed_ids"], [edited.id])  # 다음 실행에서 새 본문으로 다시 분석
+        self.assertEqual(Entry.objects.get(id=self.entries[1].id).score, 60)
+
+
+class AnalysisJobTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entry = Entry.objects.create(
+            user=self.user, date=date(2025, 3, 2), original_lang="en", original_text="I went to the park."
+        )
+        self.job = jobs.enqueue_analysis(self.entry)
+
+    def _expire_running(self):
+        AnalysisJob.objects.filter(id=self.job.id).update(started_at=datetime.now() - timedelta(hours=1))
+
+    def test_worker_crash_counts_attempt_and_fails_after_max(self):
+        for _ in range(jobs.ANALYSIS_JOB_MAX_ATTEMPTS):
+            claimed = jobs.claim_next_job()  # run_job 전에 워커가 죽었다고 가정
+            self.assertEqual(claimed.id, self.job.id)
+            self._expire_running()
+            jobs.requeue_stale_jobs()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.attempts, jobs.ANALYSIS_JOB_MAX_ATTEMPTS)
+        self.assertEqual(self.job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_overloaded_requeue_does_not_use_an_attempt(self):
+        busy = Response({"code": "overloaded", "retry_after": 2}, status=503)
+        with mock.patch.object(jobs, "analyze_entry", return_value=(busy, False)):
+            backoff = jobs.run_job(jobs.claim_next_job())
+
+        self.job.refresh_from_db()
+        self.assertEqual(backoff, 2.0)
+        self.assertEqual((self.job.status, self.job.attempts), (AnalysisJob.STATUS_PENDING, 0))
+
+    def test_open_breaker_requeues_with_its_retry_after(self):
+        unavailable = Response({"code": "upstream_unavailable", "retry_after": 12}, status=503)
+        with mock.patch.object(jobs, "analyze_entry", return_value=(unavailable, False)):
+            backoff = jobs.run_job(jobs.claim_next_job())
+
+        self.job.refresh_from_db()
+        self.assertEqual(backoff, 12.0)
+        self.assertEqual((self.job.status, self.job.attempts), (AnalysisJob.STATUS_PENDING, 0))
+
+    def test_successful_run_keeps_claimed_attempt(self):
+        with mock.patch.object(jobs, "analyze_entry", return_value=({"score": {"value": 80}}, False)):
+            jobs.run_job(jobs.claim_next_job())
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), (AnalysisJob.STATUS_DONE, 1))
+
+    def test_purge_removes_only_old_finished_jobs(self):
+        old = datetime.now() - timedelta(days=jobs.ANALYSIS_JOB_RETENTION_DAYS + 1)
+        recent = datetime.now() - timedelta(days=1)
+        AnalysisJob.objects.filter(id=self.job.id).update(status=AnalysisJob.STATUS_DONE, finished_at=old)
+        keep = [
+            AnalysisJob.objects.create(entry=self.entry, status=AnalysisJob.STATUS_DONE, finished_at=recent),
+            AnalysisJob.objects.create(entry=self.entry, status=AnalysisJob.STATUS_RUNNING, finished_at=old),
+            AnalysisJob.objects.create(entry=self.entry),
+        ]
+        AnalysisJob.objects.create(entry=self.entry, status=AnalysisJob.STATUS_FAILED, finished_at=old)
+
+        out = io.StringIO()
+        call_command("purge_analysis_jobs", "--batch-size", "1", stdout=out)
+        self.assertIn("Purged 2 analysis jobs.", out.getvalue())
+        self.assertEqual(set(AnalysisJob.objects.values_list("id", flat=True)), {job.id for job in keep})
+
+
+@override_settings(ROOT_URLCONF="config.urls_async", DEBUG=False)
+class AsyncAnalyzeViewTests(TestCase):
+    """ASGI 경로 (entries.async_views) 를 AsyncClient 로, OpenAI 는 가짜 서버에 실제 HTTP 로"""
+
+    def setUp(self):
+        self.user = AppUser.objects.create(toss_user_key=1)
+        self.entry = Entry.objects.create(
+            user=self.user, date=date(2025, 4, 1), original_lang="en", original_text="I went to the park."
+        )
+        self.headers = {"Authorization": f"Bearer {issue_app_jwt(self.user.id)}"}
+        analysis_cache._lru.clear()
+
+    async def _post(self, server, path, n=1):
+        aclient = AsyncOpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+        client = AsyncClient()
+        with mock.patch.object(services, "get_async_client", lambda: aclient):
+            try:
+                return await asyncio.gather(*(client.post(path, headers=self.headers) for _ in range(n)))
+            finally:
+                await aclient.close()
+
+    async def test_analyze_saves_result(self):
+        with FakeOpenAIServer() as server:
+            (resp,) = await self._post(server, f"/api/entries/{self.entry.pk}/analyze/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.json()["analysis"]["score"]["value"], resp.json()["cached"]), (80, False))
+        await self.entry.arefresh_from_db()
+        self.assertEqual(self.entry.score, 80)
+
+    async def test_concurrent_requests_share_one_upstream_call(self):
+        with FakeOpenAIServer(latency=0.3) as server:
+            responses = await self._post(server, f"/api/entries/{self.entry.pk}/analyze/?fresh=1", n=3)
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+        self.assertEqual(sorted(r.json()["cached"] for r in responses), [False, True, True])
+        self.assertEqual(server.requests, 1)
+
+    async def test_requires_auth_and_owner(self):
+        other = await AppUser.objects.acreate(toss_user_key=2)
+        self.headers = {"Authorization": f"Bearer {issue_app_jwt(other.id)}"}
+        with FakeOpenAIServer() as server:
+            (not_found,) = await self._post(server, f"/api/entries/{self.entry.pk}/analyze/")
+            self.headers = {}
+            (denied,) = await self._post(server, f"/api/entries/{self.entry.pk}/analyze/")
+        self.assertEqual((not_found.status_code, denied.status_code), (404, 403))
+        self.assertEqual(server.requests, 0)
+
+    async def test_stream_sends_first_section_before_upstream_finishes(self):
+        gate = threading.Event()
+        with FakeOpenAIServer(stream_gate=gate) as server:
+            aclient = AsyncOpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+            with mock.patch.object(services, "get_async_client", lambda: aclient):
+                resp = await AsyncClient().post(
+                    f"/api/entries/{self.entry.pk}/analyze/?stream=1", headers=self.headers
+                )
+                self.assertTrue(resp.is_async)
+                events = resp.__aiter__()
+                try:
+                    # 가짜 서버는 첫 섹션만 보내고 gate 가 열릴 때까지 멈춰 있다
+                    first = await asyncio.wait_for(events.__anext__(), 5)
+                    self.assertTrue(first.startswith(b"event: translation\n"))
+                finally:
+                    gate.set()
+                rest = b"".join([chunk async for chunk in events])
+            await aclient.close()
+
+        self.assertEqual(
+            re.findall(rb"^event: (\w+)", rest, re.M),
+            [b"corrections", b"vocab_suggestions", b"score", b"done"],
+        )
+        await self.entry.arefresh_from_db()
+        self.assertEqual(self.entry.score, 80)
+
+    async def test_export_streams_from_an_async_iterator(self):
+        await Entry.objects.acreate(
+            user=self.user, date=date(2025, 4, 2), title="second", original_lang="en", original_text="Later."
+        )
+        with mock.patch("entries.ndjson.EXPORT_CHUNK_SIZE", 1):
+            resp = await AsyncClient().get("/api/entries/export/", headers=self.headers)
+            self.assertTrue(resp.is_async)
+            lines = [json.loads(line) async for line in resp]
+        self.assertEqual([line["date"] for line in lines], ["2025-04-01", "2025-04-02"])
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EntryViewSet, quotes  # dev_calendar 제거
+from .views import EntryViewSet, StatsView, VocabViewSet, ops_upstreams, quotes  # dev_calendar 제거
 
 router = DefaultRouter()
 router.register("entries", EntryViewSet, basename="entry")
+router.register("vocab", VocabViewSet, basename="vocab")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("quotes/", quotes),
+    path("stats/", StatsView.as_view()),
+    path("ops/upstreams/", ops_upstreams),
 ]
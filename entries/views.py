@@ -2,25 +2,49 @@
 from datetime import date
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
 import calendar as py_calendar 
-from .models import Entry
-from .serializers import EntryCreateSerializer, EntryDetailSerializer, EntryListSerializer
-from .services import analyze_with_openai
-import json
-import random
-from pathlib import Path
+from .models import Entry, UserStats, VocabItem, compute_content_hash
+from .serializers import EntryCreateSerializer, EntryDetailSerializer, EntryListSerializer, VocabItemSerializer
+from .cache import cache_stats, get_cached_analysis, make_cache_key, store_analysis
+from .jobs import enqueue_analysis, latest_job
+from .conditional import entry_etag, etag_matches, fingerprint_etag, not_modified, set_validators
+from .pagination import EntryCursorPagination, VocabCursorPagination
+from .admission import limiter_states
+from .resilience import breaker_states
+from .response_cache import bump_generation, cached_per_user, response_cache_stats
+from .sync import ResyncRequired, fetch_changes
+from .quotes import quotes_etag, quotes_index, seconds_until_midnight_kst, today_kst, user_offset
+from .services import save_analysis, stream_analysis_with_openai, upsert_entry
+from .singleflight import analyze_entry, begin as begin_flight, busy_response, finish as finish_flight, flight_key
+from .sse import EventStreamRenderer, event_stream_response, sse_event
+from .ndjson import NDJSONRenderer, export_lines, export_response, import_lines
+from .search import SEARCH_PAGE_SIZE, normalize_query, search_entry_ids
+from .stats import serialize_stats
 from rest_framework.exceptions import AuthenticationFailed
 from accounts.models import AppUser  # AUTH_USER_MODEL 이 이거라면
+from accounts.integrations.toss_clients import latency_stats as toss_latency_stats
 from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+ANALYSIS_SECTIONS = ("translation", "corrections", "vocab_suggestions", "score")
+
+
+def section_events(data):
+    """이미 완성된 분석 결과를 스트리밍과 같은 순서의 섹션 이벤트로"""
+    return [sse_event(section, data.get(section)) for section in ANALYSIS_SECTIONS]
+
+
 def _get_dev_user():
     """DEBUG일 때 쓰는 가짜 유저 (DB에 dev 계정 자동 생성)"""
     User = get_user_model()
@@ -31,9 +55,8 @@ def _get_dev_user():
     return user
 
 
-class EntryViewSet(viewsets.ModelViewSet):
-    queryset = Entry.objects.all()
-    permission_classes = [IsAuthenticated]
+class OwnerScopedMixin:
+    """DEBUG 모드 dev 유저 처리 + get_owner() (EntryViewSet / VocabViewSet 공용)"""
 
     def get_permissions(self):
         if settings.DEBUG:
@@ -45,10 +68,25 @@ class EntryViewSet(viewsets.ModelViewSet):
             return []  # 인증 비활성화 (개발모드)
         return super().get_authenticators()
 
-    def get_queryset(self):
+    def get_owner(self):
         """DEBUG 모드에서는 dev 유저, 아니면 실제 로그인 유저"""
-        user = _get_dev_user() if settings.DEBUG else self.request.user
-        return Entry.objects.filter(user=user).order_by("-date", "-id")
+        return _get_dev_user() if settings.DEBUG else self.request.user
+
+
+class EntryViewSet(OwnerScopedMixin, viewsets.ModelViewSet):
+    queryset = Entry.objects.all()
+    permission_classes = [IsAuthenticated]
+    pagination_class = EntryCursorPagination  # ?cursor= / ?page_size= (전체 목록은 ?all=1)
+
+    def get_queryset(self):
+        """
+        get_owner() 의 일기만.
+        list 는 EntryListSerializer 가 쓰는 컬럼만 읽는다 (original_text / analysis 제외).
+        """
+        qs = Entry.objects.filter(user=self.get_owner()).order_by("-date", "-id")
+        if self.action == "list":
+            qs = qs.only(*EntryListSerializer.Meta.fields)
+        return qs
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -64,6 +102,7 @@ class EntryViewSet(viewsets.ModelViewSet):
             raise AuthenticationFailed("로그인이 필요합니다.")
         serializer.save(user=user)
 
+    @cached_per_user("list")
     def list(self, request, *args, **kwargs):
         calendar_mode = request.query_params.get("calendar")
         month_param = request.query_params.get("month")  # "YYYY-MM"
@@ -89,11 +128,37 @@ class EntryViewSet(viewsets.ModelViewSet):
                 )
 
             qs = self.get_queryset().filter(date__gte=start_date, date__lte=end_date)
-            mapping = {e.date.strftime("%Y-%m-%d"): e.id for e in qs}
-            return Response(mapping)
+
+            # 그 달의 (개수, 마지막 수정시각) 집계만으로 변경 여부 판단 → 안 바뀌었으면 304
+            agg = qs.aggregate(n=Count("id"), last=Max("updated_at"))
+            etag = fingerprint_etag(f"cal{year_i:04d}{month_i:02d}", agg["n"], agg["last"])
+            cached = not_modified(request, etag, agg["last"])
+            if cached is not None:
+                return cached
+
+            # 캘린더는 (date, id) 만 필요 → 모델 인스턴스 없이 튜플로
+            mapping = {d.strftime("%Y-%m-%d"): entry_id for d, entry_id in qs.values_list("date", "id")}
+            return set_validators(Response(mapping), etag, agg["last"])
 
         return super().list(request, *args, **kwargs)
 
+    def retrieve(self, request, *args, **kwargs):
+        # updated_at 한 컬럼만 먼저 확인 → 안 바뀌었으면 본문/analysis 를 읽지 않고 304
+        updated_at = (
+            self.get_queryset()
+            .filter(pk=kwargs.get(self.lookup_field, kwargs.get("pk")))
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)  # 404 처리는 기존 경로로
+
+        etag = entry_etag(int(kwargs["pk"]), updated_at)
+        cached = not_modified(request, etag, updated_at)
+        if cached is not None:
+            return cached
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, updated_at)
+
     def create(self, request, *args, **kwargs):
         logger.info("[Entry.create] called")
         logger.debug("[Entry.create] raw data=%s", request.data)
@@ -129,63 +194,305 @@ class EntryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
     @action(detail=False, methods=["GET"], url_path="by-date")
+    @cached_per_user("by_date")
     def by_date(self, request):
         """?date=YYYY-MM-DD → 해당 날짜 엔트리 1개 반환"""
         key = request.query_params.get("date")
         if not key:
             return Response({"detail": "date query param required (YYYY-MM-DD)"}, status=400)
 
-        entry = self.get_queryset().filter(date=key).first()
-        if not entry:
+        # (id, updated_at) 만으로 먼저 조건부 GET 판단
+        row = self.get_queryset().filter(date=key).values_list("id", "updated_at").first()
+        if not row:
             return Response({"exists": False}, status=200)
 
+        entry_id, updated_at = row
+        etag = entry_etag(entry_id, updated_at)
+        cached = not_modified(request, etag, updated_at)
+        if cached is not None:
+            return cached
+
+        entry = (
+            self.get_queryset()
+            .filter(pk=entry_id)
+            .only(*EntryDetailSerializer.Meta.fields)
+            .first()
+        )
         ser = EntryDetailSerializer(entry)
-        return Response({"exists": True, "entry": ser.data})
+        return set_validators(Response({"exists": True, "entry": ser.data}), etag, updated_at)
+
+    @action(detail=False, methods=["GET"], url_path="sync")
+    def sync(self, request):
+        """
+        ?since=<cursor> → 그 이후 생성/수정/삭제된 일기만.
+        since 없이 부르면 전체 동기화. has_more 가 true 면 cursor 로 바로 다시 호출.
+        """
+        try:
+            changed, deleted, cursor, has_more = fetch_changes(
+                self.get_owner(), request.query_params.get("since")
+            )
+        except ResyncRequired:
+            return Response(
+                {"detail": "sync cursor expired, full resync required", "code": "resync_required"},
+                status=status.HTTP_410_GONE,
+            )
+
+        return Response({
+            "changed": EntryDetailSerializer(changed, many=True).data,
+            "deleted": [{"id": d["entry_id"], "date": d["date"]} for d in deleted],
+            "cursor": cursor,
+            "has_more": has_more,
+        })
+
+    @action(detail=False, methods=["GET"], url_path="search")
+    def search(self, request):
+        """
+        ?q=검색어&page=1&page_size=20 → 관련도 순 (제목 / 본문 / 교정된 영어)
+        점수 순이라 keyset 이 안 되므로 page 기반. 한 개 더 읽어서 다음 페이지 여부만 판단.
+        """
+        q = normalize_query(request.query_params.get("q", ""))
+        if not q:
+            return Response({"detail": "q query param required"}, status=400)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = max(1, min(int(request.query_params.get("page_size", SEARCH_PAGE_SIZE)), 100))
+        except ValueError:
+            return Response({"detail": "page / page_size must be integers"}, status=400)
+
+        hits = search_entry_ids(
+            q, user_id=self.get_owner().pk, limit=page_size + 1, offset=(page - 1) * page_size
+        )
+        has_next, hits = len(hits) > page_size, hits[:page_size]
+
+        entries = self.get_queryset().only(*EntryListSerializer.Meta.fields).in_bulk([i for i, _ in hits])
+        results = []
+        for entry_id, score in hits:
+            if entry_id in entries:
+                results.append({**EntryListSerializer(entries[entry_id]).data, "score": round(score, 4)})
+
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), "page", page + 1)
+        return Response({"next": next_link, "page": page, "results": results})
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer],
+    )
+    def export(self, request):
+        """내 일기 전체를 NDJSON 으로 (한 줄 = 일기 하나, 날짜 오름차순)"""
+        return export_response(export_lines(self.get_owner()))
+
+    @action(detail=False, methods=["POST"], url_path="import")
+    def import_entries(self, request):
+        """
+        본문: export 와 같은 형식의 NDJSON (Content-Type: application/x-ndjson)
+        ?on_conflict=skip (기본, 이미 있는 날짜는 건너뜀) | overwrite
+        본문을 한 번에 읽지 않고 줄 단위로 스트리밍 → IMPORT_BATCH_SIZE 개씩 bulk_create
+        """
+        on_conflict = request.query_params.get("on_conflict", "skip")
+        if on_conflict not in ("skip", "overwrite"):
+            return Response({"detail": "on_conflict must be skip or overwrite"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # request.data 를 건드리면 파서가 본문 전체를 메모리에 올리므로 원본 스트림을 직접 읽는다
+        result = import_lines(self.get_owner(), request._request, overwrite=on_conflict == "overwrite")
+        return Response(result, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["POST"], url_path="upsert-by-date")
     def upsert_by_date(self, request):
         """
         { date, title, original_lang, original_text, meta? }
-        → 해당 날짜 엔트리 있으면 수정, 없으면 생성
+        → 해당 날짜 엔트리 있으면 수정, 없으면 생성 (내용이 같으면 "unchanged", 쓰기 없음)
+        생성 / 수정 모두 EntryCreateSerializer 검증을 거친 뒤 upsert_entry (ON DUPLICATE KEY UPDATE) 한 번으로 쓴다.
+        "unchanged" 판단은 ON DUPLICATE KEY UPDATE 안에 조건을 넣을 수 없어서 (bulk_create 가 지원 안 함)
+        유니크 인덱스로 id / content_hash 만 먼저 읽어서 한다. 그 사이 같은 날짜가 생겨도 upsert 가 받아준다.
         """
         data = request.data or {}
         key = data.get("date")
         if not key:
             return Response({"detail": "date is required (YYYY-MM-DD)"}, status=400)
+        try:
+            entry_date = date.fromisoformat(str(key))
+        except ValueError:
+            return Response({"detail": "date must be YYYY-MM-DD"}, status=400)
 
-        entry = self.get_queryset().filter(date=key).first()
         common = {
             "title": data.get("title", "").strip(),
             "original_lang": data.get("original_lang", "en"),
             "original_text": data.get("original_text", ""),
             "meta": data.get("meta") or {},
         }
+        ser = EntryCreateSerializer(data={**common, "date": key}, context={"request": request})
+        ser.is_valid(raise_exception=True)
+        content_hash = compute_content_hash(
+            common["title"], common["original_lang"], common["original_text"], common["meta"]
+        )
 
-        if entry:
-            for k, v in common.items():
-                setattr(entry, k, v)
-            entry.save()
-            return Response({"id": entry.id, "action": "updated"}, status=200)
-        else:
-            ser = EntryCreateSerializer(data={**common, "date": key}, context={"request": request})
-            ser.is_valid(raise_exception=True)
-            entry = ser.save()
-            return Response({"id": entry.id, "action": "created"}, status=201)
-
-    @action(detail=True, methods=["POST"])
+        # (user, date) 유니크 인덱스로 id / content_hash 만 확인
+        existing = self.get_queryset().filter(date=entry_date).values_list("id", "content_hash").first()
+        if existing and existing[1] == content_hash:
+            # 내용이 그대로면 쓰기 자체를 생략
+            return Response({"id": existing[0], "action": "unchanged"}, status=200)
+
+        user = self.get_owner()
+        entry_id = upsert_entry(user, entry_date, common)
+        bump_generation(user.pk)  # bulk_create 는 post_save 를 안 탄다
+        if existing:
+            return Response({"id": entry_id, "action": "updated"}, status=200)
+        return Response({"id": entry_id, "action": "created"}, status=201)
+
+    @action(
+        detail=True,
+        methods=["POST"],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer],
+    )
     def analyze(self, request, pk=None):
+        """
+        내용이 바뀌지 않은 일기는 캐시된 분석 결과를 그대로 돌려준다.
+        ?fresh=1 이면 캐시를 무시하고 새로 분석한다.
+        ?async=1 이면 작업만 적재하고 202 + job_id 반환 (analysis-status 로 폴링)
+        ?stream=1 이면 섹션이 완성될 때마다 SSE 이벤트로 흘려보낸다.
+        """
         entry = self.get_object()
+        fresh = request.query_params.get("fresh") in ("1", "true")
+
+        if request.query_params.get("stream") in ("1", "true"):
+            return event_stream_response(self._analysis_event_stream(entry, fresh))
 
-        data = analyze_with_openai(
+        if request.query_params.get("async") in ("1", "true"):
+            job = enqueue_analysis(entry, fresh=fresh)
+            return Response(
+                {"status": job.status, "job_id": job.id},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # 같은 일기(내용)에 동시에 들어온 요청은 하나로 합쳐서 OpenAI 는 한 번만 부른다
+        data, cached = analyze_entry(entry, fresh=fresh)
+        if isinstance(data, Response):
+            # OpenAI 에러(429/502 등)는 그대로 전달, analysis 는 건드리지 않음
+            return data
+
+        return Response({"status": "ok", "analysis": data, "cached": cached})
+
+    def _analysis_event_stream(self, entry, fresh):
+        """
+        SSE 이벤트 순서:
+          translation / corrections / vocab_suggestions / score (완성되는 대로)
+          → done (전체 analysis, 저장 완료 후) 또는 error
+        """
+        kwargs = dict(
             original_lang=entry.original_lang,
             original_text=entry.original_text,
             title=entry.title,
             meta=entry.meta or {},
         )
-        entry.analysis = data
-        entry.save(update_fields=["analysis", "updated_at"])
+        key = make_cache_key(**kwargs)
+
+        data = None if fresh else get_cached_analysis(key)
+        if data is not None:
+            yield from section_events(data)
+            save_analysis(entry, data)
+            yield sse_event("done", {"analysis": data, "cached": True})
+            return
+
+        # 같은 일기를 이미 분석 중인 요청이 있으면 그 결과를 받아서 한 번에 내보낸다
+        flight, shared = begin_flight(flight_key(entry))
+        if flight is None:
+            if shared is None:
+                yield sse_event("error", {**busy_response().data, "status": 503})
+                return
+            data = shared["analysis"]
+            yield from section_events(data)
+            yield sse_event("done", {"analysis": data, "cached": True})
+            return
+
+        result = None
+        try:
+            for kind, key_or_status, value in stream_analysis_with_openai(**kwargs):
+                if kind == "section":
+                    yield sse_event(key_or_status, value)
+                elif kind == "error":
+                    yield sse_event("error", {**value, "status": key_or_status})
+                    return
+                else:
+                    data = value
+
+            save_analysis(entry, data)
+            result = {"analysis": data}
+        finally:
+            # 클라이언트가 중간에 끊어도 (GeneratorExit) 리스는 풀린다
+            finish_flight(flight, result)
+        try:
+            store_analysis(key, data)
+        except Exception:
+            logger.warning("[Entry.analyze] cache store failed (stream)", exc_info=True)
+        yield sse_event("done", {"analysis": data, "cached": False})
+
+    @action(detail=True, methods=["GET"], url_path="analysis-status")
+    def analysis_status(self, request, pk=None):
+        """비동기 분석 작업 상태: pending / running / done / failed"""
+        entry = self.get_object()
+        job = latest_job(entry)
+        if not job:
+            return Response({"detail": "no analysis job"}, status=404)
+
+        body = {"job_id": job.id, "status": job.status}
+        if job.status == job.STATUS_DONE:
+            body["analysis"] = entry.analysis
+        elif job.status == job.STATUS_FAILED:
+            body["error"] = job.error
+        return Response(body)
 
-        return Response({"status": "ok", "analysis": data})
+
+class VocabViewSet(OwnerScopedMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    GET /api/vocab/ → 내 단어장 (최근 등장 순, ?cursor= / ?page_size=)
+    analysis JSON 을 풀지 않고 VocabItem (user, last_seen, id) 인덱스만 읽는다.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = VocabItemSerializer
+    pagination_class = VocabCursorPagination
+
+    def get_queryset(self):
+        return VocabItem.objects.filter(user=self.get_owner()).order_by("-last_seen", "-id")
+
+
+class StatsView(OwnerScopedMixin, APIView):
+    """
+    GET /api/stats/?year=2025
+    → 연속 기록 / 월별 점수 (sum, count, min, max, avg) / 연도별 일기 비트맵 (base64, 1월 1일 = 0번 비트)
+    UserStats 한 행을 PK 로 읽기만 한다 (집계는 저장 시점에 이미 끝나 있음).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        year = request.query_params.get("year")
+        if year is not None and not year.isdigit():
+            return Response({"detail": "year must be YYYY"}, status=400)
+        stats = UserStats.objects.filter(pk=self.get_owner().pk).first()
+        return Response(serialize_stats(stats, today_kst(), int(year) if year else None))
+
+
+class IsStaff(BasePermission):
+    """Django admin 세션(staff) 전용. AppUser / ClaimsUser 에는 is_staff 가 없다"""
+
+    def has_permission(self, request, view):
+        return bool(getattr(request.user, "is_staff", False))
+
+
+@api_view(["GET"])
+@permission_classes([IsStaff])
+def ops_upstreams(request):
+    """운영용: 업스트림 브레이커 / 동시 실행 한도 / 토스 API 지연 + 분석/응답 캐시 통계 (이 프로세스 기준)"""
+    return Response({
+        "breakers": breaker_states(),
+        "limiters": limiter_states(),
+        "toss": toss_latency_stats(),
+        "analysis_cache": cache_stats(),
+        "response_cache": response_cache_stats(),
+    })
 
 
 @api_view(["GET"])
@@ -195,33 +502,23 @@ def quotes(request):
     오늘의 한 줄 학습용 문장 3개를 반환.
     en: 영어 표현 (일기에서 바로 쓸 수 있는 톤)
     ko: 한국어 뉘앙스/뜻
+
+    같은 날(KST)에는 항상 같은 3개 → 자정까지 캐시 가능 (ETag / Cache-Control).
+    로그인 유저면 유저별로 로테이션 시작점이 달라진다 (private 캐시).
     """
-    # quotes_data.json 위치 잡기
-    # entries/quotes_data.json 기준
-    quotes_path = Path(__file__).resolve().parent / "quotes_data.json"
-
-    try:
-        with open(quotes_path, "r", encoding="utf-8") as f:
-            all_quotes = json.load(f)
-    except Exception:
-        # 만약 파일이 없거나 깨졌어도 API는 죽지 않게 기본 fallback
-        all_quotes = [
-            {
-                "en": "I'm trying to focus on progress, not perfection.",
-                "ko": "완벽보다 조금씩 나아지는 것에 집중하려고 해요."
-            },
-            {
-                "en": "Today felt overwhelming, but I made it through.",
-                "ko": "오늘은 버거웠지만 그래도 버텼어요."
-            },
-            {
-                "en": "I’m slowly getting comfortable with being myself.",
-                "ko": "조금씩 있는 그대로의 나를 편하게 느끼는 중이에요."
-            }
-        ]
-
-    # 최소 3개만 주면 되니까, 3개 뽑기
-    # all_quotes가 3개 미만이라도 안전하게 처리
-    picked = random.sample(all_quotes, k=min(3, len(all_quotes)))
-
-    return Response(picked)
\ No newline at end of file
+    user = getattr(request, "user", None)
+    per_user = bool(user and user.is_authenticated)
+    offset = user_offset(user.pk) if per_user else 0
+
+    day = today_kst()
+    picked = quotes_index.pick(day, offset)
+    etag = quotes_etag(day, offset)
+    cache_control = f"{'private' if per_user else 'public'}, max-age={seconds_until_midnight_kst()}"
+
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(picked)
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
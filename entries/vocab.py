@@ -0,0 +1,115 @@
+# entries/vocab.py
+"""
+analysis.vocab_suggestions → VocabItem 단어장 동기화.
+
+save_analysis / bulk_save_analyses 에서 호출되므로 동기 analyze, 워커, 일괄 재분석,
+Batch API 반영 모두 같은 경로로 단어장이 갱신된다.
+한 번의 호출 = 유저 행 잠금 + 기존 행 SELECT 1번 + INSERT ... ON DUPLICATE KEY UPDATE 1번 (한 트랜잭션).
+"""
+from __future__ import annotations
+import re
+import string
+from typing import Dict, Iterable, Iterator, Tuple
+
+from django.db import connection, transaction
+
+from accounts.models import AppUser
+from .models import VocabItem
+
+_WS_RE = re.compile(r"\s+")
+_EDGE_PUNCT = string.punctuation + "“”‘’…"
+
+WORD_MAX_LENGTH = VocabItem._meta.get_field("word").max_length
+
+
+def normalize_word(word: str) -> str:
+    """'  Cheer up! ' → 'cheer up'"""
+    return _WS_RE.sub(" ", (word or "").strip().strip(_EDGE_PUNCT).strip()).lower()[:WORD_MAX_LENGTH]
+
+
+def iter_suggestions(analysis) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """analysis → (word_normalized, {"word", "meaning_ko", "example_en"}). 형식이 깨진 항목은 건너뜀"""
+    if not isinstance(analysis, dict):
+        return
+    for item in analysis.get("vocab_suggestions") or []:
+        if not isinstance(item, dict):
+            continue
+        normalized = normalize_word(str(item.get("word") or ""))
+        if not normalized:
+            continue
+        yield normalized, {
+            "word": str(item["word"]).strip().strip(_EDGE_PUNCT).strip()[:WORD_MAX_LENGTH],
+            "meaning_ko": str(item.get("meaning_ko") or ""),
+            "example_en": str(item.get("example_en") or ""),
+        }
+
+
+def upsert_vocab(entries: Iterable) -> int:
+    """
+    entries: analysis 가 채워진 Entry 목록 (id / user_id / date / analysis 만 있으면 됨)
+    (user, word_normalized) 별로 first_* 는 가장 이른 일기, 뜻/예문/last_seen 은 가장 최근 일기 기준.
+    리턴: upsert 한 단어 수
+    """
+    merged: Dict[Tuple[int, str], Dict] = {}
+    for entry in entries:
+        for normalized, fields in iter_suggestions(entry.analysis):
+            key = (entry.user_id, normalized)
+            row = merged.get(key)
+            if row is None:
+                merged[key] = {
+                    **fields,
+                    "first_entry_id": entry.id, "first_seen": entry.date, "last_seen": entry.date,
+                }
+                continue
+            if entry.date < row["first_seen"]:
+                row.update(first_entry_id=entry.id, first_seen=entry.date)
+            if entry.date >= row["last_seen"]:
+                row.update(fields, last_seen=entry.date)
+    if not merged:
+        return 0
+
+    user_ids = sorted({user_id for user_id, _ in merged})
+    words = {word for _, word in merged}
+    with transaction.atomic():
+        # 같은 유저의 단어장 갱신끼리는 줄을 세운다 (읽고 합친 사이에 다른 요청이 쓴 값을 덮어쓰지 않게).
+        # 없는 단어 행에 select_for_update 를 걸면 MySQL 갭 락끼리 데드락이 나므로 유저 행을 잠근다
+        locked = AppUser.objects.select_for_update().filter(id__in=user_ids).order_by("id")
+        list(locked.values_list("id", flat=True))
+        _merge_existing(merged, user_ids, words)
+        _write(merged)
+    return len(merged)
+
+
+def _merge_existing(merged: Dict[Tuple[int, str], Dict], user_ids, words) -> None:
+    """이미 있는 단어와 합친다 (예전 일기를 재분석해도 first/last 가 거꾸로 가지 않게)"""
+    existing = VocabItem.objects.filter(user_id__in=user_ids, word_normalized__in=words).values(
+        "user_id", "word_normalized", "word", "meaning_ko", "example_en",
+        "first_entry_id", "first_seen", "last_seen",
+    )
+    for old in existing:
+        row = merged.get((old["user_id"], old["word_normalized"]))
+        if row is None:
+            continue
+        if old["first_seen"] <= row["first_seen"]:
+            row.update(first_entry_id=old["first_entry_id"], first_seen=old["first_seen"])
+        if old["last_seen"] > row["last_seen"]:
+            row.update(
+                word=old["word"], meaning_ko=old["meaning_ko"], example_en=old["example_en"],
+                last_seen=old["last_seen"],
+            )
+
+
+def _write(merged: Dict[Tuple[int, str], Dict]) -> None:
+    objs = [
+        VocabItem(user_id=user_id, word_normalized=normalized, **row)
+        for (user_id, normalized), row in merged.items()
+    ]
+    kwargs = {}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs["unique_fields"] = ["user", "word_normalized"]
+    VocabItem.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        update_fields=["word", "meaning_ko", "example_en", "first_entry", "first_seen", "last_seen"],
+        **kwargs,
+    )